@@ -1,6 +1,8 @@
 import io
+import json
 import os
 import sys
+from functools import partial
 import streamlit as st
 import pandas as pd
 from io import BytesIO
@@ -13,24 +15,67 @@ SRC_DIR = os.path.abspath(os.path.join(APP_DIR, ".."))
 if SRC_DIR not in sys.path:
     sys.path.insert(0, SRC_DIR)
 
+from simulation.batch import COUNTRY_COLUMN, iter_batch, iter_country_batch, simulate_countries
+from simulation.graphs.downsample import RESOLUTIONS, downsample_energy_stack
+from simulation.graphs.energy_stack import energy_stack_chart
+from simulation.jobs import JobManager
+from simulation.price_bins import PriceBinHistogram
 from simulation.simulate_dispatch import simulate_dispatch
 from utils.data_prep import extract_from_file
+from utils.demand_curve import DemandCurve
+from utils.instrumentation import Instrumentation, instrumented, stage, use_instrumentation
 from config import PROFILES_EE, PROFILES_LV, PROFILES_PL, PROFILES_LT, SIMULATION_INPUT, DOCUMENTATION
-from utils.profiles import get_profiles
+from utils.profiles import get_profiles, load_profile_bundle
+from utils.result_sink import ExcelResultSink
 
 st.set_page_config(page_title="Sunly Baseload Simulator", layout="wide")
 
+# The server is shared by every session: a batch takes a few workers unless asked for more
+DEFAULT_BATCH_WORKERS = min(2, os.cpu_count() or 1)
+
+
+@st.cache_data(show_spinner=False)
+def read_file_bytes(path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def cached_profile_bundle(path, mtime_ns: int, size: int):
+    # One read-only bundle per profile file version, shared by all reruns and sessions
+    return load_profile_bundle(path)
+
+
+def profile_bundle(path):
+    # Keyed on the workbook's stat as well, so an updated workbook is loaded (and revalidated) again
+    stat = os.stat(path)
+    return cached_profile_bundle(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+@st.cache_resource(show_spinner=False)
+def job_manager():
+    # One per server process, outside the script rerun cycle; shared by all sessions
+    return JobManager()
+
+
+@st.cache_resource(show_spinner=False)
+def cached_demand_curve(data: bytes, name: str):
+    # Keyed by the uploaded bytes: re-uploading the same curve reuses it and its aligned profiles
+    buffer = BytesIO(data)
+    buffer.name = name
+    return DemandCurve.from_file(buffer)
+
+
 st.title("Sunly Baseload Simulation App")
 
 st.sidebar.subheader("Download Documentation")
 with st.sidebar:
-    with open(DOCUMENTATION, "rb") as f:
-        st.download_button(
-            label="📥 Download Simulation Documentation",
-            file_name="Sunly Baseload App - Documentation.pdf",
-            mime="application/pdf",
-            data=f.read()
-        )
+    st.download_button(
+        label="📥 Download Simulation Documentation",
+        file_name="Sunly Baseload App - Documentation.pdf",
+        mime="application/pdf",
+        data=read_file_bytes(DOCUMENTATION)
+    )
 
 
 st.sidebar.header("Simulation Settings")
@@ -52,104 +97,51 @@ simulation_mode = st.sidebar.radio(
 
 curve_mode = st.sidebar.radio(
     "Select Curve",
-    ["Baseload", "Consumption Curve"]
+    ["Baseload", "Consumption Curve", "Customer Load Curve"]
 )
 
-profile_type = st.sidebar.radio("Select country", list(profile_files.keys()))
-profile_file = profile_files[profile_type]
+# Customer load in place of the country's consumption curve, aligned to the profile steps
+demand_curve = None
+if curve_mode == "Customer Load Curve":
+    demand_curve_file = st.sidebar.file_uploader(
+        "Load curve (.csv or .parquet: timestamp and load columns, hourly or 15-minute)", type=["csv", "parquet"]
+    )
+    if demand_curve_file is not None:
+        try:
+            demand_curve = cached_demand_curve(demand_curve_file.getvalue(), demand_curve_file.name)
+        except (ValueError, ImportError) as e:
+            st.sidebar.error(f"⚠️ {e}")
+
+# Country code (config.PROFILE_FILES key) of every profile option
+country_codes = {label: label.split(" ")[0] for label in profile_files}
+
+compare_countries = st.sidebar.checkbox("Compare countries",
+                                        help="Run the same inputs for several countries in one go.")
+if compare_countries:
+    selected_countries = st.sidebar.multiselect("Select countries", list(profile_files.keys()),
+                                                default=list(profile_files.keys()))
+    countries = [country_codes[label] for label in selected_countries]
+    profile_type = ", ".join(countries)
+    profile_file = None
+else:
+    profile_type = st.sidebar.radio("Select country", list(profile_files.keys()))
+    profile_file = profile_files[profile_type]
 
 container = st.container()
 
 def validate_pair(name: str, capacity: int, price: int):
     if (capacity > 0 and price == 0) or (price > 0 and capacity == 0):
         st.error(f"⚠️ Both capacity and price must be > 0 for {name} if either is filled.")
-def summarize_by_price_step(df: pd.DataFrame, price_col: str = "Spot", step: int = 5) -> pd.DataFrame:
-    df = df.copy()
-    if not isinstance(df.index, pd.DatetimeIndex):
-        raise ValueError("DataFrame index must be a DatetimeIndex.")
-
-    df["year"] = df.index.year
-    df["price_bin"] = (df[price_col] // step) * step
-
-    summary = (
-        df.groupby(["year", "price_bin"])[["missing_energy", "excess_energy"]]
-        .mean()
-        .reset_index()
-        .sort_values(["year", "price_bin"])
-    )
-    return summary
-def plot_energy_stack_st_altair(df):
-    df_plot = df.copy()
-    df_plot = df_plot[["produced_energy", "battery_discharged", "battery_charged", "baseload"]].fillna(0)
-    df_plot["direct_to_bl"] = np.minimum(df_plot["produced_energy"], df_plot["baseload"])
-
-    df_plot["battery_to_bl"] = np.minimum(
-        df_plot["baseload"] - df_plot["direct_to_bl"],
-        df_plot["battery_discharged"]
-    )
 
-    df_plot["missing_to_bl"] = df_plot["baseload"] - df_plot["direct_to_bl"] - df_plot["battery_to_bl"]
-
-    surplus = df_plot["produced_energy"] - df_plot["direct_to_bl"]
-    df_plot["charged_to_battery"] = np.minimum(surplus, df_plot["battery_charged"]).clip(lower=0)
-
-    df_plot["excess_energy"] = (df_plot["produced_energy"]
-                                - df_plot["direct_to_bl"]
-                                - df_plot["charged_to_battery"]).clip(lower=0)
-
-    df_plot_for_chart = pd.DataFrame({
-        "Direct Production": df_plot["direct_to_bl"],
-        "Battery Discharge": df_plot["battery_to_bl"],
-        "Missing Energy": df_plot["missing_to_bl"],
-        "Charged to Battery": df_plot["charged_to_battery"],
-        "Excess Energy": df_plot["excess_energy"]
-    })
-
-    df_plot_for_chart.columns = [
-        "Direct Production",
-        "Battery Discharge",
-        "Missing Energy",
-        "Charged to Battery",
-        "Excess Energy"
-    ]
-    df_plot_for_chart["Date"] = df_plot.index
 
-    df_melt = df_plot_for_chart.melt(id_vars="Date", var_name="Source", value_name="Value")
+@instrumented("render/energy_stack")
+def plot_energy_stack_st_altair(df, resolution: str = "adaptive", window=None):
+    # Aggregated on the server: at most DEFAULT_MAX_POINTS points per series reach the browser
+    df_melt = downsample_energy_stack(df, baseload_col="baseload", resolution=resolution, window=window)
+    return energy_stack_chart(df_melt)
 
-    category_order = [
-        "Direct Production",
-        "Battery Discharge",
-        "Missing Energy",
-        "Charged to Battery",
-        "Excess Energy"
-    ]
-
-    color_mapping = {
-        "Direct Production": "#1f77b4",  # Blue
-        "Battery Discharge": "orange",
-        "Missing Energy": "red",
-        "Charged to Battery": "green",
-        "Excess Energy": "#9467bd"  # Purple
-    }
 
-    df_melt["Source"] = pd.Categorical(df_melt["Source"], categories=category_order, ordered=True)
-
-    df_melt["sort_index"] = df_melt["Source"].cat.codes
-
-    chart = alt.Chart(df_melt).mark_bar(size=1).encode(
-        x=alt.X("Date:T", title="Date"),
-        y=alt.Y("Value:Q", stack="zero", title="Average Power (MW)"),
-        color=alt.Color("Source:N",
-                        scale=alt.Scale(domain=category_order,
-                                        range=[color_mapping[k] for k in category_order]), legend=None),
-        order=alt.Order('sort_index:Q'),
-        tooltip=["Date:T", "Source:N", "Value:Q"]
-    ).properties(
-        width=400,
-        height=400
-    ).interactive()
-
-    # Legend
+def render_energy_stack_legend():
     st.markdown("**Daily Energy Supply vs Baseload**")
 
     st.markdown("""
@@ -177,7 +169,47 @@ def plot_energy_stack_st_altair(df):
     </div>
     """, unsafe_allow_html=True)
 
-    return chart
+
+@instrumented("render/price_bin_charts")
+def build_price_bin_charts(summary_df: pd.DataFrame, year):
+    year_data_reset = summary_df[summary_df["year"] == year]
+
+    # Missing Energy chart
+    missing_chart = (
+        alt.Chart(year_data_reset)
+        .mark_bar(color="#75cfff")
+        .encode(
+            x=alt.X("price_bin:O", title="Spot Price Bin (EUR/MWh)"),
+            y=alt.Y("missing_energy:Q", title="Average Missing Energy (MWh)"),
+            tooltip=["price_bin", "missing_energy"]
+        )
+        .properties(title="Missing Energy by Price Bin", height=400)
+    )
+
+    # Excess Energy chart
+    excess_chart = (
+        alt.Chart(year_data_reset)
+        .mark_bar(color="#75cfff")
+        .encode(
+            x=alt.X("price_bin:O", title="Spot Price Bin (EUR/MWh)"),
+            y=alt.Y("excess_energy:Q", title="Average Excess Energy (MWh)"),
+            tooltip=["price_bin", "excess_energy"]
+        )
+        .properties(title="Excess Energy by Price Bin", height=400)
+    )
+
+    return missing_chart, excess_chart
+
+with st.sidebar:
+    with st.expander("Performance instrumentation"):
+        # Stage timings of this session's script runs only, kept across its runs. No memory peaks:
+        # tracemalloc is process-wide, so it would slow and mix in every other session and job.
+        record_stages = st.checkbox("Record stage timings", key="record_stages")
+        if record_stages and "stage_timings" not in st.session_state:
+            st.session_state["stage_timings"] = Instrumentation()
+        if st.button("Reset stage timings", disabled=not record_stages):
+            st.session_state["stage_timings"].reset()
+        use_instrumentation(st.session_state["stage_timings"] if record_stages else None)
 
 with st.sidebar:
     with st.expander("Input field explanations"):
@@ -312,100 +344,79 @@ if simulation_mode == "Manual Input":
         run_button_manual = st.button("Run Simulation")
 elif simulation_mode == "Upload File (Batch Mode)":
     with st.sidebar:
-        with open(SIMULATION_INPUT, "rb") as f:
-            st.download_button(
-                label="📥 Download Simulation Input Template",
-                file_name="simulation_template.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                data=f.read()
-            )
+        st.download_button(
+            label="📥 Download Simulation Input Template",
+            file_name="simulation_template.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            data=read_file_bytes(SIMULATION_INPUT)
+        )
 
         st.subheader("Upload File (Batch Mode)")
         uploaded_file = st.file_uploader("Choose a file to upload")
+        batch_workers = st.number_input("Worker processes", min_value=1, max_value=os.cpu_count() or 1,
+                                        value=DEFAULT_BATCH_WORKERS)
         run_button_batch = st.button("Run Simulation")
 
+if compare_countries and not countries:
+    st.sidebar.error("⚠️ Select at least one country to compare.")
+    run_button_batch = run_button_manual = False
+if curve_mode == "Customer Load Curve" and demand_curve is None and (run_button_batch or run_button_manual):
+    st.sidebar.error("⚠️ Upload a load curve to run with the customer load curve.")
+    run_button_batch = run_button_manual = False
+
+is_baseload_mode = (curve_mode == "Baseload")
+
 if run_button_batch:
-    with st.spinner("Running simulation..."):
-        if uploaded_file:
-            input_rows = extract_from_file(uploaded_file)
-            input_rows = input_rows.fillna(0)
-            all_results = []
-            k = 1
-
-            for i, row in input_rows.iterrows():
-                wind_cap = row["wind_cap"]
-                solar_cap = row["solar_cap"]
-                baseload = row["baseload"]
-                is_baseload_mode = (curve_mode == "Baseload")
-                wind_price = row["wind_price"]
-                solar_price = row["solar_price"]
-                missing_energy_price = row["missing_energy_price"]
-                battery_1h_price = row["battery_1h_price"]
-                battery_2h_price = row["battery_2h_price"]
-                battery_4h_price = row["battery_4h_price"]
-                battery_6h_price = row["battery_6h_price"]
-                battery_8h_price = row["battery_8h_price"]
-                battery_12h_price = row["battery_12h_price"]
-                battery_1h_mw = row["battery_1h_mw"]
-                battery_2h_mw = row["battery_2h_mw"]
-                battery_4h_mw = row["battery_4h_mw"]
-                battery_6h_mw = row["battery_6h_mw"]
-                battery_8h_mw = row["battery_8h_mw"]
-                battery_12h_mw = row["battery_12h_mw"]
-                bess_rte = 0.86
-
-                wind_prod, solar_prod = get_profiles(wind_cap, solar_cap, profile_file)
-
-                results, _ = simulate_dispatch(
-                    profile_file=profile_file,
-                    wind_prod=wind_prod,
-                    solar_prod=solar_prod,
-                    baseload=baseload,
-                    is_baseload_mode=is_baseload_mode,
-                    wind_cap=wind_cap,
-                    solar_cap=solar_cap,
-                    wind_price=wind_price,
-                    solar_price=solar_price,
-                    battery_1h_price=battery_1h_price,
-                    battery_2h_price=battery_2h_price,
-                    battery_4h_price=battery_4h_price,
-                    battery_6h_price=battery_6h_price,
-                    battery_8h_price=battery_8h_price,
-                    battery_12h_price=battery_12h_price,
-                    missing_energy_price=missing_energy_price,
-                    battery_1h_mw=battery_1h_mw,
-                    battery_2h_mw=battery_2h_mw,
-                    battery_4h_mw=battery_4h_mw,
-                    battery_6h_mw=battery_6h_mw,
-                    battery_8h_mw=battery_8h_mw,
-                    battery_12h_mw=battery_12h_mw,
-                    bess_rte=0.86,
-                    simulation_id=k
-                )
-                k += 1
-                all_results.extend(results)
-
-            result_df = pd.DataFrame(all_results)
-            st.success("Batch simulation complete!")
-
-            excel_buffer = io.BytesIO()
-            result_df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            st.download_button(
-                label="📥 Download Batch Results as EXCEL",
-                data=excel_buffer,
-                file_name="batch_simulation_results.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-
-            st.dataframe(result_df)
+    if uploaded_file:
+        input_rows = extract_from_file(uploaded_file)
+
+        # A country column in the file, or several selected countries, runs every row per country
+        if COUNTRY_COLUMN in input_rows.columns:
+            make_batch = partial(iter_country_batch, input_rows, [], is_baseload_mode, workers=batch_workers,
+                                 demand_curve=demand_curve)
+            batch_label, batch_rows = f"{COUNTRY_COLUMN} column of the file", len(input_rows)
+        elif compare_countries:
+            make_batch = partial(iter_country_batch, input_rows, countries, is_baseload_mode, workers=batch_workers,
+                                 demand_curve=demand_curve)
+            batch_label, batch_rows = profile_type, len(input_rows) * len(countries)
+        else:
+            make_batch = partial(iter_batch, input_rows, profile_file, is_baseload_mode, workers=batch_workers,
+                                 demand_curve=demand_curve)
+            batch_label, batch_rows = profile_type, len(input_rows)
+
+        # Runs on a background thread of the server process: reruns (widget clicks) don't stop it
+        job = job_manager().submit(f"{batch_label}, {curve_mode}", make_batch, batch_rows)
+        st.session_state["batch_job_id"] = job.job_id
+elif run_button_manual and compare_countries:
+    with st.spinner(f"Running simulation for {profile_type}..."):
+        result_df = simulate_countries(
+            countries,
+            is_baseload_mode=is_baseload_mode,
+            workers=min(len(countries), DEFAULT_BATCH_WORKERS),
+            bess_rte=0.86,
+            demand_curve=demand_curve,
+            wind_cap=wind_cap, wind_price=wind_price, solar_cap=solar_cap, solar_price=solar_price,
+            baseload=baseload, missing_energy_price=missing_energy_price,
+            battery_1h_mw=battery_1h_mw, battery_1h_price=battery_1h_price,
+            battery_2h_mw=battery_2h_mw, battery_2h_price=battery_2h_price,
+            battery_4h_mw=battery_4h_mw, battery_4h_price=battery_4h_price,
+            battery_6h_mw=battery_6h_mw, battery_6h_price=battery_6h_price,
+            battery_8h_mw=battery_8h_mw, battery_8h_price=battery_8h_price,
+            battery_12h_mw=battery_12h_mw, battery_12h_price=battery_12h_price,
+        )
+        st.session_state["countries_run"] = {
+            "label": f"{profile_type}, {curve_mode}",
+            "result_df": result_df,
+        }
+        st.success("✅ Simulation complete!")
 elif run_button_manual:
     with st.spinner("Running simulation..."):
-        is_baseload_mode = (curve_mode == "Baseload")
-        wind_prod, solar_prod = get_profiles(wind_cap, solar_cap, profile_file)
+        profiles = profile_bundle(profile_file)
+        if demand_curve is not None:
+            profiles = demand_curve.apply(profiles)
+        wind_prod, solar_prod = get_profiles(wind_cap, solar_cap, profiles)
         results, yearly_df = simulate_dispatch(
-            profile_file=profile_file,
+            profile_file=profiles,
             wind_prod=wind_prod,
             solar_prod=solar_prod,
             baseload=baseload,
@@ -430,150 +441,278 @@ elif run_button_manual:
             bess_rte=0.86
         )
 
-        result_df = pd.DataFrame(results)
+        with stage("price_bin_histogram"):
+            price_bins = PriceBinHistogram.from_frame(yearly_df)
+
+        # Kept across reruns; per-year charts are added to "charts" the first time their year is opened
+        st.session_state["manual_run"] = {
+            "label": f"{profile_type}, {curve_mode}",
+            "result_df": pd.DataFrame(results),
+            "yearly_df": yearly_df,
+            "price_bins": price_bins,
+            "charts": {},
+        }
         st.success("✅ Simulation complete!")
-        kpi_df = result_df[[
-            "year",
-            "Break-even 1 - Fixed Missing, EUR/MWh",
-            "Break-even 2 - VWAP Missing, EUR/MWh",
-            "Break-even 3 - Excess En. Price Fixed 0, EUR/MWh",
-            "Demand 1 - Fixed Missing EUR/MWh",
-            "Demand 2 - VWAP Missing EUR/MWh",
-            "Res share in demand, %",
-            "Overproduction share, %"
-        ]].copy()
-
-        kpi_df.set_index("year", inplace=True)
-        average_row = kpi_df.mean()
-        kpi_df.loc["Average"] = average_row
-
-        st.subheader("Key Results")
-
-        st.dataframe(kpi_df)
-
-        # Define groups
-        production_cols = [
-            "Wind prod, MWh", "Solar prod, MWh",
-            "Wind in demand, MWh", "Solar in demand, MWh"
-        ]
-
-        baseload_cols = [
-            "Demand, MWh",
-            "Nr of green demand hours, h", "Nr of hours, h"
-        ]
-
-        excess_cols = [
-            "Excess wind, MWh", "Excess solar, MWh",
-            "Missing energy, MWh", "Cycle loss, MWh"
-        ]
-
-        price_cols = [
-            "Annual avg spot, EUR/MWh",
-            "Wind cap price, EUR/MWh", "PV cap price, EUR/MWh",
-            "Missing energy VWAP, EUR/MWh", "Excess energy VWAP, EUR/MWh"
-        ]
-
-        battery_cycles = [
-            "BESS 1h avg cycles", "BESS 2h avg cycles",
-            "BESS 4h avg cycles", "BESS 6h avg cycles",
-            "BESS 8h avg cycles", "BESS 12h avg cycles"
-        ]
-
-        battery_hours = [
-            "BESS 1h zero hours ratio, %", "BESS 2h zero hours ratio, %",
-            "BESS 4h zero hours ratio, %", "BESS 6h zero hours ratio, %",
-            "BESS 8h zero hours ratio, %", "BESS 12h zero hours ratio, %",
-        ]
-
-        # Helper to extract, set index, and add average
-        def format_summary_block(df, cols):
-            block = df[["year"] + cols].copy()
-            block.set_index("year", inplace=True)
-            block.loc["Average"] = block.mean()
-            return block.round(2)
-
-
-        prod_df = format_summary_block(result_df, production_cols)
-        base_df = format_summary_block(result_df, baseload_cols)
-        excess_df = format_summary_block(result_df, excess_cols)
-        vwap_df = format_summary_block(result_df, price_cols)
-        battery_cycles_df = format_summary_block(result_df, battery_cycles)
-        battery_hours_df = format_summary_block(result_df, battery_hours)
-
-        # ---- 2. Display side-by-side with Streamlit columns ----
-
-        st.subheader("Detailed Metrics by Category")
-
-        col1, col2= st.columns(2)
 
-        with col1:
-            st.markdown("**Production & Usage**")
-            st.dataframe(prod_df)
 
-        with col2:
-            st.markdown("**Demand & Gaps**")
-            st.dataframe(base_df)
+def finish_batch_job(job):
+    # Exported once, when the job has ended; kept across reruns like a finished run
+    result_df = job.results_frame()
+    excel_buffer = io.BytesIO()
+    with ExcelResultSink(excel_buffer) as sink:
+        sink.write(job.results())
+    st.session_state["batch_run"] = {
+        "label": job.label,
+        "result_df": result_df,
+        "excel_bytes": excel_buffer.getvalue(),
+        "status": job.status,
+        "error": job.error,
+        "rows": f"{job.rows_done} of {job.total_rows}",
+    }
+    del st.session_state["batch_job_id"]
+    # The results live in this session now; the manager no longer needs to hold them
+    job_manager().collect(job.job_id)
+
+
+@st.fragment(run_every=1)
+def render_batch_job(job_id):
+    # Re-runs every second on its own, without rerunning the script, while the job is active
+    job = job_manager().get(job_id)
+    if job is None:
+        # Only jobs left uncollected for JobManager.max_age are dropped
+        st.session_state.pop("batch_job_id", None)
+        st.warning("The batch job has expired; run the batch again.")
+        return
+    if not job.is_active:
+        finish_batch_job(job)
+        st.rerun()
+
+    seconds_left = job.seconds_left
+    st.progress(job.progress, text=(
+        f"{job.label}: {job.rows_done} / {job.total_rows} rows, {job.rows_per_sec:.2f} rows/s, "
+        f"elapsed {job.elapsed:.0f}s" + (f", about {seconds_left:.0f}s left" if seconds_left is not None else "")
+    ))
+    if st.button("Cancel batch", key=f"cancel_{job_id}"):
+        job.cancel()
+        st.info("Cancelling after the rows in progress...")
+
+    partial_df = job.results_frame()
+    if not partial_df.empty:
+        st.caption(f"Results so far ({len(partial_df)} result rows)")
+        st.dataframe(partial_df)
+        st.download_button("📥 Download partial results as CSV", data=partial_df.to_csv(index=False).encode(),
+                           file_name="batch_simulation_results_partial.csv", key=f"partial_{job_id}")
+
+
+@instrumented("render/batch_results")
+def render_batch_results(batch_run):
+    status = batch_run.get("status", "done")
+    if status == "failed":
+        st.error(f"Batch simulation failed after {batch_run['rows']} rows: {batch_run['error']}")
+    elif status == "cancelled":
+        st.warning(f"Batch simulation cancelled after {batch_run['rows']} rows.")
+    st.caption(f"Results of the last batch run ({batch_run['label']})")
+    st.download_button(
+        label="📥 Download Batch Results as EXCEL",
+        data=batch_run["excel_bytes"],
+        file_name="batch_simulation_results.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
 
-        col3, col4= st.columns(2)
-        with col3:
-            st.markdown("**Excess / Missing**")
-            st.dataframe(excess_df)
+    st.dataframe(batch_run["result_df"])
 
-        with col4:
-            st.markdown("**Price Metrics**")
-            st.dataframe(vwap_df)
 
-        col5, col6 = st.columns(2)
-        with col5:
-            st.markdown("**Storage Cycles Metrics**")
-            st.dataframe(battery_cycles_df)
-        with col6:
-            st.markdown("**Storage Zero Hours Metrics**")
-            st.dataframe(battery_hours_df)
+KPI_COLUMNS = [
+    "Break-even 1 - Fixed Missing, EUR/MWh",
+    "Break-even 2 - VWAP Missing, EUR/MWh",
+    "Break-even 3 - Excess En. Price Fixed 0, EUR/MWh",
+    "Demand 1 - Fixed Missing EUR/MWh",
+    "Demand 2 - VWAP Missing EUR/MWh",
+    "Res share in demand, %",
+    "Overproduction share, %"
+]
+
+
+@instrumented("render/country_results")
+def render_country_results(countries_run):
+    result_df = countries_run["result_df"]
+    st.caption(f"Results of the last country comparison ({countries_run['label']})")
+
+    st.subheader("Key Results by Country (average over years)")
+    countries = list(dict.fromkeys(result_df["country"]))
+    average_df = result_df.groupby("country", sort=False)[KPI_COLUMNS].mean().reindex(countries)
+    st.dataframe(average_df.round(2))
+
+    kpi = st.selectbox("Key result by year", KPI_COLUMNS, key="country_kpi")
+    st.dataframe(result_df.pivot(index="year", columns="country", values=kpi)[countries])
+
+    with st.expander("All Results"):
+        st.dataframe(result_df)
+        if "csv_bytes" not in countries_run:
+            countries_run["csv_bytes"] = result_df.to_csv(index=False).encode()
+        st.download_button("📥 Download Results as CSV", data=countries_run["csv_bytes"],
+                           file_name="country_comparison_results.csv")
+
+
+@instrumented("render/manual_results")
+def render_manual_results(manual_run):
+    result_df = manual_run["result_df"]
+    st.caption(f"Results of the last run ({manual_run['label']})")
+    kpi_df = result_df[["year"] + KPI_COLUMNS].copy()
+
+    kpi_df.set_index("year", inplace=True)
+    average_row = kpi_df.mean()
+    kpi_df.loc["Average"] = average_row
+
+    st.subheader("Key Results")
+
+    st.dataframe(kpi_df)
+
+    # Define groups
+    production_cols = [
+        "Wind prod, MWh", "Solar prod, MWh",
+        "Wind in demand, MWh", "Solar in demand, MWh"
+    ]
+
+    baseload_cols = [
+        "Demand, MWh",
+        "Nr of green demand hours, h", "Nr of hours, h"
+    ]
+
+    excess_cols = [
+        "Excess wind, MWh", "Excess solar, MWh",
+        "Missing energy, MWh", "Cycle loss, MWh"
+    ]
+
+    price_cols = [
+        "Annual avg spot, EUR/MWh",
+        "Wind cap price, EUR/MWh", "PV cap price, EUR/MWh",
+        "Missing energy VWAP, EUR/MWh", "Excess energy VWAP, EUR/MWh"
+    ]
+
+    battery_cycles = [
+        "BESS 1h avg cycles", "BESS 2h avg cycles",
+        "BESS 4h avg cycles", "BESS 6h avg cycles",
+        "BESS 8h avg cycles", "BESS 12h avg cycles"
+    ]
+
+    battery_hours = [
+        "BESS 1h zero hours ratio, %", "BESS 2h zero hours ratio, %",
+        "BESS 4h zero hours ratio, %", "BESS 6h zero hours ratio, %",
+        "BESS 8h zero hours ratio, %", "BESS 12h zero hours ratio, %",
+    ]
+
+    # Helper to extract, set index, and add average
+    def format_summary_block(df, cols):
+        block = df[["year"] + cols].copy()
+        block.set_index("year", inplace=True)
+        block.loc["Average"] = block.mean()
+        return block.round(2)
+
+
+    prod_df = format_summary_block(result_df, production_cols)
+    base_df = format_summary_block(result_df, baseload_cols)
+    excess_df = format_summary_block(result_df, excess_cols)
+    vwap_df = format_summary_block(result_df, price_cols)
+    battery_cycles_df = format_summary_block(result_df, battery_cycles)
+    battery_hours_df = format_summary_block(result_df, battery_hours)
+
+    # ---- 2. Display side-by-side with Streamlit columns ----
+
+    st.subheader("Detailed Metrics by Category")
+
+    col1, col2= st.columns(2)
+
+    with col1:
+        st.markdown("**Production & Usage**")
+        st.dataframe(prod_df)
+
+    with col2:
+        st.markdown("**Demand & Gaps**")
+        st.dataframe(base_df)
+
+    col3, col4= st.columns(2)
+    with col3:
+        st.markdown("**Excess / Missing**")
+        st.dataframe(excess_df)
+
+    with col4:
+        st.markdown("**Price Metrics**")
+        st.dataframe(vwap_df)
+
+    col5, col6 = st.columns(2)
+    with col5:
+        st.markdown("**Storage Cycles Metrics**")
+        st.dataframe(battery_cycles_df)
+    with col6:
+        st.markdown("**Storage Zero Hours Metrics**")
+        st.dataframe(battery_hours_df)
 
-        with st.expander("All Results"):
-            st.dataframe(result_df)
+    with st.expander("All Results"):
+        st.dataframe(result_df)
+        if "csv_bytes" not in manual_run:
             csv_buffer = BytesIO()
             result_df.to_csv(csv_buffer, index=False)
-            st.download_button("📥 Download Results as CSV", data=csv_buffer.getvalue(), file_name="simulation_results.csv")
-
-        summary_df = summarize_by_price_step(yearly_df)
-        tab_titles = [f"Year {year}" for year in summary_df["year"].unique()]
-        tabs = st.tabs(tab_titles)
-
-        for tab, year in zip(tabs, summary_df["year"].unique()):
-            with tab:
-                st.subheader(f"Charts for Year {year}")
-                yearly_df_year = yearly_df[yearly_df.index.year == year]
-                year_data = summary_df[summary_df["year"] == year].set_index("price_bin")
-
-                st.altair_chart(plot_energy_stack_st_altair(yearly_df_year),
-                                use_container_width=True)
-                year_data_reset = year_data.reset_index()
-
-                # Missing Energy chart
-                missing_chart = (
-                    alt.Chart(year_data_reset)
-                    .mark_bar(color="#75cfff")
-                    .encode(
-                        x=alt.X("price_bin:O", title="Spot Price Bin (EUR/MWh)"),
-                        y=alt.Y("missing_energy:Q", title="Average Missing Energy (MWh)"),
-                        tooltip=["price_bin", "missing_energy"]
-                    )
-                    .properties(title="Missing Energy by Price Bin", height=400)
-                )
-
-                # Excess Energy chart
-                excess_chart = (
-                    alt.Chart(year_data_reset)
-                    .mark_bar(color="#75cfff")
-                    .encode(
-                        x=alt.X("price_bin:O", title="Spot Price Bin (EUR/MWh)"),
-                        y=alt.Y("excess_energy:Q", title="Average Excess Energy (MWh)"),
-                        tooltip=["price_bin", "excess_energy"]
-                    )
-                    .properties(title="Excess Energy by Price Bin", height=400)
-                )
-
-                st.altair_chart(missing_chart, use_container_width=True)
-                st.altair_chart(excess_chart, use_container_width=True)
\ No newline at end of file
+            manual_run["csv_bytes"] = csv_buffer.getvalue()
+        st.download_button("📥 Download Results as CSV", data=manual_run["csv_bytes"], file_name="simulation_results.csv")
+
+    # Only the selected year's charts are built; price bin charts are reused once built
+    years = manual_run["price_bins"].years
+    year = st.radio("Charts for year", years, horizontal=True, format_func=lambda y: f"Year {y}", key="chart_year")
+    if year is None:
+        return
+
+    price_step = st.number_input("Spot price bin step, EUR/MWh", min_value=1, value=5, key="price_bin_step")
+    if (year, price_step) not in manual_run["charts"]:
+        # Re-binned from the accumulated histogram, not from the hourly frame
+        summary_df = manual_run["price_bins"].summary(price_step)
+        manual_run["charts"][(year, price_step)] = build_price_bin_charts(summary_df, year)
+    missing_chart, excess_chart = manual_run["charts"][(year, price_step)]
+
+    st.subheader(f"Charts for Year {year}")
+    yearly_df_year = manual_run["yearly_df"][manual_run["yearly_df"].index.year == year]
+    first_day, last_day = yearly_df_year.index[0].date(), yearly_df_year.index[-1].date()
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        resolution = st.selectbox("Chart resolution", RESOLUTIONS, key="chart_resolution")
+    with col2:
+        window_days = st.slider("Chart window", min_value=first_day, max_value=last_day,
+                                value=(first_day, last_day), key=f"chart_window_{year}")
+
+    # A narrower window is charted at a finer resolution, with the same number of points
+    window = (pd.Timestamp(window_days[0]), pd.Timestamp(window_days[1]) + pd.Timedelta(days=1, microseconds=-1))
+    render_energy_stack_legend()
+    st.altair_chart(plot_energy_stack_st_altair(yearly_df_year, resolution, window), use_container_width=True)
+    st.altair_chart(missing_chart, use_container_width=True)
+    st.altair_chart(excess_chart, use_container_width=True)
+
+
+if simulation_mode == "Manual Input" and compare_countries and "countries_run" in st.session_state:
+    render_country_results(st.session_state["countries_run"])
+elif simulation_mode == "Manual Input" and not compare_countries and "manual_run" in st.session_state:
+    render_manual_results(st.session_state["manual_run"])
+elif simulation_mode == "Upload File (Batch Mode)" and "batch_job_id" in st.session_state:
+    render_batch_job(st.session_state["batch_job_id"])
+elif simulation_mode == "Upload File (Batch Mode)" and "batch_run" in st.session_state:
+    render_batch_results(st.session_state["batch_run"])
+
+
+def render_instrumentation_panel(recorder):
+    report = recorder.report()
+    with st.expander("Performance: time per stage", expanded=False):
+        if not report:
+            st.caption("Run a simulation to record its stage timings.")
+            return
+        st.caption("Times include nested stages; background batch jobs and worker processes are not recorded. "
+                   "For memory peaks use python -m benchmarks.run --stages.")
+        stage_df = pd.DataFrame.from_dict(report, orient="index").drop(columns="peak_mb")
+        stage_df.index.name = "stage"
+        st.dataframe(stage_df.round(4))
+        st.download_button("📥 Download stage timings as JSON",
+                           data=json.dumps({"stages": stage_df.to_dict(orient="index")}, indent=2),
+                           file_name="stage_timings.json", mime="application/json")
+
+
+if record_stages:
+    render_instrumentation_panel(st.session_state["stage_timings"])
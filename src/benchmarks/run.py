@@ -0,0 +1,311 @@
+"""
+Benchmarks of the dispatch pipeline.
+
+Run from src/:
+    python -m benchmarks.run                      # all benchmarks, compared to the baseline if there is one
+    python -m benchmarks.run --quick              # fewer repeats and rows
+    python -m benchmarks.run --save-baseline      # store this run as the new baseline
+    python -m benchmarks.run --only year_dispatch
+    python -m benchmarks.run --only simulate_dispatch/EE --stages stages.json
+
+Each benchmark reports simulated hours per second (best of --repeat timed runs) and the peak
+Python memory of one extra run under tracemalloc. With a baseline, benchmarks slower than
+--tolerance are listed and the exit code is 1. --stages adds one more run of every benchmark
+with stage instrumentation (utils.instrumentation) and writes the per-stage report as JSON.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from benchmarks.synthetic import synthetic_profile_bundle
+from config import DATA_DIR, PROFILE_FILES, PROFILES_EE
+from simulation.batch import BATCH_INPUT_COLUMNS, run_batch
+from simulation.metrics import init_metrics
+from simulation.simulate_dispatch import clear_physical_cache, simulate_dispatch
+from simulation.simulate_year import simulate_year_dispatch
+from simulation.storage_factory import create_storage_fleet
+from utils.profile_store import ProfileStore
+from utils.instrumentation import Instrumentation
+from utils.profiles import get_profiles, load_profile_bundle
+from utils.result_cache import default_result_cache
+
+DEFAULT_BASELINE = DATA_DIR / "benchmark_baseline.json"
+
+# Battery MW per duration (1, 2, 4, 6, 8, 12 h) for 0, 1 and 6 storages
+STORAGE_SETUPS = {
+    0: (0, 0, 0, 0, 0, 0),
+    1: (0, 0, 50, 0, 0, 0),
+    6: (20, 20, 20, 20, 20, 20),
+}
+
+
+class Benchmark:
+    def __init__(self, name: str, hours: int, fn: Callable[[], None], repeat: int = None):
+        self.name = name
+        self.hours = hours
+        self.fn = fn
+        self.repeat = repeat
+
+
+def _dispatch_kwargs(profiles, wind_cap, solar_cap, baseload, is_baseload_mode, battery_mw):
+    wind_prod, solar_prod = get_profiles(wind_cap, solar_cap, profiles)
+    kwargs = dict(
+        profile_file=profiles, wind_prod=wind_prod, solar_prod=solar_prod, baseload=baseload,
+        is_baseload_mode=is_baseload_mode, wind_cap=wind_cap, solar_cap=solar_cap,
+        wind_price=50, solar_price=40, missing_energy_price=150, bess_rte=0.86, use_cache=False,
+    )
+    for duration, mw in zip((1, 2, 4, 6, 8, 12), battery_mw):
+        kwargs[f"battery_{duration}h_mw"] = mw
+        kwargs[f"battery_{duration}h_price"] = 1000 * mw
+    return kwargs
+
+
+def year_dispatch_benchmarks(profiles) -> List[Benchmark]:
+    """simulate_year_dispatch on one year: baseload vs consumption curve, 0/1/6 storages."""
+    year = profiles.years[0]
+    span = profiles.year_slice(year)
+    wind_prod, solar_prod = get_profiles(120, 100, profiles)
+    wind_year = np.asarray(wind_prod)[span]
+    solar_year = np.asarray(solar_prod)[span]
+
+    benchmarks = []
+    for is_baseload_mode, mode_name in ((True, "baseload"), (False, "curve")):
+        for count, battery_mw in STORAGE_SETUPS.items():
+            battery_config = dict(zip((1, 2, 4, 6, 8, 12), battery_mw))
+
+            def run(is_baseload_mode=is_baseload_mode, battery_config=battery_config):
+                storages = create_storage_fleet(battery_config, 0.86)
+                metrics = init_metrics(0, 0, 0, 0, 0, 0, 0, 0, 0)
+                simulate_year_dispatch(metrics, year, wind_year, solar_year, profiles, storages, 40,
+                                       is_baseload_mode, 120, 100, battery_config)
+
+            benchmarks.append(Benchmark(f"year_dispatch/{mode_name}/{count}_storages", len(wind_year), run))
+    return benchmarks
+
+
+def simulate_dispatch_benchmarks() -> List[Benchmark]:
+    """Full simulate_dispatch (all years, 6 storages) on every country file."""
+    benchmarks = []
+    for country, profile_file in PROFILE_FILES.items():
+        if not Path(profile_file).exists():
+            continue
+        profiles = load_profile_bundle(profile_file)
+        kwargs = _dispatch_kwargs(profiles, 120, 100, 40, True, STORAGE_SETUPS[6])
+
+        def run(kwargs=kwargs):
+            clear_physical_cache()
+            simulate_dispatch(**kwargs)
+
+        benchmarks.append(Benchmark(f"simulate_dispatch/{country}", len(profiles), run))
+    return benchmarks
+
+
+def long_horizon_benchmarks(years: int) -> List[Benchmark]:
+    """simulate_dispatch on a synthetic profile of the given number of years, hourly and in 15-minute steps."""
+    profiles = synthetic_profile_bundle(years)
+    benchmarks = []
+    for collect_hourly in ("full", "none"):
+        kwargs = _dispatch_kwargs(profiles, 120, 100, 40, False, STORAGE_SETUPS[6])
+
+        def run(kwargs=kwargs, collect_hourly=collect_hourly):
+            clear_physical_cache()
+            simulate_dispatch(collect_hourly=collect_hourly, **kwargs)
+
+        benchmarks.append(Benchmark(f"long_horizon/{years}y/{collect_hourly}", len(profiles), run, repeat=1))
+
+    # Same horizon in 15-minute steps; hours/sec counts simulated hours, not steps
+    quarter_hourly = profiles.resample(15)
+    kwargs = _dispatch_kwargs(quarter_hourly, 120, 100, 40, False, STORAGE_SETUPS[6])
+
+    def run_15min(kwargs=kwargs):
+        clear_physical_cache()
+        simulate_dispatch(collect_hourly="none", **kwargs)
+
+    benchmarks.append(Benchmark(f"long_horizon/{years}y/15min", len(profiles), run_15min, repeat=1))
+    return benchmarks
+
+
+def batch_benchmarks(rows: int) -> List[Benchmark]:
+    """run_batch of distinct rows on EE, in-process and on all cores."""
+    rng = np.random.default_rng(0)
+    input_rows = pd.DataFrame({col: rng.integers(0, 100, rows) for col in BATCH_INPUT_COLUMNS})
+    input_rows["baseload"] += 1
+    hours = rows * len(load_profile_bundle(PROFILES_EE))
+
+    benchmarks = []
+    for workers in sorted({1, os.cpu_count() or 1}):
+        def run(workers=workers):
+            clear_physical_cache()
+            run_batch(input_rows, PROFILES_EE, True, workers=workers)
+
+        benchmarks.append(Benchmark(f"batch/{rows}_rows/{workers}_workers", hours, run, repeat=1))
+    return benchmarks
+
+
+def profile_loading_benchmarks() -> List[Benchmark]:
+    """Workbook conversion into a fresh profile store (cold) and memory-mapped loads (warm)."""
+    benchmarks = []
+    for country, profile_file in PROFILE_FILES.items():
+        if not Path(profile_file).exists():
+            continue
+        hours = len(load_profile_bundle(profile_file))
+
+        def cold(profile_file=profile_file):
+            with tempfile.TemporaryDirectory() as cache_dir:
+                ProfileStore(cache_dir).load(profile_file)
+
+        def warm(profile_file=profile_file):
+            load_profile_bundle(profile_file)
+
+        benchmarks.append(Benchmark(f"profile_load/{country}/cold", hours, cold, repeat=1))
+        benchmarks.append(Benchmark(f"profile_load/{country}/warm", hours, warm))
+    return benchmarks
+
+
+def measure(benchmark: Benchmark, repeat: int) -> Dict:
+    repeat = benchmark.repeat or repeat
+    benchmark.fn()  # warm-up (imports, profile store, page cache)
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        benchmark.fn()
+        timings.append(time.perf_counter() - start)
+    seconds = min(timings)
+
+    # Separate run: tracemalloc slows Python down too much to time under it
+    tracemalloc.start()
+    benchmark.fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": seconds,
+        "hours": benchmark.hours,
+        "hours_per_sec": benchmark.hours / seconds if seconds > 0 else float("inf"),
+        "peak_memory_mb": peak / 2**20,
+    }
+
+
+def measure_stages(benchmark: Benchmark) -> Dict[str, Dict]:
+    """Per-stage timings of one instrumented run, with memory peaks from another (tracemalloc skews timings)."""
+    reports = []
+    for track_memory in (False, True):
+        recorder = Instrumentation(track_memory=track_memory)
+        with recorder.recording():
+            benchmark.fn()
+        reports.append(recorder.report())
+    timed, traced = reports
+    for name, stats in timed.items():
+        stats["peak_mb"] = traced.get(name, {}).get("peak_mb", 0.0)
+    return timed
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Names of benchmarks whose throughput fell more than tolerance below the baseline."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["hours_per_sec"] / baseline[name]["hours_per_sec"]
+        result["vs_baseline"] = ratio
+        if ratio < 1 - tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def print_table(results: Dict[str, Dict]) -> None:
+    print(f"{'benchmark':<42} {'seconds':>9} {'hours/sec':>12} {'peak MB':>9} {'vs base':>8}")
+    for name, r in results.items():
+        vs = f"{r['vs_baseline']:.2f}x" if "vs_baseline" in r else "-"
+        print(f"{name:<42} {r['seconds']:>9.3f} {r['hours_per_sec']:>12,.0f} {r['peak_memory_mb']:>9.1f} {vs:>8}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the dispatch pipeline.")
+    parser.add_argument("--quick", action="store_true", help="fewer repeats and batch rows")
+    parser.add_argument("--repeat", type=int, default=None, help="timed runs per benchmark (best is kept)")
+    parser.add_argument("--batch-rows", type=int, default=None, help="rows in the batch benchmarks")
+    parser.add_argument("--years", type=int, default=10, help="years of the synthetic long-horizon profile")
+    parser.add_argument("--only", default=None, help="run benchmarks whose name starts with this prefix")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline JSON to compare to")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed throughput drop vs baseline")
+    parser.add_argument("--json", type=Path, default=None, help="also write the results to this JSON file")
+    parser.add_argument("--stages", type=Path, default=None,
+                        help="write per-stage timings and memory of one instrumented run to this JSON file")
+    args = parser.parse_args(argv)
+
+    repeat = args.repeat or (1 if args.quick else 3)
+    batch_rows = args.batch_rows or (8 if args.quick else 32)
+
+    # Measure the simulation, not the result cache
+    default_result_cache.memory_size = 0
+    default_result_cache.cache_dir = None
+
+    suites = [
+        ("year_dispatch", lambda: year_dispatch_benchmarks(load_profile_bundle(PROFILES_EE))),
+        ("simulate_dispatch", simulate_dispatch_benchmarks),
+        ("long_horizon", lambda: long_horizon_benchmarks(args.years)),
+        ("batch", lambda: batch_benchmarks(batch_rows)),
+        ("profile_load", profile_loading_benchmarks),
+    ]
+
+    results = {}
+    stages = {}
+    for suite, build in suites:
+        if args.only and not (suite.startswith(args.only) or args.only.startswith(suite)):
+            continue
+        for benchmark in build():
+            if args.only and not benchmark.name.startswith(args.only):
+                continue
+            try:
+                results[benchmark.name] = measure(benchmark, repeat)
+            except Exception as e:
+                print(f"  {benchmark.name}: failed ({type(e).__name__}: {e})", file=sys.stderr)
+                continue
+            print(f"  {benchmark.name}: {results[benchmark.name]['seconds']:.3f}s", file=sys.stderr)
+            if args.stages:
+                stages[benchmark.name] = measure_stages(benchmark)
+
+    regressions = []
+    if args.baseline.exists() and not args.save_baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+
+    print_table(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"results": results}, f, indent=2)
+
+    if args.stages:
+        with open(args.stages, "w") as f:
+            json.dump(stages, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"created": time.strftime("%Y-%m-%d %H:%M:%S"), "results": results}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if regressions:
+        print(f"Slower than baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
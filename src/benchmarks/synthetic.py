@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from models.profile_bundle import ProfileBundle
+
+
+def synthetic_profile_bundle(years: int = 5, start_year: int = 2020, seed: int = 0) -> ProfileBundle:
+    """
+    Builds an hourly ProfileBundle of any length with realistic shapes, so benchmarks can scale
+    past the horizons of the country files.
+
+    wind_profile: autocorrelated capacity factor, windier in winter.
+    solar_profile: daylight bell curve scaled by season, with cloudy days.
+    spot: base price with daily/seasonal swings, lower when wind and solar are high.
+    cnp: consumption curve with daily, weekly and seasonal patterns.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(f"{start_year}-01-01", f"{start_year + years}-01-01", freq="h", inclusive="left")
+    n = len(index)
+
+    hour = index.hour.to_numpy()
+    day_of_year = index.dayofyear.to_numpy()
+    weekday = index.dayofweek.to_numpy()
+    season = np.cos(2 * np.pi * (day_of_year - 15) / 365.25)  # 1 in mid-January, -1 in mid-July
+
+    # Wind: AR(1) noise squashed into 0..1
+    shocks = rng.normal(0, 0.25, n)
+    noise = np.empty(n)
+    noise[0] = shocks[0]
+    for t in range(1, n):
+        noise[t] = 0.97 * noise[t - 1] + shocks[t]
+    wind = 1 / (1 + np.exp(-(noise + 0.4 * season - 0.8)))
+
+    # Solar: sine over daylight hours, longer and higher days in summer, daily cloud cover
+    daylight = 12 - 5 * season
+    sunrise = 12 - daylight / 2
+    phase = (hour + 0.5 - sunrise) / daylight
+    clouds = np.repeat(rng.uniform(0.2, 1.0, n // 24 + 1), 24)[:n]
+    solar = np.where((phase > 0) & (phase < 1), np.sin(np.pi * np.clip(phase, 0, 1)), 0.0)
+    solar = solar * (0.55 - 0.25 * season) * clouds
+
+    daily = np.sin(2 * np.pi * (hour - 6) / 24)
+    cnp = 1000 * (1 + 0.15 * daily + 0.2 * season - 0.08 * (weekday >= 5)) + rng.normal(0, 20, n)
+    spot = 60 + 25 * daily + 20 * season - 70 * wind - 40 * solar + rng.normal(0, 15, n)
+
+    return ProfileBundle(index, wind, solar, spot, cnp)
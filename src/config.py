@@ -11,6 +11,19 @@ PROFILES_LV = DATA_DIR / "profiles_LV.xlsx"
 PROFILES_LT = DATA_DIR / "profiles_LT.xlsx"
 PROFILES_PL = DATA_DIR / "profiles_PL.xlsx"
 
+# Profile file per country code
+PROFILE_FILES = {
+    "EE": PROFILES_EE,
+    "LV": PROFILES_LV,
+    "LT": PROFILES_LT,
+    "PL": PROFILES_PL,
+}
+
+# Profiles built from the production and yield workbooks (python -m utils.data_prep), one per
+# country; they exist only in the profile store, apart from the shipped workbooks above
+BUILT_PROFILE_SUFFIX = ".built"
+BUILT_PROFILE_FILES = {country: path.with_suffix(BUILT_PROFILE_SUFFIX) for country, path in PROFILE_FILES.items()}
+
 # Yields
 YIELD_EE = DATA_DIR / "YIELD_EE.xlsx"
 YIELD_LV = DATA_DIR / "YIELD_LV.xlsx"
@@ -23,6 +36,15 @@ PV_WIND_PROD_LV = DATA_DIR / "PV_WIND_PROD_LV.xlsx"
 PV_WIND_PROD_LT = DATA_DIR / "PV_WIND_PROD_LT.xlsx"
 PV_WIND_PROD_PL = DATA_DIR / "PV_WIND_PROD_PL.xlsx"
 
+# Binary columnar copies of the profile workbooks (see utils.profile_store)
+PROFILE_CACHE_DIR = DATA_DIR / ".profile_cache"
+
+# Pickled simulate_dispatch results (see utils.result_cache)
+RESULT_CACHE_DIR = DATA_DIR / ".result_cache"
+
+# Year-boundary dispatch checkpoints (see simulation.simulate_dispatch.dispatch_physical)
+CHECKPOINT_DIR = DATA_DIR / ".checkpoints"
+
 SIMULATION_INPUT = DATA_DIR / "simulation_input.xlsx"
 DOCUMENTATION = DATA_DIR / "Sunly Baseload App - Documentation.pdf"
 test = DATA_DIR / "test.xlsx"
\ No newline at end of file
@@ -1,7 +1,5 @@
 from abc import ABC, abstractmethod
 
-import pandas as pd
-
 
 class StorageUnit(ABC):
     def __init__(self):
@@ -13,7 +11,7 @@ class StorageUnit(ABC):
         pass
 
     @abstractmethod
-    def discharge(self, shortfall: float, timestamp: pd.Timestamp) -> tuple[float, float, float, float]:
+    def discharge(self, shortfall: float, day: int) -> tuple[float, float, float, float]:
         """Returns: discharged_energy, cycle_loss"""
         pass
 
@@ -1,26 +1,162 @@
-import pandas as pd
+"""
+Headless batch runner: simulates every row of a batch input file without Streamlit.
 
-from config import PROFILES_EE
-from simulation.simulate import run_all_scenarios
+    python main.py data/simulation_input.xlsx --country EE --curve baseload --output results.csv
+    python main.py rows.csv --country LT --curve consumption --workers 8 --output results.parquet
+    python main.py rows.csv --country EE LV LT PL --output comparison.csv
+    python main.py rows.csv --country EE --demand-curve customer_load.csv --output customer.csv
+
+The input is the simulation_input.xlsx template or a CSV with the same columns. With several
+countries, or a 'country' column in the input, every row runs for each country (or its own) and
+the results get a 'country' column. A --demand-curve (CSV or Parquet, see utils.demand_curve)
+replaces the countries' consumption curves and implies --curve consumption. --profiles built
+runs on the profiles built by python -m utils.data_prep instead of the shipped workbooks; every
+result records which under 'Profile source'. Results are streamed into the output file
+(.csv, .xlsx or .parquet) row by row, with progress and throughput on stderr.
+"""
+import argparse
+import os
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from config import PROFILE_FILES
+from simulation.batch import BATCH_INPUT_COLUMNS, COUNTRY_COLUMN, COUNTRY_PROFILES, iter_batch, iter_country_batch
+from utils.data_prep import extract_from_file
+from utils.demand_curve import DemandCurve
+from utils.instrumentation import Instrumentation
+from utils.profiles import load_profile_bundle
+from utils.result_sink import SINK_FORMATS, open_result_sink
+
+CURVE_MODES = ("baseload", "consumption")
+
+
+class Progress:
+    """Prints rows done, rows/s, simulated hours/s and the time left on one stderr line."""
+
+    def __init__(self, total_rows: int, hours_per_row: int, enabled: bool = True):
+        self.total_rows = total_rows
+        self.hours_per_row = hours_per_row
+        self.enabled = enabled
+        self.rows_done = 0
+        self.start = time.perf_counter()
+        self._last_print = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def update(self, rows: int = 1) -> None:
+        self.rows_done += rows
+        now = time.perf_counter()
+        # At most a few lines a second, and always the last row
+        if self.enabled and (now - self._last_print >= 0.25 or self.rows_done == self.total_rows):
+            self._last_print = now
+            print(f"\r{self.line()}", end="", file=sys.stderr, flush=True)
+
+    def line(self) -> str:
+        elapsed = max(self.elapsed, 1e-9)
+        rows_per_sec = self.rows_done / elapsed
+        left = (self.total_rows - self.rows_done) / rows_per_sec if rows_per_sec > 0 else 0.0
+        return (f"[{self.rows_done}/{self.total_rows}] {self.rows_done / max(self.total_rows, 1):.0%} "
+                f"{rows_per_sec:.2f} rows/s {rows_per_sec * self.hours_per_row:,.0f} hours/s "
+                f"elapsed {elapsed:.0f}s left {left:.0f}s")
+
+    def finish(self) -> None:
+        if self.enabled:
+            print(file=sys.stderr)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run a simulation batch from the command line.")
+    parser.add_argument("input", type=Path, help="batch input: the simulation_input.xlsx template or a .csv")
+    parser.add_argument("--country", choices=sorted(PROFILE_FILES), nargs="+", default=["EE"],
+                        help="profile country, or several to compare (ignored if the input has a country column)")
+    parser.add_argument("--curve", choices=CURVE_MODES, default="baseload",
+                        help="flat baseload or the country's consumption curve")
+    parser.add_argument("--profiles", choices=COUNTRY_PROFILES, default="workbook",
+                        help="the shipped profile workbooks or the profiles built by python -m utils.data_prep")
+    parser.add_argument("--demand-curve", type=Path, default=None,
+                        help="customer load curve (.csv or .parquet) to use as the consumption curve")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="result file, format from the suffix (default: <input>_results.<--format or csv>)")
+    parser.add_argument("--format", choices=SINK_FORMATS, default=None, help="result format if not the suffix")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--bess-rte", type=float, default=0.86, help="round-trip efficiency of all storages")
+    parser.add_argument("--stages", type=Path, default=None,
+                        help="write per-stage timings of this process (see utils.instrumentation) to this JSON file")
+    parser.add_argument("--checkpoints", action="store_true",
+                        help="resume rows from year checkpoints (re-runs after a profile update)")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    input_rows = extract_from_file(args.input)
+    missing = [col for col in BATCH_INPUT_COLUMNS if col not in input_rows.columns]
+    if missing:
+        print(f"{args.input} is missing the columns: {', '.join(missing)}", file=sys.stderr)
+        return 2
+
+    output = args.output or args.input.with_name(f"{args.input.stem}_results.{args.format or 'csv'}")
+    demand_curve = None
+    if args.demand_curve:
+        try:
+            demand_curve = DemandCurve.from_file(args.demand_curve)
+        except (ValueError, ImportError) as e:
+            print(f"{args.demand_curve}: {e}", file=sys.stderr)
+            return 2
+        args.curve = "consumption"
+    is_baseload_mode = args.curve == "baseload"
+    has_country_column = COUNTRY_COLUMN in input_rows.columns
+    if has_country_column:
+        countries = [str(c).strip().upper() for c in input_rows[COUNTRY_COLUMN]]
+    else:
+        countries = [c for _ in range(len(input_rows)) for c in args.country]
+    unknown = sorted(set(countries) - set(PROFILE_FILES))
+    if unknown:
+        print(f"{args.input} has unknown countries: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    # Timings only: tracemalloc would slow the batch down
+    recorder = Instrumentation() if args.stages else None
+    with recorder.recording() if recorder else nullcontext():
+        profile_files = COUNTRY_PROFILES[args.profiles]
+        try:
+            hours_per_row = max(len(load_profile_bundle(profile_files[c])) for c in set(countries) or args.country)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+        progress = Progress(len(countries), hours_per_row, enabled=not args.quiet)
+        if not args.quiet:
+            label = f"{COUNTRY_COLUMN} column" if has_country_column else " ".join(args.country)
+            label += f", {args.profiles} profiles"
+            if demand_curve is not None:
+                label += f", load curve {args.demand_curve.name}"
+            print(f"{len(input_rows)} rows, {label}, {args.curve}, {args.workers} workers -> {output}",
+                  file=sys.stderr)
+
+        if has_country_column or len(args.country) > 1:
+            batch = iter_country_batch(input_rows, args.country, is_baseload_mode, args.workers, args.bess_rte,
+                                       demand_curve, args.checkpoints, args.profiles)
+        else:
+            batch = iter_batch(input_rows, profile_files[args.country[0]], is_baseload_mode, args.workers,
+                               args.bess_rte, demand_curve, args.checkpoints)
+        with open_result_sink(output, args.format) as sink:
+            for results in batch:
+                sink.write(results)
+                progress.update()
+    progress.finish()
+
+    if not args.quiet:
+        print(f"Wrote {sink.rows_written} result rows in {progress.elapsed:.1f}s", file=sys.stderr)
+    if args.stages:
+        recorder.to_json(args.stages)
+    return 0
 
 
 if __name__ == "__main__":
-    path = PROFILES_EE
-    df_profiles = pd.read_excel(path)
-    wind_profile = df_profiles['wind_profile']
-    solar_profile = df_profiles['solar_profile']
-    run_all_scenarios(PROFILES_EE, wind_profile, solar_profile, 40)
-
-'''
-    baseload = 40#input("Enter demand (MW): ")
-    wind_cap = 183#input("Wind Capacity (MW)")
-    solar_cap = 40#input("Solar Capacity (MW)")
-    battery_1h = 0#input("1h Battery Capacity (MW)")
-    battery_2h = 0#input("2h Battery Capacity (MW)")
-    battery_4h = 144#input("4h Battery Capacity (MW)")
-    battery_6h = 0#input("6h Battery Capacity (MW)")
-    battery_8h = 0#input("8h Battery Capacity (MW)")
-    battery_12h = 0#input("12h Battery Capacity (MW)")
-
-    run_all_scenarios(wind_profile, solar_profile, baseload)
-'''
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,49 @@
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+
+class HourlySeries:
+    """
+    Compact hourly dispatch output: one float32 array per column, aligned with a shared index.
+
+    Holds the same columns as the hourly DataFrame of simulate_dispatch at half the memory and
+    without pandas blocks; to_frame() gives the DataFrame when one is needed.
+
+    Attributes:
+        index: Timestamps of every hour.
+        columns: Column name -> float32 array, in DataFrame column order.
+    """
+
+    def __init__(self, index: pd.DatetimeIndex, columns: Dict[str, np.ndarray]):
+        self.index = index
+        self.columns = {name: np.asarray(values, dtype=np.float32) for name, values in columns.items()}
+
+        if not all(len(values) == len(index) for values in self.columns.values()):
+            raise ValueError("Hourly columns must all have the same length as the index.")
+
+    @classmethod
+    def concat(cls, parts: List["HourlySeries"]) -> "HourlySeries":
+        """Joins consecutive periods (e.g. the years of a run) into one series."""
+        if not parts:
+            raise ValueError("Nothing to concatenate.")
+        index = parts[0].index.append([part.index for part in parts[1:]]) if len(parts) > 1 else parts[0].index
+        names = list(parts[0].columns)
+        return cls(index, {name: np.concatenate([part.columns[name] for part in parts]) for name in names})
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(values.nbytes for values in self.columns.values())
+
+    def to_frame(self) -> pd.DataFrame:
+        """The hourly DataFrame with float32 columns, indexed by 'timestamp'."""
+        df = pd.DataFrame(self.columns, index=self.index, copy=False)
+        df.index.name = "timestamp"
+        return df
@@ -0,0 +1,103 @@
+import hashlib
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+
+class ProfileBundle:
+    """
+    Hourly (or finer) profiles of one country loaded once and held as aligned NumPy arrays.
+
+    Attributes:
+        index: Timestamps of every step ('Hour' column of the profile file).
+        wind_profile, solar_profile: Production per MW of installed capacity.
+        spot, cnp: Spot price and consumption curve.
+        step_hours: Length of one step in hours (1.0 for hourly, 0.25 for 15-minute profiles),
+            from the typical spacing of the index.
+        day: Calendar day of every step as days since epoch, used for daily discharge quotas.
+        years: Years in the order they appear in the profile.
+        year_offsets: Year -> (start, end) row offsets, end exclusive.
+        source: Profile file the bundle was loaded from, if any.
+    """
+
+    def __init__(self, index: pd.DatetimeIndex, wind_profile, solar_profile, spot, cnp):
+        self.index = pd.DatetimeIndex(index)
+        self.wind_profile = np.asarray(wind_profile, dtype=np.float64)
+        self.solar_profile = np.asarray(solar_profile, dtype=np.float64)
+        self.spot = np.asarray(spot, dtype=np.float64)
+        self.cnp = np.asarray(cnp, dtype=np.float64)
+        self.source = None
+        self._digest = None
+
+        n = len(self.index)
+        if not all(len(a) == n for a in (self.wind_profile, self.solar_profile, self.spot, self.cnp)):
+            raise ValueError("Profile columns must all have the same length as the index.")
+
+        self.step_hours = _step_hours(self.index)
+        self.day = self.index.values.astype("datetime64[D]").astype(np.int64)
+        self.years: List[int] = []
+        self.year_offsets: Dict[int, tuple[int, int]] = {}
+
+        year_of_hour = self.index.year.to_numpy()
+        boundaries = np.flatnonzero(np.diff(year_of_hour)) + 1
+        starts = np.concatenate(([0], boundaries)) if n else np.array([], dtype=np.int64)
+        ends = np.concatenate((boundaries, [n])) if n else np.array([], dtype=np.int64)
+        for start, end in zip(starts, ends):
+            year = int(year_of_hour[start])
+            if year in self.year_offsets:
+                raise ValueError(f"Profile hours for {year} are not contiguous.")
+            self.years.append(year)
+            self.year_offsets[year] = (int(start), int(end))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ProfileBundle":
+        """Builds a bundle from a profile DataFrame indexed by 'Hour'."""
+        return cls(df.index, df["wind_profile"], df["solar_profile"], df["spot"], df["cnp"])
+
+    def __len__(self):
+        return len(self.index)
+
+    def resample(self, step_minutes: int) -> "ProfileBundle":
+        """
+        Splits every step into steps of step_minutes, each with the values of the step it came
+        from: production per MW, prices and consumption stay constant within the original step.
+        """
+        step_minutes = int(step_minutes)
+        current_minutes = int(round(self.step_hours * 60))
+        if step_minutes <= 0 or current_minutes % step_minutes:
+            raise ValueError(f"Steps of {current_minutes} min cannot be split into {step_minutes} min steps.")
+        factor = current_minutes // step_minutes
+        if factor == 1:
+            return self
+
+        # From whole steps, so a timestamp stored a few ms early does not put sub-steps in the next year
+        starts = self.index.round(f"{current_minutes}min").values
+        offsets = np.arange(factor) * np.timedelta64(step_minutes, "m")
+        index = (starts[:, None] + offsets).ravel()
+        return ProfileBundle(index, *(np.repeat(values, factor) for values in
+                                      (self.wind_profile, self.solar_profile, self.spot, self.cnp)))
+
+    def year_slice(self, year: int) -> slice:
+        start, end = self.year_offsets[year]
+        return slice(start, end)
+
+    @property
+    def digest(self) -> str:
+        """Content hash of the timestamps and all profile columns, computed once."""
+        if self._digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            for values in (self.index.asi8, self.wind_profile, self.solar_profile, self.spot, self.cnp):
+                h.update(np.ascontiguousarray(values).tobytes())
+            self._digest = h.hexdigest()
+        return self._digest
+
+
+def _step_hours(index: pd.DatetimeIndex) -> float:
+    # Median spacing rounded to whole minutes: ignores DST gaps and millisecond noise from Excel
+    if len(index) < 2:
+        return 1.0
+    minutes = int(round(np.median(np.diff(index.values)) / np.timedelta64(1, "m")))
+    if minutes <= 0:
+        raise ValueError("Profile timestamps must be increasing.")
+    return minutes / 60
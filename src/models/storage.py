@@ -2,8 +2,11 @@ from interfaces.StorageUnit import StorageUnit
 
 
 class Storage(StorageUnit):
-    def __init__(self, charge_MW, storage_volume_MWh, round_trip_eff, name):
+    def __init__(self, charge_MW, storage_volume_MWh, round_trip_eff, name, step_hours=1.0):
         self.max_charge = charge_MW
+        # Energy the power limit allows in one step; charge/discharge amounts are per step
+        self.step_hours = step_hours
+        self.max_step_energy = charge_MW * step_hours
         self.max_volume = storage_volume_MWh
         self.charge_eff = self.discharge_eff = round_trip_eff**0.5
         self.soc = 0
@@ -21,7 +24,7 @@ class Storage(StorageUnit):
     def charge(self, to_charge_wind_MWh, to_charge_solar_MWh):
         total_to_charge = to_charge_wind_MWh + to_charge_solar_MWh
         max_raw_capacity = (self.max_volume - self.soc) / self.charge_eff
-        chargeable_raw = min(total_to_charge, self.max_charge, max_raw_capacity)
+        chargeable_raw = min(total_to_charge, self.max_step_energy, max_raw_capacity)
 
         if total_to_charge == 0:
             return 0.0, 0.0, 0.0, 0.0
@@ -49,11 +52,10 @@ class Storage(StorageUnit):
 
         return chargeable_raw, redundant_wind, redundant_solar, cycle_loss
 
-    def discharge(self, needed_energy_MWh, timestamp):
-        current_day = timestamp.date()
-        if self.last_updated_day != current_day:
+    def discharge(self, needed_energy_MWh, day):
+        if self.last_updated_day != day:
             self.daily_discharged_energy = 0.0
-            self.last_updated_day = current_day
+            self.last_updated_day = day
 
         remaining_quota = self.discharge_limit_per_day - self.daily_discharged_energy
         if remaining_quota <= 0 or self.soc <= 0:
@@ -61,7 +63,7 @@ class Storage(StorageUnit):
                 self.zero_hours += 1
             return 0.0, 0.0, 0.0, 0.0
 
-        possible_discharge = min(self.max_charge, self.soc)
+        possible_discharge = min(self.max_step_energy, self.soc)
         required_discharge = needed_energy_MWh / self.discharge_eff
         discharged = min(possible_discharge, required_discharge, remaining_quota)
 
@@ -98,7 +100,8 @@ class Storage(StorageUnit):
         self.yearly_discharged_energy = 0.0
 
     def get_zero_hours(self):
-        return self.zero_hours
+        # Counted in steps
+        return self.zero_hours * self.step_hours
 
     def reset_yearly_zero_hours(self):
         self.zero_hours = 0.0
@@ -0,0 +1,247 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from interfaces.StorageUnit import StorageUnit
+from models.storage import Storage
+
+
+class StorageFleet(StorageUnit):
+    """
+    All storages of a simulation as one struct-of-arrays.
+
+    Every per-unit quantity (max_charge, max_volume, soc, wind_soc, solar_soc, daily discharge,
+    ...) is one flat sequence with element i belonging to unit i, so the hourly charge() and
+    discharge() calls serve the whole fleet in priority order with one call, using the same
+    arithmetic as Storage.charge and Storage.discharge. The hourly state is kept as plain
+    float lists, which index several times faster than NumPy arrays from Python; yearly
+    read-outs return NumPy arrays.
+
+    Units without power (0 MW) never charge or discharge, so they are kept out of the hourly
+    loops and served last. get_average_cycles_per_year() and get_zero_hours() return one value
+    per unit.
+
+    Every charge()/discharge() call is one step of step_hours: the MW limits allow
+    max_charge * step_hours MWh per call, and zero hours are counted per step and reported
+    in hours.
+    """
+
+    def __init__(self, charge_MW, storage_volume_MWh, round_trip_eff, names: List[str], step_hours: float = 1.0):
+        n = len(names)
+        if len(charge_MW) != n or len(storage_volume_MWh) != n:
+            raise ValueError("charge_MW, storage_volume_MWh and names must have the same length.")
+
+        # Idle units go last (stable), matching create_storages' highest-MW-first ordering
+        order = sorted(range(n), key=lambda i: charge_MW[i] <= 0)
+        self.names = [names[i] for i in order]
+        self.name = "fleet"
+        self.max_charge = [float(charge_MW[i]) for i in order]
+        self.max_volume = [float(storage_volume_MWh[i]) for i in order]
+        self.step_hours = float(step_hours)
+        self.max_step_energy = [mw * self.step_hours for mw in self.max_charge]
+        efficiencies = np.broadcast_to(np.asarray(round_trip_eff, dtype=np.float64), (n,))
+        self.charge_eff = [float(efficiencies[i]) ** 0.5 for i in order]
+        self.discharge_eff = list(self.charge_eff)
+        self.soc = [0.0] * n
+        self.wind_soc = [0.0] * n
+        self.solar_soc = [0.0] * n
+        self.total_charged_wind = [0.0] * n
+        self.total_charged_solar = [0.0] * n
+        self.discharge_limit_per_day = [2 * v for v in self.max_volume]
+        self.daily_discharged_energy = [0.0] * n
+        self.yearly_discharged_energy = [0.0] * n
+        self.zero_hours = [0.0] * n
+        self.last_updated_day = None
+
+        self._active = [i for i in range(n) if self.max_charge[i] > 0]
+        self._idle = [i for i in range(n) if self.max_charge[i] <= 0]
+
+    @classmethod
+    def from_storages(cls, storages: List[Storage]) -> "StorageFleet":
+        """Builds a fleet from Storage objects in their dispatch order, copying their current state."""
+        step_hours = {getattr(s, "step_hours", 1.0) for s in storages}
+        if len(step_hours) > 1:
+            raise ValueError("All storages of a fleet must use the same step length.")
+        fleet = cls(
+            [s.max_charge for s in storages],
+            [s.max_volume for s in storages],
+            [1.0] * len(storages),
+            [s.name for s in storages],
+            step_hours.pop() if step_hours else 1.0,
+        )
+        by_name = {s.name: s for s in storages}
+        for i, name in enumerate(fleet.names):
+            storage = by_name[name]
+            for attr in ("charge_eff", "discharge_eff", "soc", "wind_soc", "solar_soc",
+                         "total_charged_wind", "total_charged_solar", "discharge_limit_per_day",
+                         "daily_discharged_energy", "yearly_discharged_energy", "zero_hours"):
+                getattr(fleet, attr)[i] = float(getattr(storage, attr))
+        return fleet
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def has_power(self) -> bool:
+        return len(self._active) > 0
+
+    def index_of(self, name: str) -> Optional[int]:
+        return self.names.index(name) if name in self.names else None
+
+    def charge(self, to_charge_wind_MWh, to_charge_solar_MWh):
+        """
+        Charges units in priority order, each up to its MW limit and SoC headroom, until the surplus runs out.
+        Returns: charged_energy, redundant_wind, redundant_solar, cycle_loss
+        """
+        remaining_wind = max(0.0, to_charge_wind_MWh)
+        remaining_solar = max(0.0, to_charge_solar_MWh)
+        total_cycle_loss = 0.0
+        total_charged = 0.0
+
+        max_charge = self.max_step_energy
+        max_volume = self.max_volume
+        soc = self.soc
+
+        for i in self._active:
+            soc_headroom = max(0.0, max_volume[i] - soc[i])
+            if soc_headroom < 1e-6:
+                continue
+
+            slice_mwh = min(max_charge[i], soc_headroom, remaining_wind + remaining_solar)
+            if slice_mwh < 1e-6:
+                continue
+
+            total_surplus = remaining_wind + remaining_solar
+            wind_frac = remaining_wind / total_surplus if total_surplus > 0 else 0.0
+            slice_wind = slice_mwh * wind_frac
+            slice_solar = slice_mwh * (1.0 - wind_frac)
+
+            # Storage.charge for unit i
+            eff = self.charge_eff[i]
+            total_to_charge = slice_wind + slice_solar
+            chargeable_raw = min(total_to_charge, max_charge[i], (max_volume[i] - soc[i]) / eff)
+            wind_charged_raw = chargeable_raw * (slice_wind / total_to_charge)
+            solar_charged_raw = chargeable_raw * (slice_solar / total_to_charge)
+            wind_charged = wind_charged_raw * eff
+            solar_charged = solar_charged_raw * eff
+            leftover_wind = max(slice_wind - wind_charged_raw, 0.0)
+            leftover_solar = max(slice_solar - solar_charged_raw, 0.0)
+
+            self.total_charged_wind[i] += wind_charged_raw
+            self.total_charged_solar[i] += solar_charged_raw
+            soc[i] += wind_charged + solar_charged
+            self.wind_soc[i] += wind_charged
+            self.solar_soc[i] += solar_charged
+            loss = chargeable_raw - (wind_charged + solar_charged)
+
+            actual_charged_wind = slice_wind - leftover_wind
+            actual_charged_solar = slice_solar - leftover_solar
+            remaining_wind = max(0.0, remaining_wind - actual_charged_wind)
+            remaining_solar = max(0.0, remaining_solar - actual_charged_solar)
+            total_charged += actual_charged_wind + actual_charged_solar
+            total_cycle_loss += max(0.0, loss)
+
+            if remaining_wind + remaining_solar < 1e-6:
+                break
+
+        return total_charged, remaining_wind, remaining_solar, total_cycle_loss
+
+    def discharge(self, needed_energy_MWh, day):
+        """
+        Discharges units in priority order until the shortfall is covered, within each unit's
+        MW limit, SoC and remaining daily quota.
+
+        The wind/solar split returned is the one of the last unit visited (zero if that unit
+        was empty or out of quota).
+        Returns: delivered, wind_delivered, solar_delivered, cycle_loss
+        """
+        if self.last_updated_day != day:
+            self.daily_discharged_energy = [0.0] * len(self.names)
+            self.last_updated_day = day
+
+        shortfall = needed_energy_MWh
+        discharged_total = 0.0
+        cycle_loss_total = 0.0
+        wind_delivered = solar_delivered = 0.0
+
+        soc = self.soc
+        daily = self.daily_discharged_energy
+
+        for i in self._active:
+            if shortfall <= 0:
+                break
+
+            remaining_quota = self.discharge_limit_per_day[i] - daily[i]
+            unit_soc = soc[i]
+            if remaining_quota <= 0 or unit_soc <= 0:
+                if unit_soc <= 0:
+                    self.zero_hours[i] += 1
+                wind_delivered = solar_delivered = 0.0
+                continue
+
+            eff = self.discharge_eff[i]
+            discharged = min(self.max_step_energy[i], unit_soc, shortfall / eff, remaining_quota)
+            wind_used = discharged * (self.wind_soc[i] / unit_soc)
+            solar_used = discharged * (self.solar_soc[i] / unit_soc)
+
+            soc[i] = unit_soc - discharged
+            self.wind_soc[i] -= wind_used
+            self.solar_soc[i] -= solar_used
+            daily[i] += discharged
+            self.yearly_discharged_energy[i] += discharged
+
+            delivered = discharged * eff
+            wind_delivered = wind_used * eff
+            solar_delivered = solar_used * eff
+            if delivered == 0:
+                self.zero_hours[i] += 1
+
+            discharged_total += delivered
+            cycle_loss_total += discharged - delivered
+            shortfall -= delivered
+
+        # Idle units are always empty: each one visited counts a zero hour and clears the split
+        if shortfall > 0 and self._idle:
+            for i in self._idle:
+                self.zero_hours[i] += 1
+            wind_delivered = solar_delivered = 0.0
+
+        return discharged_total, wind_delivered, solar_delivered, cycle_loss_total
+
+    _STATE_FIELDS = ("soc", "wind_soc", "solar_soc", "total_charged_wind", "total_charged_solar",
+                     "daily_discharged_energy", "yearly_discharged_energy", "zero_hours")
+
+    def snapshot(self) -> Dict:
+        """
+        Returns the fleet's dispatch state (SoC per source, charged totals, daily quota use and
+        counters) as a JSON-serialisable dict; restore() puts it back. Taken at a year boundary it
+        is everything the next year needs from the previous one.
+        """
+        state = {"names": list(self.names), "last_updated_day": self.last_updated_day}
+        for field in self._STATE_FIELDS:
+            state[field] = list(getattr(self, field))
+        return state
+
+    def restore(self, state: Dict) -> None:
+        """Restores a snapshot() of a fleet with the same units."""
+        if state["names"] != self.names:
+            raise ValueError(f"Snapshot is for storages {state['names']}, fleet has {self.names}.")
+        for field in self._STATE_FIELDS:
+            setattr(self, field, [float(v) for v in state[field]])
+        day = state["last_updated_day"]
+        self.last_updated_day = None if day is None else int(day)
+
+    def get_average_cycles_per_year(self):
+        volume = np.asarray(self.max_volume)
+        yearly = np.asarray(self.yearly_discharged_energy)
+        return np.divide(yearly, volume, out=np.zeros(len(self.names)), where=volume > 0)
+
+    def reset_yearly_energy(self):
+        self.yearly_discharged_energy = [0.0] * len(self.names)
+
+    def get_zero_hours(self):
+        # Counted in steps
+        return np.asarray(self.zero_hours) * self.step_hours
+
+    def reset_yearly_zero_hours(self):
+        self.zero_hours = [0.0] * len(self.names)
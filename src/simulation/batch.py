@@ -0,0 +1,320 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+from config import BUILT_PROFILE_FILES, PROFILE_FILES
+from models.profile_bundle import ProfileBundle
+from simulation.simulate_dispatch import default_checkpoint_cache, simulate_dispatch
+from utils.demand_curve import DemandCurve
+from utils.instrumentation import stage
+from utils.process_pool import POOL_CONTEXT
+from utils.profile_store import profile_source
+from utils.profiles import get_profiles, load_profile_bundle
+from utils.result_sink import ResultSink
+
+# Columns that change the dispatch itself; rows equal on all of them differ only in prices
+PHYSICAL_INPUT_COLUMNS = [
+    "wind_cap", "solar_cap", "baseload",
+    "battery_1h_mw", "battery_2h_mw", "battery_4h_mw", "battery_6h_mw", "battery_8h_mw", "battery_12h_mw",
+]
+
+BATCH_INPUT_COLUMNS = [
+    "wind_cap", "wind_price", "solar_cap", "solar_price", "baseload", "missing_energy_price",
+    "battery_1h_mw", "battery_1h_price", "battery_2h_mw", "battery_2h_price",
+    "battery_4h_mw", "battery_4h_price", "battery_6h_mw", "battery_6h_price",
+    "battery_8h_mw", "battery_8h_price", "battery_12h_mw", "battery_12h_price",
+]
+
+# Optional batch input column naming the country (config.PROFILE_FILES code) of each row
+COUNTRY_COLUMN = "country"
+
+# Result entry recording which profiles a row ran on (see utils.profile_store.profile_source)
+PROFILE_SOURCE_COLUMN = "Profile source"
+
+# Country profiles to run on: the shipped workbooks or the profiles built from production data
+COUNTRY_PROFILES = {"workbook": PROFILE_FILES, "built": BUILT_PROFILE_FILES}
+
+# Profiles of the current worker process by profile path, attached once by _init_worker
+_worker_profiles: Dict[str, ProfileBundle] = {}
+
+
+def simulate_row(row: Dict[str, Any], profiles: ProfileBundle, is_baseload_mode: bool,
+                 simulation_id: int, bess_rte: float = 0.86, checkpoints: bool = False) -> List[Dict]:
+    """
+    Runs simulate_dispatch for one row of the batch input template; with checkpoints it resumes
+    from the year checkpoints of default_checkpoint_cache.
+    """
+    wind_prod, solar_prod = get_profiles(row["wind_cap"], row["solar_cap"], profiles)
+
+    results, _ = simulate_dispatch(
+        profile_file=profiles,
+        wind_prod=wind_prod,
+        solar_prod=solar_prod,
+        baseload=row["baseload"],
+        is_baseload_mode=is_baseload_mode,
+        wind_cap=row["wind_cap"],
+        solar_cap=row["solar_cap"],
+        wind_price=row["wind_price"],
+        solar_price=row["solar_price"],
+        battery_1h_price=row["battery_1h_price"],
+        battery_2h_price=row["battery_2h_price"],
+        battery_4h_price=row["battery_4h_price"],
+        battery_6h_price=row["battery_6h_price"],
+        battery_8h_price=row["battery_8h_price"],
+        battery_12h_price=row["battery_12h_price"],
+        missing_energy_price=row["missing_energy_price"],
+        battery_1h_mw=row["battery_1h_mw"],
+        battery_2h_mw=row["battery_2h_mw"],
+        battery_4h_mw=row["battery_4h_mw"],
+        battery_6h_mw=row["battery_6h_mw"],
+        battery_8h_mw=row["battery_8h_mw"],
+        battery_12h_mw=row["battery_12h_mw"],
+        bess_rte=bess_rte,
+        simulation_id=simulation_id,
+        collect_hourly="none",
+        checkpoints=default_checkpoint_cache if checkpoints else None,
+    )
+    return results
+
+
+def _load_bundle(profile_file, demand_curve: Optional[DemandCurve]) -> ProfileBundle:
+    profiles = load_profile_bundle(profile_file)
+    return demand_curve.apply(profiles) if demand_curve is not None else profiles
+
+
+def _init_worker(profile_paths: List[str], demand_curve: Optional[DemandCurve] = None) -> None:
+    # Memory-maps the profile store files: every worker shares the same physical pages
+    global _worker_profiles
+    _worker_profiles = {path: _load_bundle(path, demand_curve) for path in profile_paths}
+
+
+def _run_in_worker(group: List[tuple]) -> List[List[Dict]]:
+    # One group shares its physical inputs, so only its first row dispatches; the rest re-price
+    return [simulate_row(row, _worker_profiles[path], is_baseload_mode, simulation_id, bess_rte, checkpoints)
+            for _, row, path, is_baseload_mode, simulation_id, bess_rte, checkpoints in group]
+
+
+def _group_by_physical_inputs(tasks: List[tuple]) -> List[List[tuple]]:
+    groups: Dict[tuple, List[tuple]] = {}
+    for task in tasks:
+        row, path = task[1], task[2]
+        groups.setdefault((path,) + tuple(row[c] for c in PHYSICAL_INPUT_COLUMNS), []).append(task)
+    return list(groups.values())
+
+
+def _profile_path(profile_file) -> str:
+    path = profile_file.source if isinstance(profile_file, ProfileBundle) else profile_file
+    if not isinstance(path, (str, os.PathLike)):
+        raise ValueError("Parallel batches need the profile file path so workers can memory-map it.")
+    return str(path)
+
+
+def _iter_tasks(tasks: List[tuple], bundles: Dict[str, ProfileBundle], workers: int,
+                demand_curve: Optional[DemandCurve] = None) -> Iterator[List[Dict]]:
+    """
+    Runs (seq, row, profile path, is_baseload_mode, simulation_id, bess_rte, checkpoints) tasks and
+    yields their results in seq order; bundles holds the loaded profile of every path (with
+    demand_curve applied), workers load them again from the paths.
+    """
+    workers = max(1, min(int(workers), len(tasks)))
+    if workers == 1:
+        for _, row, path, is_baseload_mode, simulation_id, bess_rte, checkpoints in tasks:
+            yield simulate_row(row, bundles[path], is_baseload_mode, simulation_id, bess_rte, checkpoints)
+        return
+
+    groups = _group_by_physical_inputs(tasks)
+    chunksize = max(1, len(groups) // (workers * 4))
+
+    # Groups finish out of order: hold finished rows until every earlier task is done
+    pending = {}
+    next_seq = 0
+    with ProcessPoolExecutor(max_workers=workers, mp_context=POOL_CONTEXT, initializer=_init_worker,
+                             initargs=(list(bundles), demand_curve)) as pool:
+        try:
+            for group, group_results in zip(groups, pool.map(_run_in_worker, groups, chunksize=chunksize)):
+                for task, results in zip(group, group_results):
+                    pending[task[0]] = results
+                while next_seq in pending:
+                    yield pending.pop(next_seq)
+                    next_seq += 1
+        finally:
+            # A caller that stops early (closes the generator) should not wait for the queued rows
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_batch(
+    input_rows: pd.DataFrame,
+    profile_file,
+    is_baseload_mode: bool,
+    workers: int = 1,
+    bess_rte: float = 0.86,
+    demand_curve: Optional[DemandCurve] = None,
+    checkpoints: bool = False,
+) -> Iterator[List[Dict]]:
+    """
+    Runs every row of a batch input table and yields each row's yearly results as soon as the
+    row and all rows before it are done.
+
+    Rows are numbered 1..N as 'Simulation id' and yielded in that order, whatever the number of
+    workers. Every result records the kind of profile_file under PROFILE_SOURCE_COLUMN.
+
+    Rows that differ only in prices are sent to the same worker, which dispatches them once and
+    re-prices the cached physical result.
+
+    Args:
+        input_rows: Batch input table with BATCH_INPUT_COLUMNS (missing values are treated as 0).
+        profile_file: Profile file path or a ProfileBundle loaded from one.
+        is_baseload_mode: True for flat baseload, False for the consumption curve.
+        workers: Number of worker processes; 1 runs in the current process. Workers are spawned,
+            so a script running a batch with more than one needs an `if __name__ == "__main__":` guard.
+        bess_rte: Round-trip efficiency of all storages.
+        demand_curve: Customer load curve used as the consumption curve instead of the profile's
+            cnp (see utils.demand_curve); only used when is_baseload_mode is False.
+        checkpoints: Resume rows from year checkpoints, so re-running a batch after a profile
+            update dispatches only the new or changed years (see simulate_dispatch).
+    """
+    rows = input_rows.fillna(0)[BATCH_INPUT_COLUMNS].to_dict("records")
+    workers = max(1, min(int(workers), len(rows)))
+    if is_baseload_mode:
+        demand_curve = None
+    if workers == 1:
+        # In-process runs also take a bundle that was not loaded from a file
+        key = "profile"
+        bundles = {key: _load_bundle(profile_file, demand_curve)}
+    else:
+        # Convert (or validate) the store once here, not concurrently in every worker
+        key = _profile_path(profile_file)
+        bundles = {key: _load_bundle(key, demand_curve)}
+
+    tasks = [(k - 1, row, key, is_baseload_mode, k, bess_rte, checkpoints) for k, row in enumerate(rows, start=1)]
+    source = profile_source(profile_file)
+    for results in _iter_tasks(tasks, bundles, workers, demand_curve):
+        yield [{**result, PROFILE_SOURCE_COLUMN: source} for result in results]
+
+
+def iter_country_batch(
+    input_rows: pd.DataFrame,
+    countries: Sequence[str],
+    is_baseload_mode: bool,
+    workers: int = 1,
+    bess_rte: float = 0.86,
+    demand_curve: Optional[DemandCurve] = None,
+    checkpoints: bool = False,
+    profiles: str = "workbook",
+) -> Iterator[List[Dict]]:
+    """
+    Runs a batch input table against several countries' profiles in one pool of workers.
+
+    Every row runs once per country in countries, or only for its own country when the table
+    has a COUNTRY_COLUMN. Each country's profile is loaded once and shared by all its rows.
+    Results are yielded row by row (countries in the given order within a row) with a
+    'country' entry; 'Simulation id' is the row's 1-based number in input_rows.
+
+    Args:
+        input_rows: Batch input table with BATCH_INPUT_COLUMNS and optionally COUNTRY_COLUMN.
+        countries: Country codes of config.PROFILE_FILES; ignored with a COUNTRY_COLUMN.
+        profiles: Key of COUNTRY_PROFILES: the shipped workbooks or the built profiles.
+        Remaining arguments: as in iter_batch; a demand_curve applies to every country.
+    """
+    if profiles not in COUNTRY_PROFILES:
+        raise ValueError(f"profiles must be one of {tuple(COUNTRY_PROFILES)}, got '{profiles}'.")
+    if is_baseload_mode:
+        demand_curve = None
+    rows = input_rows.fillna(0)[BATCH_INPUT_COLUMNS].to_dict("records")
+    if COUNTRY_COLUMN in input_rows:
+        row_countries = [[str(c).strip().upper()] for c in input_rows[COUNTRY_COLUMN]]
+    else:
+        row_countries = [list(countries)] * len(rows)
+
+    used = list(dict.fromkeys(c for cs in row_countries for c in cs))
+    unknown = [c for c in used if c not in PROFILE_FILES]
+    if unknown:
+        raise ValueError(f"Unknown countries: {', '.join(unknown)} (expected one of {', '.join(PROFILE_FILES)}).")
+
+    paths = {country: str(COUNTRY_PROFILES[profiles][country]) for country in used}
+    bundles = {paths[country]: _load_bundle(paths[country], demand_curve) for country in used}
+
+    tasks, labels = [], []
+    for k, (row, cs) in enumerate(zip(rows, row_countries), start=1):
+        for country in cs:
+            tasks.append((len(tasks), row, paths[country], is_baseload_mode, k, bess_rte, checkpoints))
+            labels.append(country)
+
+    for country, results in zip(labels, _iter_tasks(tasks, bundles, workers, demand_curve)):
+        yield [{"country": country, **result, PROFILE_SOURCE_COLUMN: profiles} for result in results]
+
+
+def simulate_countries(
+    countries: Sequence[str],
+    is_baseload_mode: bool,
+    workers: int = 1,
+    bess_rte: float = 0.86,
+    demand_curve: Optional[DemandCurve] = None,
+    profiles: str = "workbook",
+    **inputs,
+) -> pd.DataFrame:
+    """
+    Runs simulate_dispatch for one asset mix in several countries, one country per worker.
+
+    Args:
+        countries: Country codes of config.PROFILE_FILES.
+        is_baseload_mode: True for flat baseload, False for the consumption curve.
+        workers: Number of worker processes; 1 runs in the current process.
+        bess_rte: Round-trip efficiency of all storages.
+        demand_curve: Customer load curve replacing every country's cnp, see iter_batch.
+        profiles: The workbook or built profiles, see iter_country_batch.
+        inputs: The BATCH_INPUT_COLUMNS values (capacities and prices as in simulate_dispatch);
+            missing ones count as 0.
+
+    Returns:
+        The yearly results of every country with a 'country' column, countries in the given order.
+    """
+    unknown = [name for name in inputs if name not in BATCH_INPUT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown inputs: {', '.join(unknown)}")
+    row = pd.DataFrame([{col: inputs.get(col, 0) for col in BATCH_INPUT_COLUMNS}])
+    results = []
+    for country_results in iter_country_batch(row, countries, is_baseload_mode, workers, bess_rte,
+                                              demand_curve, profiles=profiles):
+        results.extend(country_results)
+    return pd.DataFrame(results)
+
+
+def run_batch(
+    input_rows: pd.DataFrame,
+    profile_file,
+    is_baseload_mode: bool,
+    workers: int = 1,
+    bess_rte: float = 0.86,
+    demand_curve: Optional[DemandCurve] = None,
+    checkpoints: bool = False,
+) -> List[Dict]:
+    """Runs a batch (see iter_batch) and returns the yearly results of all rows in one list."""
+    all_results = []
+    for results in iter_batch(input_rows, profile_file, is_baseload_mode, workers, bess_rte, demand_curve,
+                              checkpoints):
+        all_results.extend(results)
+    return all_results
+
+
+def write_batch(
+    input_rows: pd.DataFrame,
+    profile_file,
+    is_baseload_mode: bool,
+    sink: ResultSink,
+    workers: int = 1,
+    bess_rte: float = 0.86,
+    demand_curve: Optional[DemandCurve] = None,
+    checkpoints: bool = False,
+) -> int:
+    """
+    Runs a batch (see iter_batch) and streams each row's results into sink as it finishes,
+    without keeping them. Returns the number of result rows written.
+    """
+    for results in iter_batch(input_rows, profile_file, is_baseload_mode, workers, bess_rte, demand_curve,
+                              checkpoints):
+        with stage("write_results"):
+            sink.write(results)
+    return sink.rows_written
@@ -0,0 +1,284 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+from models.storage_fleet import StorageFleet
+
+HOURLY_COLUMNS = (
+    "battery_discharged",
+    "battery_charged",
+    "missing_energy",
+    "excess_energy",
+    "wind_total",
+    "solar_total",
+    "baseload",
+)
+
+
+def dispatch_year_arrays(
+    wind: np.ndarray,
+    solar: np.ndarray,
+    demand: np.ndarray,
+    day: np.ndarray,
+    storages: StorageFleet,
+    metrics: Dict,
+    spot: Optional[np.ndarray] = None,
+) -> tuple[Optional[Dict[str, np.ndarray]], float, Optional[Dict[str, tuple[float, float]]]]:
+    """
+    Runs the dispatch of one year on arrays, one step (hour, or shorter) at a time.
+
+    The hourly series are written into preallocated arrays and all storages are served by one
+    StorageFleet call per hour.
+
+    Summary mode (spot given): no hourly arrays are allocated. Instead the loop keeps running
+    totals of energy and energy x spot for the missing and excess energy, the inputs of their
+    VWAPs (see price_totals_vwap).
+
+    Every quantity is energy per step and metrics["hours_met"] counts steps; simulate_year_dispatch
+    converts power to energy per step and steps to hours.
+
+    Args:
+        wind, solar: Production per step, MWh (already rounded like simulate_year_dispatch does).
+        demand: Demand per step, MWh (baseload or consumption-curve scaled).
+        day: Calendar day of every step (ProfileBundle.day), for the daily discharge quota.
+        storages: Storage fleet in dispatch priority order; its state is updated in place.
+        metrics: Yearly metrics dict from init_metrics; updated in place.
+        spot: Hourly spot price; switches to summary mode.
+
+    Returns:
+        Hourly output arrays keyed by HOURLY_COLUMNS (None in summary mode), the yearly cycle loss,
+        and in summary mode the price totals {"missing_energy"/"excess_energy": (energy, energy x spot)}.
+    """
+    n = len(wind)
+    collect = spot is None
+    if collect:
+        out = {col: np.zeros(n, dtype=np.float64) for col in HOURLY_COLUMNS}
+        out["wind_total"][:] = wind
+        out["solar_total"][:] = solar
+        out["baseload"][:] = demand
+
+        out_discharged = out["battery_discharged"]
+        out_charged = out["battery_charged"]
+        out_missing = out["missing_energy"]
+        out_excess = out["excess_energy"]
+    else:
+        out = None
+        spots = spot.tolist()
+    missing_e = missing_v = excess_e = excess_v = 0.0
+
+    has_storage = storages.has_power
+    charge = storages.charge
+    discharge = storages.discharge
+
+    wind_in_baseload = metrics["wind_in_baseload"]
+    solar_in_baseload = metrics["solar_in_baseload"]
+    produced_total = metrics["produced_total"]
+    hours_met = metrics["hours_met"]
+    excess_wind = metrics["excess_wind"]
+    excess_solar = metrics["excess_solar"]
+    redundant_wind = metrics["redundant_wind"]
+    redundant_solar = metrics["redundant_solar"]
+    charged_wind = metrics["charged_wind"]
+    charged_solar = metrics["charged_solar"]
+    excess_energy = metrics["excess_energy"]
+    missing_energy = metrics["missing_energy"]
+    cycle_loss_total = 0.0
+
+    winds = wind.tolist()
+    solars = solar.tolist()
+    demands = demand.tolist()
+    days = day.tolist()
+
+    for h in range(n):
+        w = winds[h]
+        s = solars[h]
+        bl = demands[h]
+        total_gen = w + s
+        cycle_loss = 0.0
+
+        if total_gen >= bl:
+            if total_gen == 0:
+                wind_surplus = solar_surplus = 0.0
+            else:
+                wind_in_baseload += bl * (w / total_gen)
+                solar_in_baseload += bl * (s / total_gen)
+                surplus = total_gen - bl
+                wind_surplus = surplus * (w / total_gen)
+                solar_surplus = surplus * (s / total_gen)
+            produced_total += bl
+            hours_met += 1
+
+            if has_storage:
+                charged, rem_wind, rem_solar, cycle_loss = charge(wind_surplus, solar_surplus)
+            else:
+                charged, rem_wind, rem_solar = 0.0, max(0.0, wind_surplus), max(0.0, solar_surplus)
+
+            remaining_surplus = rem_wind + rem_solar
+            if remaining_surplus == 0:
+                to_grid_wind = to_grid_solar = 0.0
+            else:
+                to_grid_wind = remaining_surplus * (rem_wind / remaining_surplus)
+                to_grid_solar = remaining_surplus * (rem_solar / remaining_surplus)
+            excess_wind += to_grid_wind
+            excess_solar += to_grid_solar
+            redundant_wind += rem_wind - to_grid_wind
+            redundant_solar += rem_solar - to_grid_solar
+            charged_wind += wind_surplus - rem_wind
+            charged_solar += solar_surplus - rem_solar
+            excess_energy += remaining_surplus
+
+            if collect:
+                out_charged[h] = charged
+                out_excess[h] = remaining_surplus
+            elif remaining_surplus > 0:
+                price = spots[h]
+                if price == price:
+                    excess_e += remaining_surplus
+                    excess_v += remaining_surplus * price
+
+        else:
+            shortfall = bl - total_gen
+            wind_in_baseload += w
+            solar_in_baseload += s
+
+            if has_storage:
+                discharged_total, wind_delivered, solar_delivered, cycle_loss = discharge(shortfall, days[h])
+            else:
+                discharged_total = wind_delivered = solar_delivered = 0.0
+
+            produced = total_gen + discharged_total
+            produced_total += produced
+            wind_in_baseload += wind_delivered
+            solar_in_baseload += solar_delivered
+
+            if produced >= bl:
+                hours_met += 1
+            else:
+                missing = bl - produced
+                missing_energy += missing
+                if collect:
+                    out_missing[h] = missing
+                elif missing > 0:
+                    price = spots[h]
+                    if price == price:
+                        missing_e += missing
+                        missing_v += missing * price
+
+            if collect:
+                out_discharged[h] = discharged_total
+
+        cycle_loss_total += cycle_loss
+
+    metrics.update({
+        "wind_in_baseload": wind_in_baseload,
+        "solar_in_baseload": solar_in_baseload,
+        "produced_total": produced_total,
+        "hours_met": hours_met,
+        "excess_wind": excess_wind,
+        "excess_solar": excess_solar,
+        "redundant_wind": redundant_wind,
+        "redundant_solar": redundant_solar,
+        "charged_wind": charged_wind,
+        "charged_solar": charged_solar,
+        "excess_energy": excess_energy,
+        "missing_energy": missing_energy,
+    })
+
+    if collect:
+        return out, cycle_loss_total, None
+    return None, cycle_loss_total, {"missing_energy": (missing_e, missing_v), "excess_energy": (excess_e, excess_v)}
+
+
+def price_totals_vwap(totals: tuple[float, float]) -> float:
+    """VWAP from running (energy, energy x price) totals, rounded like vwap_arrays."""
+    energy, value = totals
+    if energy == 0:
+        return 0.0
+    return round(value / energy, 4)
+
+
+def _sequential_sum(start: float, values: np.ndarray) -> float:
+    # Left-to-right like the hourly loop (np.sum is pairwise), so totals stay bit-identical
+    if len(values) == 0:
+        return start
+    return float(np.cumsum(np.concatenate(([start], values)))[-1])
+
+
+def dispatch_year_without_storage(
+    wind: np.ndarray,
+    solar: np.ndarray,
+    demand: np.ndarray,
+    metrics: Dict,
+    spot: Optional[np.ndarray] = None,
+) -> tuple[Optional[Dict[str, np.ndarray]], float, Optional[Dict[str, tuple[float, float]]]]:
+    """
+    Closed-form dispatch for configurations without storage power.
+
+    With no storage nothing carries over between hours, so every hour of dispatch_year_arrays
+    reduces to whole-array min/max and share_allocation splits. Takes and returns the same
+    as dispatch_year_arrays; the cycle loss is always 0.
+    """
+    n = len(wind)
+    total_gen = wind + solar
+    met = total_gen >= demand
+    has_gen = total_gen != 0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wind_share = np.where(has_gen, wind / total_gen, 0.0)
+        solar_share = np.where(has_gen, solar / total_gen, 0.0)
+
+    # Hours with enough generation: demand is split pro rata, the surplus goes to the grid
+    surplus = np.where(met, total_gen - demand, 0.0)
+    wind_surplus = np.where(met & has_gen, surplus * wind_share, 0.0)
+    solar_surplus = np.where(met & has_gen, surplus * solar_share, 0.0)
+    rem_wind = np.maximum(0.0, wind_surplus)
+    rem_solar = np.maximum(0.0, solar_surplus)
+    remaining_surplus = rem_wind + rem_solar
+    with np.errstate(divide="ignore", invalid="ignore"):
+        to_grid_wind = np.where(remaining_surplus != 0, remaining_surplus * (rem_wind / remaining_surplus), 0.0)
+        to_grid_solar = np.where(remaining_surplus != 0, remaining_surplus * (rem_solar / remaining_surplus), 0.0)
+
+    # Hours short of demand: everything produced is used, the rest is missing
+    short = ~met
+    missing = np.where(short, demand - total_gen, 0.0)
+
+    wind_in_baseload = np.where(met, np.where(has_gen, demand * wind_share, 0.0), wind)
+    solar_in_baseload = np.where(met, np.where(has_gen, demand * solar_share, 0.0), solar)
+    produced = np.where(met, demand, total_gen)
+
+    metrics.update({
+        "wind_in_baseload": _sequential_sum(metrics["wind_in_baseload"], wind_in_baseload),
+        "solar_in_baseload": _sequential_sum(metrics["solar_in_baseload"], solar_in_baseload),
+        "produced_total": _sequential_sum(metrics["produced_total"], produced),
+        "hours_met": metrics["hours_met"] + int(met.sum()),
+        "excess_wind": _sequential_sum(metrics["excess_wind"], to_grid_wind[met]),
+        "excess_solar": _sequential_sum(metrics["excess_solar"], to_grid_solar[met]),
+        "redundant_wind": _sequential_sum(metrics["redundant_wind"], (rem_wind - to_grid_wind)[met]),
+        "redundant_solar": _sequential_sum(metrics["redundant_solar"], (rem_solar - to_grid_solar)[met]),
+        "charged_wind": _sequential_sum(metrics["charged_wind"], (wind_surplus - rem_wind)[met]),
+        "charged_solar": _sequential_sum(metrics["charged_solar"], (solar_surplus - rem_solar)[met]),
+        "excess_energy": _sequential_sum(metrics["excess_energy"], remaining_surplus[met]),
+        "missing_energy": _sequential_sum(metrics["missing_energy"], missing[short]),
+    })
+
+    if spot is not None:
+        return None, 0.0, {
+            "missing_energy": _price_totals(missing, spot),
+            "excess_energy": _price_totals(remaining_surplus, spot),
+        }
+
+    out = {
+        "battery_discharged": np.zeros(n),
+        "battery_charged": np.zeros(n),
+        "missing_energy": missing,
+        "excess_energy": remaining_surplus,
+        "wind_total": np.array(wind, dtype=np.float64),
+        "solar_total": np.array(solar, dtype=np.float64),
+        "baseload": np.array(demand, dtype=np.float64),
+    }
+    return out, 0.0, None
+
+
+def _price_totals(energy: np.ndarray, price: np.ndarray) -> tuple[float, float]:
+    mask = (energy > 0) & ~np.isnan(price)
+    return float(energy[mask].sum()), float((energy[mask] * price[mask]).sum())
@@ -0,0 +1,169 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from models.profile_bundle import _step_hours
+
+ENERGY_STACK_SERIES = [
+    "Direct Production",
+    "Battery Discharge",
+    "Missing Energy",
+    "Charged to Battery",
+    "Excess Energy"
+]
+
+RESOLUTIONS = ["adaptive", "hourly", "daily", "weekly", "lttb"]
+
+# Points per series sent to the browser by the adaptive and lttb resolutions
+DEFAULT_MAX_POINTS = 1000
+
+_HOUR_NS = 3600 * 10**9
+
+# Bucket widths tried by the adaptive resolution, in hours; those shorter than the frame's step are skipped
+_ADAPTIVE_BUCKETS = [0.25, 0.5, 1, 2, 3, 6, 12, 24, 48, 168, 336, 720]
+
+# Timestamps are days since 1970-01-01 (a Thursday); shifting by 3 days makes weeks start on Monday
+_WEEK_OFFSET_NS = 3 * 24 * _HOUR_NS
+
+
+def energy_stack_components(df: pd.DataFrame, baseload_col: str = "baseload") -> pd.DataFrame:
+    """
+    Splits every step of the dispatch output into the five stacked energy series (MWh per step).
+
+    The demand side (Direct Production + Battery Discharge + Missing Energy) always adds up
+    to the demand in baseload_col.
+    """
+    produced = df["produced_energy"].fillna(0).to_numpy(dtype=np.float64)
+    discharged = df["battery_discharged"].fillna(0).to_numpy(dtype=np.float64)
+    charged = df["battery_charged"].fillna(0).to_numpy(dtype=np.float64)
+    baseload = df[baseload_col].fillna(0).to_numpy(dtype=np.float64)
+
+    direct_to_bl = np.minimum(produced, baseload)
+    battery_to_bl = np.minimum(baseload - direct_to_bl, discharged)
+    missing_to_bl = baseload - direct_to_bl - battery_to_bl
+
+    surplus = produced - direct_to_bl
+    charged_to_battery = np.minimum(surplus, charged).clip(min=0)
+    excess_energy = (produced - direct_to_bl - charged_to_battery).clip(min=0)
+
+    return pd.DataFrame({
+        "Direct Production": direct_to_bl,
+        "Battery Discharge": battery_to_bl,
+        "Missing Energy": missing_to_bl,
+        "Charged to Battery": charged_to_battery,
+        "Excess Energy": excess_energy
+    }, index=df.index)
+
+
+def bucket_means(frame: pd.DataFrame, bucket_hours: float, offset_ns: int = 0,
+                 step_hours: float = 1.0) -> pd.DataFrame:
+    """
+    Averages a time-sorted frame with steps of step_hours over fixed-width buckets aligned to
+    midnight (plus offset_ns). Buckets no wider than a step leave the frame as it is.
+
+    Each bucket is labelled with its first timestamp; empty buckets are left out.
+    """
+    if len(frame) == 0 or bucket_hours <= step_hours:
+        return frame
+
+    # Rounded to the step first: Excel timestamps can be a few milliseconds early
+    step_ns = int(round(step_hours * _HOUR_NS))
+    timestamps = (frame.index.as_unit("ns").asi8 + step_ns // 2) // step_ns * step_ns
+    bucket = (timestamps + offset_ns) // int(round(bucket_hours * _HOUR_NS))
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket)) + 1))
+    counts = np.diff(np.append(starts, len(frame)))
+
+    values = frame.to_numpy(dtype=np.float64)
+    means = np.add.reduceat(values, starts, axis=0) / counts[:, None]
+    return pd.DataFrame(means, index=frame.index[starts], columns=frame.columns)
+
+
+def lttb_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of n_out points of an evenly spaced series that keep
+    its visual shape. Always keeps the first and last point.
+    """
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1], dtype=np.int64)
+
+    x = np.arange(n, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average point of the next bucket is the third corner of the triangle
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def downsample_energy_stack(
+    df: pd.DataFrame,
+    baseload_col: str = "baseload",
+    resolution: str = "adaptive",
+    max_points: int = DEFAULT_MAX_POINTS,
+    window: Optional[tuple] = None,
+) -> pd.DataFrame:
+    """
+    Returns the energy stack series of a dispatch frame in long format (Date, Source, Value,
+    sort_index), reduced on the server so the chart does not ship every step. Values are average
+    power in MW: the energy of each step divided by the step length, then averaged per bucket.
+
+    Args:
+        df: Dispatch output with a DatetimeIndex, hourly or finer (e.g. 15-minute steps).
+        baseload_col: Column holding the demand of each step.
+        resolution: 'hourly', 'daily' or 'weekly' means, 'adaptive' (the finest bucket from one
+            step to 30 days giving at most max_points per series) or 'lttb' (at most max_points
+            steps picked by Largest-Triangle-Three-Buckets on the stack total).
+        max_points: Point budget per series for 'adaptive' and 'lttb'.
+        window: Optional (start, end) timestamps, inclusive; only steps inside are charted, so a
+            narrower window is shown at a finer resolution.
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution '{resolution}', expected one of {RESOLUTIONS}.")
+
+    step_hours = _step_hours(df.index)
+    if window is not None:
+        start, end = pd.Timestamp(window[0]), pd.Timestamp(window[1])
+        df = df[(df.index >= start) & (df.index <= end)]
+
+    components = energy_stack_components(df, baseload_col) / step_hours
+
+    if resolution == "hourly":
+        components = bucket_means(components, 1, step_hours=step_hours)
+    elif resolution == "daily":
+        components = bucket_means(components, 24, step_hours=step_hours)
+    elif resolution == "weekly":
+        components = bucket_means(components, 168, _WEEK_OFFSET_NS, step_hours)
+    elif resolution == "adaptive" and len(components):
+        span_hours = (components.index[-1] - components.index[0]) / pd.Timedelta(hours=1) + step_hours
+        bucket_hours = next((b for b in _ADAPTIVE_BUCKETS
+                             if b >= step_hours and np.ceil(span_hours / b) <= max_points),
+                            int(np.ceil(span_hours / max_points)))
+        components = bucket_means(components, bucket_hours, _WEEK_OFFSET_NS if bucket_hours % 168 == 0 else 0,
+                                  step_hours)
+    elif resolution == "lttb":
+        total = components.to_numpy().sum(axis=1)
+        components = components.iloc[lttb_indices(total, max_points)]
+
+    data = components.copy()
+    data["Date"] = components.index
+    df_melt = data.melt(id_vars="Date", var_name="Source", value_name="Value")
+
+    df_melt["Source"] = pd.Categorical(df_melt["Source"], categories=ENERGY_STACK_SERIES, ordered=True)
+    df_melt["sort_index"] = df_melt["Source"].cat.codes
+    return df_melt
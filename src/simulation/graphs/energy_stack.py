@@ -1,56 +1,12 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import altair as alt
 
-def plot_energy_stack_st_altair(df, baseload_value):
-    df_plot = df.copy()
+from simulation.graphs.downsample import DEFAULT_MAX_POINTS, ENERGY_STACK_SERIES, downsample_energy_stack
 
-    df_plot = df_plot[["produced_energy", "battery_discharged", "battery_charged", "Consumption"]].fillna(0)
-    df_plot["baseload"] = df_plot["Consumption"]
-
-    df_plot["direct_to_bl"] = np.minimum(df_plot["produced_energy"], df_plot["baseload"])
-
-    df_plot["battery_to_bl"] = np.minimum(
-        df_plot["baseload"] - df_plot["direct_to_bl"],
-        df_plot["battery_discharged"]
-    )
-
-    df_plot["missing_to_bl"] = df_plot["baseload"] - df_plot["direct_to_bl"] - df_plot["battery_to_bl"]
-
-    surplus = df_plot["produced_energy"] - df_plot["direct_to_bl"]
-    df_plot["charged_to_battery"] = np.minimum(surplus, df_plot["battery_charged"]).clip(lower=0)
-
-    df_plot["excess_energy"] = (df_plot["produced_energy"]
-                                - df_plot["direct_to_bl"]
-                                - df_plot["charged_to_battery"]).clip(lower=0)
-
-    df_plot_for_chart = pd.DataFrame({
-        "Direct Production": df_plot["direct_to_bl"],
-        "Battery Discharge": df_plot["battery_to_bl"],
-        "Missing Energy": df_plot["missing_to_bl"],
-        "Charged to Battery": df_plot["charged_to_battery"],
-        "Excess Energy": df_plot["excess_energy"]
-    })
-
-    df_plot_for_chart.columns = [
-        "Direct Production",
-        "Battery Discharge",
-        "Missing Energy",
-        "Charged to Battery",
-        "Excess Energy"
-    ]
-    df_plot_for_chart["Date"] = df_plot.index
-
-    df_melt = df_plot_for_chart.melt(id_vars="Date", var_name="Source", value_name="Value")
-
-    category_order = [
-        "Direct Production",
-        "Battery Discharge",
-        "Missing Energy",
-        "Charged to Battery",
-        "Excess Energy"
-    ]
+def energy_stack_chart(df_melt: pd.DataFrame) -> alt.Chart:
+    """Stacked energy supply chart of downsample_energy_stack() output."""
+    category_order = ENERGY_STACK_SERIES
 
     color_mapping = {
         "Direct Production": "#1f77b4",  # Blue
@@ -60,11 +16,8 @@ def plot_energy_stack_st_altair(df, baseload_value):
         "Excess Energy": "#9467bd"  # Purple
     }
 
-    df_melt["Source"] = pd.Categorical(df_melt["Source"], categories=category_order, ordered=True)
-
-    df_melt["sort_index"] = df_melt["Source"].cat.codes
-
-    chart = alt.Chart(df_melt).mark_bar(size=1).encode(
+    # Step areas look like adjacent bars and stay correct whatever the bucket width
+    chart = alt.Chart(df_melt).mark_area(interpolate="step-after").encode(
         x=alt.X("Date:T", title="Date"),
         y=alt.Y("Value:Q", stack="zero", title="Average Power (MW)"),
         color=alt.Color("Source:N",
@@ -77,6 +30,15 @@ def plot_energy_stack_st_altair(df, baseload_value):
         height=400
     ).interactive()
 
+    return chart
+
+
+def plot_energy_stack_st_altair(df, baseload_value, resolution: str = "adaptive",
+                                max_points: int = DEFAULT_MAX_POINTS, window=None):
+    df_melt = downsample_energy_stack(df, baseload_col="Consumption", resolution=resolution,
+                                      max_points=max_points, window=window)
+    chart = energy_stack_chart(df_melt)
+
     # Legend
     st.markdown("**Daily Energy Supply vs Baseload**")
 
@@ -105,4 +67,4 @@ def plot_energy_stack_st_altair(df, baseload_value):
     </div>
     """, unsafe_allow_html=True)
 
-    return chart
\ No newline at end of file
+    return chart
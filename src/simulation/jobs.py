@@ -0,0 +1,188 @@
+"""
+Batch runs on background threads, independent of the caller (e.g. a Streamlit script rerun).
+
+A BatchJob consumes a batch iterator (iter_batch, iter_country_batch) on its own thread and
+keeps every finished row's results, so the caller can poll its progress and throughput, read
+the partial results or cancel it at any time. A JobManager holds the jobs of a process until
+their results are collected:
+
+    jobs = JobManager()
+    job = jobs.submit("EE, Baseload", lambda: iter_batch(rows, PROFILES_EE, True, workers=4), len(rows))
+    job.progress, job.rows_per_sec, job.results_frame()
+    job.cancel()
+    jobs.collect(job.job_id)  # once it has ended
+"""
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+JOB_STATUSES = ("queued", "running", "done", "cancelled", "failed")
+
+
+class BatchJob:
+    """
+    One batch run on a background thread.
+
+    Attributes:
+        job_id: Identifier given by the JobManager.
+        label: Description shown with the job.
+        total_rows: Number of input rows (results are counted per row, not per year).
+        status: One of JOB_STATUSES.
+        error: The exception message if the job failed.
+        started, finished: time.time() of start and end, None until then.
+    """
+
+    def __init__(self, job_id: str, label: str, make_batch: Callable[[], Iterator[List[Dict]]], total_rows: int):
+        self.job_id = job_id
+        self.label = label
+        self.total_rows = total_rows
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._make_batch = make_batch
+        self._results: List[Dict] = []
+        self._rows_done = 0
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"batch-job-{job_id}", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """Stops the job after the row in progress; rows already finished are kept."""
+        self._cancel.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the job has ended or timeout seconds passed; True if it ended."""
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    @property
+    def rows_done(self) -> int:
+        return self._rows_done
+
+    @property
+    def progress(self) -> float:
+        """Share of rows done, 0..1."""
+        return self._rows_done / self.total_rows if self.total_rows else 1.0
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    @property
+    def rows_per_sec(self) -> float:
+        elapsed = self.elapsed
+        return self._rows_done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def seconds_left(self) -> Optional[float]:
+        """Estimated time to finish at the throughput so far, None before the first row."""
+        rate = self.rows_per_sec
+        if not self.is_active or rate <= 0:
+            return None
+        return (self.total_rows - self._rows_done) / rate
+
+    def results(self) -> List[Dict]:
+        """Copy of the results of the rows finished so far, in row order."""
+        with self._lock:
+            return list(self._results)
+
+    def results_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.results())
+
+    def _run(self) -> None:
+        self.started = time.time()
+        self.status = "running"
+        batch = None
+        status, error = "done", None
+        try:
+            batch = self._make_batch()
+            for results in batch:
+                with self._lock:
+                    self._results.extend(results)
+                    self._rows_done += 1
+                if self._cancel.is_set():
+                    status = "cancelled"
+                    break
+        except Exception as e:
+            status, error = "failed", f"{type(e).__name__}: {e}"
+
+        try:
+            if batch is not None and hasattr(batch, "close"):
+                # Stops the batch's worker pool, dropping rows not started yet
+                batch.close()
+        except Exception as e:
+            if status != "failed":
+                status, error = "failed", f"{type(e).__name__}: {e}"
+
+        # The job ends only now: is_active stays True until the worker pool is shut down
+        self.finished = time.time()
+        self.error = error
+        self.status = status
+
+
+class JobManager:
+    """
+    The batch jobs of one process, newest last, shared by every caller (e.g. all app sessions).
+
+    A finished job is kept until its results are taken with collect(), so jobs of one caller
+    never push out those of another. Finished jobs nobody collects are dropped max_age
+    seconds after they ended; running jobs are always kept.
+    """
+
+    def __init__(self, max_age: float = 24 * 3600):
+        self.max_age = max_age
+        self._jobs: "OrderedDict[str, BatchJob]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, label: str, make_batch: Callable[[], Iterator[List[Dict]]], total_rows: int) -> BatchJob:
+        """
+        Starts make_batch() on a new thread. make_batch is called on that thread, so reading
+        profiles and starting worker processes do not hold up the caller either.
+        """
+        with self._lock:
+            self._prune()
+            job = BatchJob(str(next(self._ids)), label, make_batch, total_rows)
+            self._jobs[job.job_id] = job
+        job.start()
+        return job
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def collect(self, job_id: str) -> Optional[BatchJob]:
+        """
+        Removes an ended job and returns it, with its results, to the one caller that collects
+        it. Returns None if the job is unknown, already collected or still active.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.is_active:
+                return None
+            return self._jobs.pop(job_id)
+
+    def jobs(self) -> List[BatchJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _prune(self) -> None:
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if not job.is_active and now - job.finished > self.max_age]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -1,6 +1,8 @@
 from typing import Dict
 import pandas as pd
 
+from utils.instrumentation import instrumented
+
 def init_metrics(wind_price, solar_price, battery_1h_price, battery_2h_price, battery_4h_price, battery_6h_price, battery_8h_price, battery_12h_price, missing_energy_price) -> Dict[str, float]:
     metrics = {
         "produced_total": 0.0,
@@ -29,6 +31,7 @@ def init_metrics(wind_price, solar_price, battery_1h_price, battery_2h_price, ba
     }
     return metrics
 
+@instrumented()
 def compile_result(
     year: int,
     wind_cap: float,
@@ -0,0 +1,272 @@
+"""
+Monte Carlo weather/price scenarios.
+
+Synthetic years are block-bootstrapped from the profile history: the year is cut into blocks
+of block_days days and every block is copied, with wind, solar, spot and cnp together, from a
+random history year and a start day near the block's own place in the calendar, so seasons and
+the joint behaviour of weather, prices and consumption are kept within each block.
+
+All paths of a chunk are dispatched together through the configuration-axis engine of
+simulation.sweep, with one column per path, and each path gets the full simulate_dispatch
+result; summarize_paths turns those into percentiles of every KPI.
+
+    paths = monte_carlo_dispatch("data/profiles.xlsx", 1000, True, wind_cap=100, solar_cap=50,
+                                 baseload=40, wind_price=55, ...)
+    summarize_paths(paths)["P90"]
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from models.profile_bundle import ProfileBundle
+from simulation.sweep import BATTERY_DURATIONS, _dispatch_year, _FleetState, _year_results
+from simulation.simulate_year import steps_to_hours
+from utils.instrumentation import instrumented, stage
+from utils.process_pool import POOL_CONTEXT
+from utils.profiles import load_profile_bundle
+
+DAYS_PER_YEAR = 365
+SERIES = ("wind_profile", "solar_profile", "spot", "cnp")
+
+# History of the current worker process, attached once by _init_worker
+_worker_history: Optional["ProfileHistory"] = None
+
+
+class ProfileHistory:
+    """
+    The complete years of a profile as a (years, 365, steps per day) array per series.
+
+    Every year is put on a regular step grid (a missing DST hour takes the nearest step,
+    29 February is dropped) so the days of all years line up. Years that do not cover the
+    whole grid, or that have missing wind, solar or cnp values, are left out; missing spot
+    prices are kept and skipped by the VWAPs as in simulate_dispatch.
+
+    Attributes:
+        years: History years used.
+        step_hours: Length of one step in hours.
+        steps_per_day: Steps in one day.
+        series: Series name -> array of shape (years, 365, steps_per_day).
+    """
+
+    def __init__(self, profiles: ProfileBundle):
+        step_minutes = int(round(profiles.step_hours * 60))
+        if (24 * 60) % step_minutes:
+            raise ValueError(f"Steps of {step_minutes} min do not divide a day.")
+        self.step_hours = profiles.step_hours
+        self.steps_per_day = 24 * 60 // step_minutes
+        step = pd.Timedelta(minutes=step_minutes)
+
+        # Position of every profile step, de-duplicated where a DST change repeats an hour
+        positions = pd.Series(np.arange(len(profiles)), index=profiles.index.round(step))
+        positions = positions[~positions.index.duplicated()]
+
+        self.years: List[int] = []
+        rows = []
+        for year in profiles.years:
+            grid = pd.date_range(f"{year}-01-01", f"{year + 1}-01-01", freq=step, inclusive="left")
+            grid = grid[~((grid.month == 2) & (grid.day == 29))]
+            taken = positions.reindex(grid, method="nearest", tolerance=step).to_numpy()
+            if np.isnan(taken).any():
+                continue
+            taken = taken.astype(np.int64)
+            if any(np.isnan(getattr(profiles, name)[taken]).any() for name in ("wind_profile", "solar_profile", "cnp")):
+                continue
+            self.years.append(year)
+            rows.append(taken)
+
+        if not rows:
+            raise ValueError("The profile has no complete year to sample from.")
+        taken = np.stack(rows).reshape(len(rows), DAYS_PER_YEAR, self.steps_per_day)
+        self.series: Dict[str, np.ndarray] = {name: getattr(profiles, name)[taken] for name in SERIES}
+
+    def sample_days(self, n_paths: int, block_days: int = 7, window_days: int = 15,
+                    seed: int = 0, first_path: int = 0) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Draws the source (year row, day) of every day of paths first_path..first_path+n_paths-1.
+
+        Each path has its own random stream spawned from seed, so a path is the same whatever
+        chunk or worker it is drawn in.
+
+        Returns:
+            Two arrays of shape (n_paths, 365): history year row and day of year (0-based).
+        """
+        if block_days < 1:
+            raise ValueError("block_days must be at least 1.")
+        block_starts = np.arange(0, DAYS_PER_YEAR, block_days)
+        offsets = np.arange(block_days)
+
+        streams = np.random.SeedSequence(seed).spawn(first_path + n_paths)[first_path:]
+        year_rows = np.empty((n_paths, DAYS_PER_YEAR), dtype=np.int64)
+        days = np.empty((n_paths, DAYS_PER_YEAR), dtype=np.int64)
+        for p, stream in enumerate(streams):
+            rng = np.random.default_rng(stream)
+            block_years = rng.integers(0, len(self.years), len(block_starts))
+            jitter = rng.integers(-window_days, window_days + 1, len(block_starts))
+            sources = np.clip(block_starts + jitter, 0, DAYS_PER_YEAR - block_days)
+            year_rows[p] = np.repeat(block_years, block_days)[:DAYS_PER_YEAR]
+            days[p] = (sources[:, None] + offsets).ravel()[:DAYS_PER_YEAR]
+        return year_rows, days
+
+    def paths(self, year_rows: np.ndarray, days: np.ndarray) -> Dict[str, np.ndarray]:
+        """Series name -> array of shape (steps, n_paths), one synthetic year per column."""
+        return {name: np.ascontiguousarray(values[year_rows, days].reshape(len(year_rows), -1).T)
+                for name, values in self.series.items()}
+
+    def path_bundle(self, year_rows: np.ndarray, days: np.ndarray, path: int, year: int = 2001) -> ProfileBundle:
+        """One path as a ProfileBundle over a 365-day year, for simulate_dispatch or plotting."""
+        if pd.Timestamp(year=year, month=1, day=1).is_leap_year:
+            raise ValueError("Paths have 365 days; use a year that is not a leap year.")
+        index = pd.date_range(f"{year}-01-01", periods=DAYS_PER_YEAR * self.steps_per_day,
+                              freq=pd.Timedelta(hours=self.step_hours))
+        series = self.paths(year_rows[path:path + 1], days[path:path + 1])
+        return ProfileBundle(index, *(series[name][:, 0] for name in SERIES))
+
+
+def _run_chunk(history: ProfileHistory, first_path: int, n_paths: int, config: Dict, prices: Dict[str, float],
+               is_baseload_mode: bool, bess_rte: float, block_days: int, window_days: int, seed: int) -> List[Dict]:
+    with stage("monte_carlo/sample"):
+        year_rows, days = history.sample_days(n_paths, block_days, window_days, seed, first_path)
+        series = history.paths(year_rows, days)
+
+    wind_caps = np.full(n_paths, float(config["wind_cap"]))
+    solar_caps = np.full(n_paths, float(config["solar_cap"]))
+    baseloads = np.full(n_paths, float(config["baseload"]))
+    battery_mw = np.tile([float(config[f"battery_{d}h_mw"]) for d in BATTERY_DURATIONS], (n_paths, 1))
+    steps = series["cnp"].shape[0]
+    step_hours = history.step_hours
+
+    cnp = series["cnp"]
+    # Column by column, so each mean is summed exactly like simulate_dispatch's one-year mean
+    demand_scale = np.ones(steps) if is_baseload_mode else cnp / np.array([cnp[:, p].mean() for p in range(n_paths)])
+    day_of_step = np.repeat(np.arange(DAYS_PER_YEAR), history.steps_per_day)
+
+    state = _FleetState(battery_mw, bess_rte, step_hours)
+    with stage("monte_carlo/dispatch"):
+        acc = _dispatch_year(state, wind_caps, solar_caps, demand_scale, baseloads, series["wind_profile"],
+                             series["solar_profile"], series["spot"], day_of_step, step_hours)
+
+    # Per path like sweep_dispatch's per configuration totals
+    wind_totals = np.array([(wind_caps[p] * series["wind_profile"][:, p]).sum() for p in range(n_paths)])
+    solar_totals = np.array([(solar_caps[p] * series["solar_profile"][:, p]).sum() for p in range(n_paths)])
+    wind_totals *= step_hours
+    solar_totals *= step_hours
+    avg_spot = np.array([np.nanmean(series["spot"][:, p]) for p in range(n_paths)])
+    total_hours = steps_to_hours(steps, step_hours)
+
+    rows = _year_results(state, acc, 0, wind_caps, solar_caps, baseloads, battery_mw, wind_totals,
+                         solar_totals, avg_spot, total_hours, step_hours, prices)
+    for p, row in enumerate(rows):
+        del row["year"]
+        row["Simulation id"] = first_path + p + 1
+        row["Path"] = first_path + p + 1
+    return rows
+
+
+def _init_worker(history: ProfileHistory) -> None:
+    global _worker_history
+    _worker_history = history
+
+
+def _run_in_worker(task: tuple) -> List[Dict]:
+    return _run_chunk(_worker_history, *task)
+
+
+@instrumented()
+def monte_carlo_dispatch(
+    profile_file,
+    n_paths: int,
+    is_baseload_mode: bool,
+    wind_cap: float,
+    solar_cap: float,
+    baseload: float,
+    wind_price: float,
+    solar_price: float,
+    battery_1h_price: float,
+    battery_2h_price: float,
+    battery_4h_price: float,
+    battery_6h_price: float,
+    battery_8h_price: float,
+    battery_12h_price: float,
+    missing_energy_price: float,
+    battery_1h_mw: float = 0,
+    battery_2h_mw: float = 0,
+    battery_4h_mw: float = 0,
+    battery_6h_mw: float = 0,
+    battery_8h_mw: float = 0,
+    battery_12h_mw: float = 0,
+    bess_rte: float = 0.86,
+    block_days: int = 7,
+    window_days: int = 15,
+    seed: int = 0,
+    chunk_size: int = 250,
+    workers: int = 1,
+) -> pd.DataFrame:
+    """
+    Runs one configuration over n_paths synthetic years block-bootstrapped from the profile history.
+
+    Every path starts with empty storages and is a 365-day year; its results are what
+    simulate_dispatch gives for that year alone (see ProfileHistory.path_bundle). Paths are
+    dispatched chunk_size at a time, one column per path, optionally spread over worker
+    processes; the paths drawn depend only on seed, not on chunk_size or workers.
+
+    Args:
+        profile_file: Profile file path or ProfileBundle with the history to sample.
+        n_paths: Number of synthetic years.
+        block_days: Length of the bootstrapped blocks in days.
+        window_days: How far (in days) a block's source may lie from its place in the calendar.
+        seed: Seed of the random draws.
+        chunk_size: Paths dispatched together; memory grows with it.
+        workers: Number of worker processes; 1 runs in the current process.
+        Remaining arguments: as in simulate_dispatch.
+
+    Returns:
+        One row per path with the simulate_dispatch result columns (without 'year') and 'Path'.
+    """
+    if n_paths < 1:
+        raise ValueError("n_paths must be at least 1.")
+    with stage("monte_carlo/history"):
+        history = ProfileHistory(load_profile_bundle(profile_file))
+
+    config = dict(wind_cap=wind_cap, solar_cap=solar_cap, baseload=baseload, battery_1h_mw=battery_1h_mw,
+                  battery_2h_mw=battery_2h_mw, battery_4h_mw=battery_4h_mw, battery_6h_mw=battery_6h_mw,
+                  battery_8h_mw=battery_8h_mw, battery_12h_mw=battery_12h_mw)
+    prices = dict(wind_price=wind_price, solar_price=solar_price, battery_1h_price=battery_1h_price,
+                  battery_2h_price=battery_2h_price, battery_4h_price=battery_4h_price,
+                  battery_6h_price=battery_6h_price, battery_8h_price=battery_8h_price,
+                  battery_12h_price=battery_12h_price, missing_energy_price=missing_energy_price)
+
+    chunk_size = max(1, int(chunk_size))
+    tasks = [(first, min(chunk_size, n_paths - first), config, prices, is_baseload_mode, bess_rte,
+              block_days, window_days, seed) for first in range(0, n_paths, chunk_size)]
+
+    workers = max(1, min(int(workers), len(tasks)))
+    rows = []
+    if workers == 1:
+        for task in tasks:
+            rows.extend(_run_chunk(history, *task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=POOL_CONTEXT, initializer=_init_worker,
+                                 initargs=(history,)) as pool:
+            for chunk_rows in pool.map(_run_in_worker, tasks):
+                rows.extend(chunk_rows)
+    return pd.DataFrame(rows)
+
+
+def summarize_paths(paths: pd.DataFrame, percentiles: Sequence[float] = (10, 50, 90)) -> pd.DataFrame:
+    """
+    Distribution of every numeric KPI over the paths of monte_carlo_dispatch.
+
+    Columns 'P10', 'P50', ... are plain percentiles: P90 is the value 90% of the paths stay
+    at or below. A KPI such as a break-even price at exceedance probability 90% is its P10.
+
+    Returns:
+        One row per KPI with mean, std, min, the percentile columns and max.
+    """
+    numeric = paths.drop(columns=["Simulation id", "Path"], errors="ignore").select_dtypes("number")
+    summary = pd.DataFrame({"mean": numeric.mean(), "std": numeric.std(), "min": numeric.min()})
+    for q in percentiles:
+        summary[f"P{q:g}"] = numeric.quantile(q / 100)
+    summary["max"] = numeric.max()
+    return summary
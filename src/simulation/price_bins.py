@@ -0,0 +1,124 @@
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+PRICE_BIN_VALUES = ("missing_energy", "excess_energy")
+
+
+class PriceBinHistogram:
+    """
+    Per-year histograms of hourly values (missing and excess energy) over spot price bins.
+
+    Hours are accumulated with np.bincount into bins of base_step EUR/MWh, keeping the sum of
+    every value and the hour count per (year, bin). Because sums and counts add up, summary()
+    can re-bin to any whole multiple of base_step without the hourly data.
+    """
+
+    def __init__(self, base_step: float = 1.0, values: Iterable[str] = PRICE_BIN_VALUES):
+        if base_step <= 0:
+            raise ValueError("base_step must be positive.")
+        self.base_step = base_step
+        self.values = list(values)
+        # year -> (lowest bin index, counts, {value: sums}), arrays indexed from the lowest bin
+        self._years: Dict[int, tuple] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, price_col: str = "Spot", base_step: float = 1.0) -> "PriceBinHistogram":
+        """Accumulates an hourly dispatch frame with a DatetimeIndex, one year at a time, without copying it."""
+        if not isinstance(df.index, pd.DatetimeIndex):
+            raise ValueError("DataFrame index must be a DatetimeIndex.")
+
+        histogram = cls(base_step)
+        year_of_hour = df.index.year.to_numpy()
+        boundaries = np.flatnonzero(np.diff(year_of_hour)) + 1
+        starts = np.concatenate(([0], boundaries)) if len(df) else []
+        ends = np.concatenate((boundaries, [len(df)])) if len(df) else []
+
+        spot = df[price_col].to_numpy(dtype=np.float64)
+        columns = {name: df[name].to_numpy(dtype=np.float64) for name in histogram.values}
+        for start, end in zip(starts, ends):
+            histogram.add(int(year_of_hour[start]), spot[start:end],
+                          **{name: values[start:end] for name, values in columns.items()})
+        return histogram
+
+    @property
+    def years(self):
+        return sorted(self._years)
+
+    def add(self, year: int, spot: np.ndarray, **values: np.ndarray) -> None:
+        """Adds hours of one year: their spot prices and one array per name in self.values."""
+        spot = np.asarray(spot, dtype=np.float64)
+        priced = np.isfinite(spot)
+        if not priced.all():
+            spot = spot[priced]
+        if len(spot) == 0:
+            return
+
+        bins = np.floor(spot / self.base_step).astype(np.int64)
+        lo, hi = int(bins.min()), int(bins.max())
+
+        if year in self._years:
+            old_lo, counts, sums = self._years[year]
+            new_lo = min(lo, old_lo)
+            size = max(hi, old_lo + len(counts) - 1) - new_lo + 1
+            shift = old_lo - new_lo
+            counts = _pad(counts, shift, size)
+            sums = {name: _pad(s, shift, size) for name, s in sums.items()}
+        else:
+            new_lo = lo
+            size = hi - lo + 1
+            counts = np.zeros(size, dtype=np.int64)
+            sums = {name: np.zeros(size) for name in self.values}
+
+        index = bins - new_lo
+        counts += np.bincount(index, minlength=size)
+        for name in self.values:
+            hour_values = np.asarray(values[name], dtype=np.float64)
+            if not priced.all():
+                hour_values = hour_values[priced]
+            sums[name] += np.bincount(index, weights=hour_values, minlength=size)
+
+        self._years[year] = (new_lo, counts, sums)
+
+    def summary(self, step: float = 5) -> pd.DataFrame:
+        """
+        Returns one row per (year, price_bin) that has hours: the hour count, the sum of every value
+        ('<value>_sum') and its mean per hour ('<value>'). price_bin is the lower bin edge.
+        """
+        factor = step / self.base_step
+        if factor < 1 or abs(factor - round(factor)) > 1e-9:
+            raise ValueError(f"step must be a whole multiple of the base step {self.base_step}.")
+        factor = int(round(factor))
+
+        frames = []
+        for year in self.years:
+            lo, counts, sums = self._years[year]
+            # Base bins lo, lo+1, ... grouped into coarse bins floor(bin / factor)
+            coarse = (np.arange(lo, lo + len(counts)) // factor)
+            coarse_index = coarse - coarse[0]
+            size = int(coarse_index[-1]) + 1
+
+            coarse_counts = np.bincount(coarse_index, weights=counts, minlength=size)
+            has_hours = coarse_counts > 0
+            frame = {
+                "year": year,
+                "price_bin": (np.arange(coarse[0], coarse[0] + size) * step)[has_hours].astype(np.float64),
+                "hours": coarse_counts[has_hours].astype(np.int64),
+            }
+            for name in self.values:
+                coarse_sums = np.bincount(coarse_index, weights=sums[name], minlength=size)[has_hours]
+                frame[f"{name}_sum"] = coarse_sums
+                frame[name] = coarse_sums / frame["hours"]
+            frames.append(pd.DataFrame(frame))
+
+        if not frames:
+            return pd.DataFrame(columns=["year", "price_bin", "hours"]
+                                + [c for name in self.values for c in (f"{name}_sum", name)])
+        return pd.concat(frames, ignore_index=True)
+
+
+def _pad(values: np.ndarray, shift: int, size: int) -> np.ndarray:
+    padded = np.zeros(size, dtype=values.dtype)
+    padded[shift:shift + len(values)] = values
+    return padded
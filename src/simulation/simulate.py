@@ -1,55 +1,6 @@
 import pandas as pd
 from openpyxl import load_workbook
-from typing import List
-from models.resource import Wind, PV
-from simulation.simulate_dispatch import simulate_dispatch
-from utils.profiles import get_profiles
 
-def run_all_scenarios(
-    profiles: pd.DataFrame,
-    wind_profile: pd.Series,
-    solar_profile: pd.Series,
-    baseload,
-    output_path: str = "/Users/kevineriksson/PycharmProjects/Simulation/data/Simulator output.xlsx"
-) -> None:
-    """
-    Run dispatch simulation for specified baseload and write the results to an Excel sheet.
-
-    Args:
-        wind_profile: Hourly wind profile (normalized or actual).
-        solar_profile: Hourly solar profile (normalized or actual).
-    """
-    print(f"\nRunning simulation for {baseload} MW baseload...")
-
-    wind_prod, solar_prod = get_profiles(44, 183, profiles)
-    results, hourly_df = simulate_dispatch(
-        profile_file=profiles,
-        wind_prod = wind_prod,
-        solar_prod = solar_prod,
-        baseload = baseload,
-        is_baseload_mode = False,
-        wind_cap = 44,
-        solar_cap = 183,
-        wind_price = 50,
-        solar_price = 60,
-        battery_1h_price = 0,
-        battery_2h_price = 0,
-        battery_4h_price = 3200000,
-        battery_6h_price = 0,
-        battery_8h_price = 0,
-        battery_12h_price = 0,
-        missing_energy_price = 300,
-        battery_1h_mw = 0,
-        battery_2h_mw = 0,
-        battery_4h_mw = 150,
-        battery_6h_mw = 0,
-        battery_8h_mw = 0,
-        battery_12h_mw= 0,
-        bess_rte = 0.86
-    )
-    print(list(results.columns))
-    df = pd.DataFrame(results)
-    append_to_excel(df, output_path)
 
 def append_to_excel(
     df: pd.DataFrame,
@@ -60,6 +11,9 @@ def append_to_excel(
     """
     Append a DataFrame to the first empty row of an Excel sheet starting from a specified position.
 
+    Rows are written with whole-row appends, so the first empty row has to be below the
+    last used row of the sheet.
+
     Args:
         df: DataFrame to append.
         excel_path: Path to the Excel workbook.
@@ -69,12 +23,24 @@ def append_to_excel(
     wb = load_workbook(excel_path)
     ws = wb.active
 
+    # Scan the start column for the first empty row; iter_rows stops at the last used row
     row = start_row
-    while ws.cell(row=row, column=start_col).value is not None:
+    for (value,) in ws.iter_rows(min_row=start_row, min_col=start_col, max_col=start_col, values_only=True):
+        if value is None:
+            break
         row += 1
 
-    for r_idx, record in enumerate(df.itertuples(index=False), start=row):
-        for c_idx, value in enumerate(record, start=start_col):
-            ws.cell(row=r_idx, column=c_idx, value=value)
+    if row <= ws.max_row:
+        raise ValueError(f"Row {row} of '{excel_path}' is empty in column {start_col} but rows below it are "
+                         f"not; rows can only be appended after row {ws.max_row}.")
+
+    # Appends follow the last cell and an empty sheet has none, although max_row is 1: anchor it at A1
+    ws.cell(row=1, column=1)
+    # Blank rows move the append position down to the first empty row
+    for _ in range(ws.max_row + 1, row):
+        ws.append([])
+    padding = [None] * (start_col - 1)
+    for record in df.itertuples(index=False):
+        ws.append(padding + list(record))
 
-    wb.save(excel_path)
\ No newline at end of file
+    wb.save(excel_path)
@@ -1,16 +1,344 @@
-from typing import Any
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Union
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
 
+from config import CHECKPOINT_DIR
+from models.hourly_series import HourlySeries
+from models.profile_bundle import ProfileBundle
+from models.storage_fleet import StorageFleet
 from simulation.metrics import init_metrics
-from simulation.simulate_year import simulate_year_dispatch
-from simulation.storage_factory import create_storages
+from simulation.simulate_year import simulate_year_dispatch, steps_to_hours
+from simulation.storage_factory import create_storage_fleet
+from utils.profiles import load_profile_bundle
+from utils.instrumentation import instrumented, stage
+from utils.process_pool import POOL_CONTEXT
+from utils.result_cache import ResultCache, default_result_cache, make_key
 from utils.calculations import calculate_break_even_price_1, calculate_break_even_price_2, \
     calculate_bl_price_1, calculate_bl_price_2, calculate_overproduction_share, calculate_break_even_price_3
 
+STORAGE_NAMES = ["BESS 1h", "BESS 2h", "BESS 4h", "BESS 6h", "BESS 8h", "BESS 12h"]
 
-def simulate_dispatch(
+
+def apply_price_metrics(
+    result: Dict,
+    wind_total: float,
+    solar_total: float,
+    total_hours: int,
+    baseload: float,
+    wind_price: float,
+    solar_price: float,
+    total_storage_cost: float,
+    missing_energy_price: float,
+    avg_spot: float,
+) -> None:
+    """Fills the demand price, break-even and overproduction fields of a compile_result dict."""
+    excess_energy = result["Excess wind, MWh"] + result["Excess solar, MWh"]
+    #redundant_energy = result["Redundant wind, MWh"] + result["Redundant solar, MWh"]
+    bl_price_1 = calculate_bl_price_1(result["Wind in demand, MWh"], wind_price, result["Solar in demand, MWh"],
+                                      solar_price, total_storage_cost, result["Missing energy, MWh"],
+                                      missing_energy_price, baseload * total_hours)
+    bl_price_2 = calculate_bl_price_2(result["Wind in demand, MWh"], wind_price, result["Solar in demand, MWh"],
+                                      solar_price, total_storage_cost, result["Missing energy, MWh"],
+                                      result["Missing energy VWAP, EUR/MWh"], baseload * total_hours)
+
+    brake_even_1 = calculate_break_even_price_1(
+            wind_total, wind_price,
+            solar_total, solar_price,
+            total_storage_cost, excess_energy,
+            result["Excess energy VWAP, EUR/MWh"],
+            result["Missing energy, MWh"], missing_energy_price,
+            baseload * total_hours
+        )
+
+    brake_even_2 = calculate_break_even_price_2(
+        wind_total, wind_price,
+        solar_total, solar_price,
+        total_storage_cost, excess_energy,
+        result["Excess energy VWAP, EUR/MWh"],
+        result["Missing energy, MWh"],
+        result["Missing energy VWAP, EUR/MWh"],
+        baseload * total_hours
+    )
+
+    brake_even_3 = calculate_break_even_price_3(
+        wind_total, wind_price,
+        solar_total, solar_price,
+        total_storage_cost, excess_energy,
+        result["Missing energy, MWh"], missing_energy_price,
+        baseload * total_hours
+    )
+
+    result["Demand 1 - Fixed Missing EUR/MWh"] = round(bl_price_1)
+    result["Demand 2 - VWAP Missing EUR/MWh"] = round(bl_price_2)
+    result["Break-even 1 - Fixed Missing, EUR/MWh"] = round(brake_even_1)
+    result["Break-even 2 - VWAP Missing, EUR/MWh"] = round(brake_even_2)
+    result["Break-even 3 - Excess En. Price Fixed 0, EUR/MWh"] = round(brake_even_3)
+    result["Annual avg spot, EUR/MWh"] = round(avg_spot)
+    result["Overproduction share, %"] = round(calculate_overproduction_share(excess_energy, wind_total, solar_total))
+
+
+def apply_storage_metrics(
+    result: Dict,
+    storage_name: str,
+    max_charge: float,
+    yearly_cycles: float,
+    zero_hours: float,
+    total_hours: int,
+) -> None:
+    """
+    Fills the avg cycles and zero hours ratio fields of one BESS in a compile_result dict.
+    zero_hours and total_hours are in hours whatever the step length.
+    """
+    hours_per_day = 24
+
+    # If this BESS wasn't instantiated (or has no power), report as unused: 0 cycles, 100% zero-hours
+    if max_charge <= 0:
+        result[f"{storage_name} avg cycles"] = 0.0
+        result[f"{storage_name} zero hours ratio, %"] = 100.0
+        return
+
+    # Determine if it actually did any work this year
+    if yearly_cycles <= 0:
+        # existed but never used
+        result[f"{storage_name} avg cycles"] = 0.0
+        result[f"{storage_name} zero hours ratio, %"] = 100.0
+    else:
+        avg_daily_cycles = yearly_cycles / (total_hours / hours_per_day)
+        zero_hours_ratio = (zero_hours / total_hours) * 100
+        result[f"{storage_name} avg cycles"] = round(float(avg_daily_cycles), 2)
+        result[f"{storage_name} zero hours ratio, %"] = round(float(zero_hours_ratio))
+
+
+class PhysicalDispatch:
+    """
+    Price-independent outcome of a dispatch run.
+
+    Attributes:
+        years: Per year, the compile_result dict without contract prices ('result') plus the
+            totals the pricing formulas need: wind_total, solar_total, total_hours, baseload, avg_spot.
+        hourly: Hourly series of all years as collected (see COLLECT_HOURLY_MODES): a DataFrame,
+            an HourlySeries or None.
+    """
+
+    def __init__(self, years: list[Dict], hourly: Union[DataFrame, HourlySeries, None]):
+        self.years = years
+        self.hourly = hourly
+
+
+def _copy_hourly(hourly: Union[DataFrame, HourlySeries, None]) -> Union[DataFrame, HourlySeries, None]:
+    if isinstance(hourly, DataFrame):
+        return hourly.copy()
+    if isinstance(hourly, HourlySeries):
+        return HourlySeries(hourly.index, {name: values.copy() for name, values in hourly.columns.items()})
+    return None
+
+
+_physical_cache: "OrderedDict[str, PhysicalDispatch]" = OrderedDict()
+PHYSICAL_CACHE_SIZE = 16
+
+
+def clear_physical_cache() -> None:
+    _physical_cache.clear()
+
+
+def _prepare_inputs(profile_file, wind_prod, solar_prod) -> tuple[ProfileBundle, np.ndarray, np.ndarray]:
+    # profile_file may be a path or an already loaded ProfileBundle
+    profiles = load_profile_bundle(profile_file)
+    wind_prod = np.asarray(wind_prod, dtype=np.float64)
+    solar_prod = np.asarray(solar_prod, dtype=np.float64)
+    if len(wind_prod) != len(profiles) or len(solar_prod) != len(profiles):
+        raise ValueError("wind_prod and solar_prod must be aligned with the profile hours.")
+    return profiles, wind_prod, solar_prod
+
+
+# Opt-in ways of running the years of dispatch_physical on separate processes:
+# "initial" every year starts from empty storages; "two_pass" gives the sequential result (see _dispatch_years_parallel)
+PARALLEL_YEAR_MODES = ("initial", "two_pass")
+
+# Snapshot fields that decide how the next year dispatches (total_charged_* are cumulative statistics only)
+_CARRIED_STATE = ("soc", "wind_soc", "solar_soc", "daily_discharged_energy", "last_updated_day")
+
+# Profiles of a year-worker process by source path, loaded on first use
+_worker_profiles: Dict[str, ProfileBundle] = {}
+
+# End-of-year checkpoints of sequential runs that opt in, see _dispatch_years_checkpointed
+default_checkpoint_cache = ResultCache(memory_size=64, cache_dir=CHECKPOINT_DIR)
+
+
+def dispatch_year(
+    profiles: ProfileBundle,
+    year: int,
+    wind_prod_year: np.ndarray,
+    solar_prod_year: np.ndarray,
+    storages: StorageFleet,
+    baseload: float,
+    is_baseload_mode: bool,
+    wind_cap: float,
+    solar_cap: float,
+    battery_config: Dict[int, float],
+    collect_hourly: str = "full",
+) -> tuple[Dict, Union[DataFrame, HourlySeries, None]]:
+    """
+    Dispatches one year on storages, which carry the state in from the previous year and out to
+    the next. Returns the PhysicalDispatch year entry and the hourly series.
+    """
+    span = profiles.year_slice(year)
+
+    # Prices are filled in by price_dispatch
+    metrics = init_metrics(0, 0, 0, 0, 0, 0, 0, 0, 0)
+
+    result, hourly = simulate_year_dispatch(metrics, year, wind_prod_year, solar_prod_year, profiles, storages,
+                                            baseload, is_baseload_mode, wind_cap, solar_cap, battery_config,
+                                            collect_hourly)
+
+    total_hours = steps_to_hours(len(wind_prod_year), profiles.step_hours)
+    yearly_cycles_by_unit = storages.get_average_cycles_per_year()
+    zero_hours_by_unit = storages.get_zero_hours()
+
+    with stage("storage_metrics"):
+        for storage_name in STORAGE_NAMES:
+            unit = storages.index_of(storage_name)
+            if unit is None:
+                apply_storage_metrics(result, storage_name, 0.0, 0.0, 0.0, total_hours)
+            else:
+                apply_storage_metrics(result, storage_name, storages.max_charge[unit],
+                                      yearly_cycles_by_unit[unit], zero_hours_by_unit[unit], total_hours)
+
+    # Only reset after reading metrics
+    storages.reset_yearly_energy()
+    storages.reset_yearly_zero_hours()
+
+    entry = {
+        "result": result,
+        "wind_total": wind_prod_year.sum() * profiles.step_hours,
+        "solar_total": solar_prod_year.sum() * profiles.step_hours,
+        "total_hours": total_hours,
+        "baseload": baseload,
+        "avg_spot": np.nanmean(profiles.spot[span]),
+    }
+    return entry, hourly
+
+
+def _dispatch_year_task(task: tuple) -> tuple[Dict, Any, Dict]:
+    (profile_path, year, wind_prod_year, solar_prod_year, baseload, is_baseload_mode, wind_cap, solar_cap,
+     battery_config, bess_rte, collect_hourly, start_state) = task
+
+    profiles = _worker_profiles.get(str(profile_path))
+    if profiles is None:
+        profiles = _worker_profiles[str(profile_path)] = load_profile_bundle(profile_path)
+
+    storages = create_storage_fleet(battery_config, bess_rte, profiles.step_hours)
+    if start_state is not None:
+        storages.restore(start_state)
+
+    entry, hourly = dispatch_year(profiles, year, wind_prod_year, solar_prod_year, storages, baseload,
+                                  is_baseload_mode, wind_cap, solar_cap, battery_config, collect_hourly)
+    return entry, hourly, storages.snapshot()
+
+
+def _dispatch_years_parallel(profiles, wind_prod, solar_prod, baseload, is_baseload_mode, wind_cap, solar_cap,
+                             battery_config, bess_rte, collect_hourly, parallel_years, workers):
+    """
+    Runs the years on a process pool. Pass 1 dispatches every year from empty storages, which
+    is the whole run for "initial". For "two_pass", pass 2 re-runs every year but the first from
+    the state pass 1 ended the year before with. Storage state rarely remembers more than a few
+    days, so that start is usually already the sequential one. A year whose start state still
+    differs from the exact end of the year before is re-run in order, so the result always equals
+    the sequential run.
+    """
+    profile_path = profiles.source
+    if not isinstance(profile_path, (str, os.PathLike)):
+        raise ValueError("Parallel years need the profile file path so workers can memory-map it.")
+
+    years = profiles.years
+
+    def task(year, start_state):
+        span = profiles.year_slice(year)
+        return (profile_path, year, wind_prod[span], solar_prod[span], baseload, is_baseload_mode, wind_cap,
+                solar_cap, battery_config, bess_rte, collect_hourly, start_state)
+
+    workers = workers or min(len(years), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=POOL_CONTEXT) as pool:
+        first = list(pool.map(_dispatch_year_task, [task(year, None) for year in years]))
+        if parallel_years == "initial" or len(years) < 2:
+            return [run[:2] for run in first]
+
+        second = list(pool.map(_dispatch_year_task, [task(years[k + 1], first[k][2]) for k in range(len(years) - 1)]))
+
+    runs = [first[0]] + second
+    for k in range(1, len(years)):
+        # runs[k] started from first[k - 1]'s end state; runs[k - 1] is exact by now
+        started_from, exact_start = first[k - 1][2], runs[k - 1][2]
+        if any(started_from[field] != exact_start[field] for field in _CARRIED_STATE):
+            storages = create_storage_fleet(battery_config, bess_rte, profiles.step_hours)
+            storages.restore(exact_start)
+            span = profiles.year_slice(years[k])
+            entry, hourly = dispatch_year(profiles, years[k], wind_prod[span], solar_prod[span], storages, baseload,
+                                          is_baseload_mode, wind_cap, solar_cap, battery_config, collect_hourly)
+            runs[k] = (entry, hourly, storages.snapshot())
+
+    return [run[:2] for run in runs]
+
+
+def _year_digest(profiles: ProfileBundle, year: int, wind_prod_year: np.ndarray, solar_prod_year: np.ndarray) -> str:
+    # Everything of one year that dispatch_year reads besides the configuration and the start state
+    span = profiles.year_slice(year)
+    return make_key("year", year, profiles.index.asi8[span], wind_prod_year, solar_prod_year,
+                    profiles.spot[span], profiles.cnp[span])
+
+
+def _dispatch_years_checkpointed(profiles, wind_prod, solar_prod, baseload, is_baseload_mode, wind_cap, solar_cap,
+                                 battery_config, bess_rte, checkpoints: ResultCache):
+    """
+    Runs the years in sequence on one storage fleet (collect_hourly="none") and stores after
+    every year a checkpoint of its entry and end-of-year storage snapshot. No hourly series are
+    kept: runs that collect them are cached whole by the result cache instead.
+
+    A year's checkpoint key chains the configuration, the year's data digest and the key of the
+    year before, so it stays valid only while that year and all earlier years are unchanged. A
+    re-run takes the checkpoints of the unchanged leading years, restores the storages from the
+    last of them and dispatches only the years after it: a profile extended by a year runs that
+    year alone, a changed year runs again together with every year after it.
+    """
+    key = make_key("checkpoint", baseload, bool(is_baseload_mode), wind_cap, solar_cap, *battery_config.values(),
+                   bess_rte, profiles.step_hours)
+    keys = []
+    for year in profiles.years:
+        span = profiles.year_slice(year)
+        key = make_key(key, _year_digest(profiles, year, wind_prod[span], solar_prod[span]))
+        keys.append(key)
+
+    runs = []
+    with stage("checkpoints"):
+        for key in keys:
+            checkpoint = checkpoints.get(key)
+            if checkpoint is None:
+                break
+            runs.append(checkpoint)
+
+    storages = create_storage_fleet(battery_config, bess_rte, profiles.step_hours)
+    if runs:
+        storages.restore(runs[-1][1])
+
+    for year, key in zip(profiles.years[len(runs):], keys[len(runs):]):
+        span = profiles.year_slice(year)
+        entry, _ = dispatch_year(profiles, year, wind_prod[span], solar_prod[span], storages, baseload,
+                                 is_baseload_mode, wind_cap, solar_cap, battery_config, "none")
+        run = (entry, storages.snapshot())
+        with stage("checkpoints"):
+            checkpoints.put(key, run)
+        runs.append(run)
+
+    return [(entry, None) for entry, _ in runs]
+
+
+@instrumented()
+def dispatch_physical(
     profile_file,
     wind_prod,
     solar_prod,
@@ -18,15 +346,6 @@ def simulate_dispatch(
     is_baseload_mode: bool,
     wind_cap: float,
     solar_cap: float,
-    wind_price: float,
-    solar_price: float,
-    battery_1h_price: float,
-    battery_2h_price: float,
-    battery_4h_price: float,
-    battery_6h_price: float,
-    battery_8h_price: float,
-    battery_12h_price: float,
-    missing_energy_price: float,
     battery_1h_mw: float,
     battery_2h_mw: float,
     battery_4h_mw: float,
@@ -34,11 +353,27 @@ def simulate_dispatch(
     battery_8h_mw: float,
     battery_12h_mw: float,
     bess_rte,
-    simulation_id: int = 1,
-) -> tuple[list[Any], DataFrame]:
-    results_by_year = []
-    all_hourly_dfs = []
-    years = wind_prod.index.year.unique()
+    collect_hourly: str = "full",
+    parallel_years: Optional[str] = None,
+    workers: Optional[int] = None,
+    checkpoints: Optional[ResultCache] = None,
+) -> PhysicalDispatch:
+    """
+    Runs the dispatch itself: everything that depends on capacities, demand, mode and profiles
+    but not on contract prices. The last PHYSICAL_CACHE_SIZE results are kept in memory, so
+    runs that differ only in prices dispatch once.
+
+    Years run in sequence on one storage fleet unless parallel_years (see PARALLEL_YEAR_MODES)
+    spreads them over up to workers processes; that needs a profile loaded from a file path, and
+    the processes are spawned (see utils.process_pool).
+    Sequential runs with collect_hourly="none" given checkpoints (e.g. default_checkpoint_cache)
+    resume from the last unchanged year instead of dispatching every year, see
+    _dispatch_years_checkpointed; other runs ignore checkpoints.
+    """
+    if parallel_years is not None and parallel_years not in PARALLEL_YEAR_MODES:
+        raise ValueError(f"parallel_years must be None or one of {PARALLEL_YEAR_MODES}, got '{parallel_years}'.")
+
+    profiles, wind_prod, solar_prod = _prepare_inputs(profile_file, wind_prod, solar_prod)
 
     battery_config = {
         1: battery_1h_mw,
@@ -49,108 +384,175 @@ def simulate_dispatch(
         12: battery_12h_mw,
     }
 
-    df = pd.read_excel(profile_file)
-    df.set_index('Hour', inplace=True)
-
-    storages = create_storages(battery_config, bess_rte)
-
-    for year in years:
-        wind_prod_year = wind_prod[wind_prod.index.year == year]
-        solar_prod_year = solar_prod[solar_prod.index.year == year]
-
-        metrics = init_metrics(wind_price, solar_price, battery_1h_price, battery_2h_price, battery_4h_price, battery_6h_price, battery_8h_price, battery_12h_price, missing_energy_price)
-
-        result, hourly_df = simulate_year_dispatch(metrics, year, wind_prod_year, solar_prod_year, df,
-                                                       storages, baseload, is_baseload_mode, wind_cap, solar_cap, battery_config)
-
-        total_storage_cost = sum([
-            battery_1h_price,
-            battery_2h_price,
-            battery_4h_price,
-            battery_6h_price,
-            battery_8h_price,
-            battery_12h_price
-        ])
-
-        excess_energy = result["Excess wind, MWh"] + result["Excess solar, MWh"]
-        #redundant_energy = result["Redundant wind, MWh"] + result["Redundant solar, MWh"]
-        bl_price_1 = calculate_bl_price_1(result["Wind in demand, MWh"], wind_price, result["Solar in demand, MWh"],
-                                          solar_price, total_storage_cost, result["Missing energy, MWh"],
-                                          missing_energy_price, baseload * len(wind_prod_year))
-        bl_price_2 = calculate_bl_price_2(result["Wind in demand, MWh"], wind_price, result["Solar in demand, MWh"],
-                                          solar_price, total_storage_cost, result["Missing energy, MWh"],
-                                          result["Missing energy VWAP, EUR/MWh"], baseload * len(wind_prod_year))
-
-        brake_even_1 = calculate_break_even_price_1(
-                wind_prod_year.sum(), wind_price,
-                solar_prod_year.sum(), solar_price,
-                total_storage_cost, excess_energy,
-                result["Excess energy VWAP, EUR/MWh"],
-                result["Missing energy, MWh"], missing_energy_price,
-                baseload * len(wind_prod_year)
-            )
-
-        brake_even_2 = calculate_break_even_price_2(
-            wind_prod_year.sum(), wind_price,
-            solar_prod_year.sum(), solar_price,
-            total_storage_cost, excess_energy,
-            result["Excess energy VWAP, EUR/MWh"],
-            result["Missing energy, MWh"],
-            result["Missing energy VWAP, EUR/MWh"],
-            baseload * len(wind_prod_year)
-        )
+    # "two_pass" reproduces the sequential run, "initial" does not
+    key = make_key("physical", profiles.digest, wind_prod, solar_prod, baseload, bool(is_baseload_mode),
+                   wind_cap, solar_cap, *battery_config.values(), bess_rte, collect_hourly,
+                   parallel_years == "initial")
+    if key in _physical_cache:
+        _physical_cache.move_to_end(key)
+        return _physical_cache[key]
 
-        brake_even_3 = calculate_break_even_price_3(
-            wind_prod_year.sum(), wind_price,
-            solar_prod_year.sum(), solar_price,
-            total_storage_cost, excess_energy,
-            result["Missing energy, MWh"], missing_energy_price,
-            baseload * len(wind_prod_year)
-        )
+    if parallel_years is None and collect_hourly == "none" and checkpoints is not None:
+        runs = _dispatch_years_checkpointed(profiles, wind_prod, solar_prod, baseload, is_baseload_mode, wind_cap,
+                                            solar_cap, battery_config, bess_rte, checkpoints)
+    elif parallel_years is None:
+        runs = []
+        storages = create_storage_fleet(battery_config, bess_rte, profiles.step_hours)
+        for year in profiles.years:
+            span = profiles.year_slice(year)
+            runs.append(dispatch_year(profiles, year, wind_prod[span], solar_prod[span], storages, baseload,
+                                      is_baseload_mode, wind_cap, solar_cap, battery_config, collect_hourly))
+    else:
+        runs = _dispatch_years_parallel(profiles, wind_prod, solar_prod, baseload, is_baseload_mode, wind_cap,
+                                        solar_cap, battery_config, bess_rte, collect_hourly, parallel_years, workers)
 
-        result["Demand 1 - Fixed Missing EUR/MWh"] = round(bl_price_1)
-        result["Demand 2 - VWAP Missing EUR/MWh"] = round(bl_price_2)
-        result["Break-even 1 - Fixed Missing, EUR/MWh"] = round(brake_even_1)
-        result["Break-even 2 - VWAP Missing, EUR/MWh"] = round(brake_even_2)
-        result["Break-even 3 - Excess En. Price Fixed 0, EUR/MWh"] = round(brake_even_3)
-        result["Annual avg spot, EUR/MWh"] = round(hourly_df["Spot"].mean())
-        result["Overproduction share, %"] = round(calculate_overproduction_share(excess_energy, wind_prod_year.sum(), solar_prod_year.sum()))
-        result["Simulation id"] = simulation_id
+    years = [entry for entry, _ in runs]
+    all_hourly = [hourly for _, hourly in runs]
 
+    with stage("hourly_concat"):
+        if collect_hourly == "full":
+            hourly = pd.concat(all_hourly)
+        elif collect_hourly == "compact":
+            hourly = HourlySeries.concat(all_hourly)
+        else:
+            hourly = None
+
+    physical = PhysicalDispatch(years, hourly)
+    _physical_cache[key] = physical
+    while len(_physical_cache) > PHYSICAL_CACHE_SIZE:
+        _physical_cache.popitem(last=False)
+    return physical
+
+
+@instrumented()
+def price_dispatch(
+    physical: PhysicalDispatch,
+    wind_price: float,
+    solar_price: float,
+    battery_1h_price: float,
+    battery_2h_price: float,
+    battery_4h_price: float,
+    battery_6h_price: float,
+    battery_8h_price: float,
+    battery_12h_price: float,
+    missing_energy_price: float,
+    simulation_id: int = 1,
+) -> list[Dict]:
+    """Prices a finished dispatch with contract prices; returns the same per-year dicts as simulate_dispatch."""
+    total_storage_cost = sum([
+        battery_1h_price,
+        battery_2h_price,
+        battery_4h_price,
+        battery_6h_price,
+        battery_8h_price,
+        battery_12h_price
+    ])
+
+    results_by_year = []
+    for year in physical.years:
+        result = dict(year["result"])
+        result.update({
+            "Wind PaP price, EUR/MWh": wind_price,
+            "PV PaP price, EUR/MWh": solar_price,
+            "BESS 1h annual payment, EUR/MWh": battery_1h_price,
+            "BESS 2h annual payment, EUR/MWh": battery_2h_price,
+            "BESS 4h annual payment, EUR/MWh": battery_4h_price,
+            "BESS 6h annual payment, EUR/MWh": battery_6h_price,
+            "BESS 8h annual payment, EUR/MWh": battery_8h_price,
+            "BESS 12h annual payment, EUR/MWh": battery_12h_price,
+            "Missing energy price, EUR/MWh": missing_energy_price,
+        })
+        apply_price_metrics(result, year["wind_total"], year["solar_total"], year["total_hours"], year["baseload"],
+                            wind_price, solar_price, total_storage_cost, missing_energy_price, year["avg_spot"])
+        result["Simulation id"] = simulation_id
         results_by_year.append(result)
-        all_hourly_dfs.append(hourly_df)
 
-        total_hours = len(wind_prod_year)
-        hours_per_day = 24
+    return results_by_year
+
+
+@instrumented()
+def simulate_dispatch(
+    profile_file,
+    wind_prod,
+    solar_prod,
+    baseload: float,
+    is_baseload_mode: bool,
+    wind_cap: float,
+    solar_cap: float,
+    wind_price: float,
+    solar_price: float,
+    battery_1h_price: float,
+    battery_2h_price: float,
+    battery_4h_price: float,
+    battery_6h_price: float,
+    battery_8h_price: float,
+    battery_12h_price: float,
+    missing_energy_price: float,
+    battery_1h_mw: float,
+    battery_2h_mw: float,
+    battery_4h_mw: float,
+    battery_6h_mw: float,
+    battery_8h_mw: float,
+    battery_12h_mw: float,
+    bess_rte,
+    simulation_id: int = 1,
+    use_cache: bool = True,
+    collect_hourly: str = "full",
+    parallel_years: Optional[str] = None,
+    workers: Optional[int] = None,
+    checkpoints: Optional[ResultCache] = None,
+) -> tuple[list[Any], Union[DataFrame, HourlySeries, None]]:
+    """
+    Simulates all years of the profile and returns the yearly results plus the hourly series.
+
+    collect_hourly picks what is kept of the hourly dispatch: "full" (default) the hourly
+    DataFrame, "compact" an HourlySeries of float32 columns, "none" nothing (returned as None),
+    with the VWAPs taken from running totals in the dispatch loop.
 
-        for storage_name in ["BESS 1h", "BESS 2h", "BESS 4h", "BESS 6h", "BESS 8h", "BESS 12h"]:
-            storage = next((s for s in storages if s.name == storage_name), None)
+    parallel_years and workers are passed to dispatch_physical to run the years on separate processes.
 
-            # If this BESS wasn't instantiated (or has no power), report as unused: 0 cycles, 100% zero-hours
-            if storage is None or getattr(storage, "max_charge", 0) <= 0:
-                result[f"{storage_name} avg cycles"] = 0.0
-                result[f"{storage_name} zero hours ratio, %"] = 100.0
-                continue
+    Profiles finer than hourly (e.g. ProfileBundle.resample(15)) dispatch in steps of their
+    own length; wind_prod and solar_prod are then MW per step, see simulate_year_dispatch.
 
-            # Determine if it actually did any work this year
-            yearly_energy = getattr(storage, "get_yearly_energy", lambda: 0.0)()
-            yearly_cycles = storage.get_average_cycles_per_year()
+    With use_cache, finished results are looked up in default_result_cache by a hash of the
+    profile contents, the production series and every other input except simulation_id,
+    so repeated runs (app reruns, repeated batch rows, earlier sessions) return immediately.
+    checkpoints (off by default; pass default_checkpoint_cache to opt in) lets runs without
+    hourly series that miss the result cache resume from year checkpoints: after a profile
+    update only the new or changed years (and the years after them) are dispatched.
+    """
+    profiles, wind_prod, solar_prod = _prepare_inputs(profile_file, wind_prod, solar_prod)
 
-            if (yearly_energy or 0.0) <= 0 and (yearly_cycles or 0.0) <= 0:
-                # existed but never used
-                result[f"{storage_name} avg cycles"] = 0.0
-                result[f"{storage_name} zero hours ratio, %"] = 100.0
-            else:
-                avg_daily_cycles = yearly_cycles / (total_hours / hours_per_day)
-                zero_hours_ratio = (storage.get_zero_hours() / total_hours) * 100
-                result[f"{storage_name} avg cycles"] = round(avg_daily_cycles, 2)
-                result[f"{storage_name} zero hours ratio, %"] = round(zero_hours_ratio)
+    key = None
+    if use_cache:
+        key = make_key(
+            "simulate_dispatch", profiles.digest, wind_prod, solar_prod, baseload, bool(is_baseload_mode),
+            wind_cap, solar_cap, wind_price, solar_price, battery_1h_price, battery_2h_price, battery_4h_price,
+            battery_6h_price, battery_8h_price, battery_12h_price, missing_energy_price, battery_1h_mw,
+            battery_2h_mw, battery_4h_mw, battery_6h_mw, battery_8h_mw, battery_12h_mw, bess_rte, collect_hourly,
+            parallel_years == "initial"
+        )
+        with stage("result_cache"):
+            cached = default_result_cache.get(key)
+        if cached is not None:
+            cached_results, cached_hourly = cached
+            results_by_year = [dict(result, **{"Simulation id": simulation_id}) for result in cached_results]
+            return results_by_year, _copy_hourly(cached_hourly)
 
-        # Only reset after reading metrics
-        for s in storages:
-            if hasattr(s, "reset_yearly_energy"): s.reset_yearly_energy()
-            if hasattr(s, "reset_yearly_zero_hours"): s.reset_yearly_zero_hours()
+    physical = dispatch_physical(
+        profiles, wind_prod, solar_prod,
+        baseload, is_baseload_mode, wind_cap, solar_cap,
+        battery_1h_mw, battery_2h_mw, battery_4h_mw, battery_6h_mw, battery_8h_mw, battery_12h_mw, bess_rte,
+        collect_hourly, parallel_years, workers, checkpoints
+    )
+    results_by_year = price_dispatch(
+        physical, wind_price, solar_price, battery_1h_price, battery_2h_price, battery_4h_price,
+        battery_6h_price, battery_8h_price, battery_12h_price, missing_energy_price, simulation_id
+    )
 
-    full_hourly_df = pd.concat(all_hourly_dfs)
+    if key is not None:
+        with stage("result_cache"):
+            default_result_cache.put(key, ([dict(result) for result in results_by_year], physical.hourly))
 
-    return results_by_year, full_hourly_df
\ No newline at end of file
+    # The physical result is cached: hand out a copy callers are free to modify
+    return results_by_year, _copy_hourly(physical.hourly)
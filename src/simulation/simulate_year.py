@@ -1,58 +1,119 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, Union
 
 import numpy as np
 import pandas as pd
 
-from interfaces.StorageUnit import StorageUnit
+from models.hourly_series import HourlySeries
+from models.profile_bundle import ProfileBundle
+from models.storage_fleet import StorageFleet
+from simulation.dispatch_kernel import dispatch_year_arrays, dispatch_year_without_storage, price_totals_vwap
 from simulation.metrics import compile_result
-from utils.calculations import vwap_energy, share_allocation
+from utils.calculations import vwap_arrays
+from utils.instrumentation import instrumented, stage
 
+# What simulate_year_dispatch / simulate_dispatch keep of the hourly dispatch:
+# "none" only the yearly metrics, "compact" an HourlySeries of float32 arrays, "full" the hourly DataFrame
+COLLECT_HOURLY_MODES = ("none", "compact", "full")
+
+
+def steps_to_hours(steps, step_hours: float):
+    """Duration of a number of steps in hours; counts of hourly steps stay integers."""
+    return steps if step_hours == 1 else steps * step_hours
+
+
+@instrumented()
 def simulate_year_dispatch(
     metrics: Dict[str, Any],
     year: int,
-    wind_year: pd.Series,
-    solar_year: pd.Series,
-    df: pd.DataFrame,
-    storages: List[StorageUnit],
+    wind_year: np.ndarray,
+    solar_year: np.ndarray,
+    profiles: ProfileBundle,
+    storages: StorageFleet,
     baseload: float,
     is_baseload_mode: bool,
     wind_cap: float,
     solar_cap: float,
     battery_config: Dict[int, float],
-) -> tuple[Dict, pd.DataFrame]:
-    total_hours = len(wind_year)
-    cnp_avg = df.loc[wind_year.index, "cnp"].mean()
-    wind_total = wind_year.sum()
-    solar_total = solar_year.sum()
-
-    hourly_records = []
-    cycle_loss_total = 0.0
-
-    for hour in range(total_hours):
-        wind = round(wind_year.iloc[hour], 3)
-        solar = round(solar_year.iloc[hour], 3)
-        timestamp = wind_year.index[hour]
-        spot = df.loc[timestamp, "spot"]
-        cnp = df.loc[timestamp, "cnp"]
-
-        result, cycle_loss = simulate_hour(wind, solar, storages, baseload, cnp, cnp_avg, is_baseload_mode, timestamp, metrics)
-        result["timestamp"] = timestamp
-        result["Spot"] = spot
+    collect_hourly: str = "full",
+) -> tuple[Dict, Union[pd.DataFrame, HourlySeries, None]]:
+    """
+    Dispatches one year step by step and returns its compile_result dict and the per-step series.
 
-        hourly_records.append(result)
-        cycle_loss_total += cycle_loss
+    The step length is profiles.step_hours (1.0 for hourly, 0.25 for 15-minute profiles).
+    wind_year, solar_year and baseload are power in MW; every step dispatches power x step
+    length as energy, so the per-step output columns are MWh per step. Hour counts in the
+    result (hours met, hours, zero hours) are in hours whatever the step.
+    """
+    if collect_hourly not in COLLECT_HOURLY_MODES:
+        raise ValueError(f"collect_hourly must be one of {COLLECT_HOURLY_MODES}, got '{collect_hourly}'.")
+
+    span = profiles.year_slice(year)
+    steps = len(wind_year)
+    if steps != span.stop - span.start:
+        raise ValueError(f"Production for {year} is not aligned with the profile hours.")
+
+    step_hours = profiles.step_hours
+    if storages.step_hours != step_hours:
+        raise ValueError(f"Storages use {storages.step_hours} h steps, the profiles {step_hours} h steps.")
+    total_hours = steps_to_hours(steps, step_hours)
+
+    spot_year = profiles.spot[span]
+    cnp_year = profiles.cnp[span]
+    wind_total = wind_year.sum() * step_hours
+    solar_total = solar_year.sum() * step_hours
+
+    if is_baseload_mode:
+        demand = np.full(steps, baseload * step_hours, dtype=np.float64)
+    else:
+        demand = (baseload * step_hours) * (cnp_year / cnp_year.mean())
+
+    wind_rounded = np.round(wind_year, 3) * step_hours
+    solar_rounded = np.round(solar_year, 3) * step_hours
+
+    # Summary mode: the kernels keep running VWAP totals instead of hourly arrays
+    summary_spot = spot_year if collect_hourly == "none" else None
+    steps_met_before = metrics["hours_met"]
+    with stage("hourly_loop"):
+        if storages.has_power:
+            hourly, cycle_loss_total, price_totals = dispatch_year_arrays(
+                wind_rounded, solar_rounded, demand, profiles.day[span], storages, metrics, summary_spot
+            )
+        else:
+            hourly, cycle_loss_total, price_totals = dispatch_year_without_storage(
+                wind_rounded, solar_rounded, demand, metrics, summary_spot
+            )
 
+    # The kernels count steps
+    metrics["hours_met"] = steps_met_before + steps_to_hours(metrics["hours_met"] - steps_met_before, step_hours)
     metrics["cycle_loss_total"] = cycle_loss_total
     metrics["missing_energy"] = max(0, metrics["missing_energy"] - cycle_loss_total)
 
-    hourly_df = pd.DataFrame(hourly_records).set_index("timestamp")
-    vwap_missing = vwap_energy(hourly_df, "missing_energy", "Spot")
-    vwap_excess = vwap_energy(hourly_df, "excess_energy", "Spot")
-    vwap_wind = vwap_energy(hourly_df, "wind_total", "Spot")
-    vwap_solar = vwap_energy(hourly_df, "solar_total", "Spot")
+    with stage("vwap"):
+        if hourly is None:
+            vwap_missing = price_totals_vwap(price_totals["missing_energy"])
+            vwap_excess = price_totals_vwap(price_totals["excess_energy"])
+            vwap_wind = vwap_arrays(wind_rounded, spot_year)
+            vwap_solar = vwap_arrays(solar_rounded, spot_year)
+        else:
+            vwap_missing = vwap_arrays(hourly["missing_energy"], spot_year)
+            vwap_excess = vwap_arrays(hourly["excess_energy"], spot_year)
+            vwap_wind = vwap_arrays(hourly["wind_total"], spot_year)
+            vwap_solar = vwap_arrays(hourly["solar_total"], spot_year)
+
+    if hourly is None:
+        hourly_out = None
+    else:
+        hourly["Spot"] = spot_year
+        hourly["produced_energy"] = hourly["wind_total"] + hourly["solar_total"]
+        with stage("hourly_frame"):
+            if collect_hourly == "compact":
+                hourly_out = HourlySeries(profiles.index[span], hourly)
+            else:
+                hourly_out = pd.DataFrame(hourly, index=profiles.index[span])
+                hourly_out.index.name = "timestamp"
+
     wind_baseload = metrics["wind_in_baseload"]
     solar_baseload = metrics["solar_in_baseload"]
-    hourly_df["produced_energy"] = hourly_df["wind_total"] + hourly_df["solar_total"]
 
     return (
         compile_result(
@@ -61,148 +122,5 @@ def simulate_year_dispatch(
             battery_config[6], battery_config[8], battery_config[12],
             wind_baseload, solar_baseload, wind_total, solar_total, vwap_missing, vwap_excess, vwap_wind, vwap_solar, metrics
         ),
-        hourly_df
+        hourly_out
     )
-
-def sequential_bess_charging(storages, wind_surplus, solar_surplus):
-    """
-    Charges storages in sequential order: each BESS gets up to its MW limit for the hour,
-    as long as it has room. Keeps going until surplus runs out or all BESS are full.
-    Returns:
-      - remaining_wind (float)
-      - remaining_solar (float)
-      - total_cycle_loss (float)
-      - total_charged (float)
-    """
-    remaining_wind = max(0.0, wind_surplus)
-    remaining_solar = max(0.0, solar_surplus)
-    total_cycle_loss = 0.0
-    total_charged = 0.0
-
-    for storage in storages:
-        soc_headroom = max(0.0, storage.max_volume - storage.soc)
-        if soc_headroom < 1e-6:
-            continue
-
-        slice_mwh = min(storage.max_charge, soc_headroom, remaining_wind + remaining_solar)
-        if slice_mwh < 1e-6:
-            continue
-
-        total_surplus = remaining_wind + remaining_solar
-        wind_frac = remaining_wind / total_surplus if total_surplus > 0 else 0.0
-        solar_frac = 1.0 - wind_frac
-
-        slice_wind = slice_mwh * wind_frac
-        slice_solar = slice_mwh * solar_frac
-
-        charged, leftover_wind, leftover_solar, loss = storage.charge(slice_wind, slice_solar)
-
-        actual_charged_wind = slice_wind - leftover_wind
-        actual_charged_solar = slice_solar - leftover_solar
-
-        remaining_wind = max(0.0, remaining_wind - actual_charged_wind)
-        remaining_solar = max(0.0, remaining_solar - actual_charged_solar)
-
-        total_charged += actual_charged_wind + actual_charged_solar
-        total_cycle_loss += max(0.0, loss)
-
-        if remaining_wind + remaining_solar < 1e-6:
-            break
-
-    return remaining_wind, remaining_solar, total_cycle_loss, total_charged
-
-def simulate_hour(
-    wind: float,
-    solar: float,
-    storages: List[StorageUnit],
-    baseload: float,
-    cnp: float,
-    cnp_avg: float,
-    is_baseload_mode: bool,
-    timestamp: pd.Timestamp,
-    metrics: Dict
-) -> tuple[Dict[str, float], float]:
-
-    total_gen = wind + solar
-    missing_energy = 0.0
-    excess_energy = 0.0
-    cycle_loss_total = 0.0
-    discharged_total = 0.0
-    charged_total = 0.0
-
-    if not is_baseload_mode:
-        baseload *= cnp / cnp_avg
-
-    if total_gen >= baseload:
-        wind_in_baseload, solar_in_baseload = share_allocation(wind, solar, baseload)
-
-        metrics["wind_in_baseload"] += wind_in_baseload
-        metrics["solar_in_baseload"] += solar_in_baseload
-        metrics["produced_total"] += baseload
-        metrics["hours_met"] += 1
-
-        surplus = total_gen - baseload
-        wind_surplus, solar_surplus = share_allocation(wind, solar, surplus)
-        initial_wind_surplus, initial_solar_surplus = wind_surplus, solar_surplus
-
-        wind_surplus, solar_surplus, loss, charged = sequential_bess_charging(
-            storages, wind_surplus, solar_surplus
-        )
-        cycle_loss_total += loss
-        charged_total += charged
-
-        bess_remaining_wind = wind_surplus
-        bess_remaining_solar = solar_surplus
-        remaining_surplus = bess_remaining_wind + bess_remaining_solar
-
-        to_grid_wind, to_grid_solar = share_allocation(bess_remaining_wind, bess_remaining_solar, remaining_surplus)
-        metrics["excess_wind"] += to_grid_wind
-        metrics["excess_solar"] += to_grid_solar
-
-        redundant_wind = bess_remaining_wind - to_grid_wind
-        redundant_solar = bess_remaining_solar - to_grid_solar
-        metrics["redundant_wind"] += redundant_wind
-        metrics["redundant_solar"] += redundant_solar
-
-        metrics["charged_wind"] += initial_wind_surplus - bess_remaining_wind
-        metrics["charged_solar"] += initial_solar_surplus - bess_remaining_solar
-
-        metrics["excess_energy"] += remaining_surplus
-        excess_energy = remaining_surplus
-
-    else:
-        shortfall = baseload - total_gen
-
-        metrics["wind_in_baseload"] += wind
-        metrics["solar_in_baseload"] += solar
-        wind_discharged = 0
-        solar_discharged = 0
-        for storage in storages:
-            if shortfall <= 0:
-                break
-            discharged, wind_discharged, solar_discharged, loss = storage.discharge(shortfall, timestamp)
-            discharged_total += discharged
-            cycle_loss_total += loss
-            shortfall -= discharged
-
-
-        produced = total_gen + discharged_total
-        metrics["produced_total"] += produced
-        metrics["wind_in_baseload"] += wind_discharged
-        metrics["solar_in_baseload"] += solar_discharged
-
-        if produced >= baseload:
-            metrics["hours_met"] += 1
-        else:
-            missing_energy = baseload - produced
-            metrics["missing_energy"] += missing_energy
-
-    return {
-        "battery_discharged": discharged_total,
-        "battery_charged": charged_total,
-        "missing_energy": missing_energy,
-        "excess_energy": excess_energy,
-        "wind_total": wind,
-        "solar_total": solar,
-        "baseload": baseload
-    }, cycle_loss_total
\ No newline at end of file
@@ -1,14 +1,18 @@
 from typing import List, Dict
 from interfaces.StorageUnit import StorageUnit
 from models.storage import Storage
+from models.storage_fleet import StorageFleet
 
-def create_storages(battery_config: Dict, bess_rte) -> List[StorageUnit]:
+def create_storages(battery_config: Dict, bess_rte, step_hours: float = 1.0) -> List[StorageUnit]:
     storages = []
 
     for duration, charge_mw in battery_config.items():
         volume = charge_mw * duration
-        storages.append(Storage(charge_mw, volume, bess_rte, name=f"BESS {duration}h"))
+        storages.append(Storage(charge_mw, volume, bess_rte, name=f"BESS {duration}h", step_hours=step_hours))
 
     storages.sort(key=lambda s: (-s.max_charge, s.max_volume))  # High MW, then depth
 
-    return storages
\ No newline at end of file
+    return storages
+
+def create_storage_fleet(battery_config: Dict, bess_rte, step_hours: float = 1.0) -> StorageFleet:
+    return StorageFleet.from_storages(create_storages(battery_config, bess_rte, step_hours))
@@ -0,0 +1,532 @@
+import itertools
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from models.profile_bundle import ProfileBundle
+from simulation.metrics import compile_result, init_metrics
+from simulation.simulate_dispatch import STORAGE_NAMES, apply_price_metrics, apply_storage_metrics, simulate_dispatch
+from simulation.simulate_year import steps_to_hours
+from utils.profiles import get_profiles, load_profile_bundle
+
+BATTERY_DURATIONS = (1, 2, 4, 6, 8, 12)
+
+# The configuration-axis step loop has a fixed cost of about 2 s per profile year plus a little per
+# configuration; simulate_dispatch takes about 0.03 s per configuration and year. Below this many
+# configurations with storage, sweep_dispatch runs them one by one instead. Measured on the 5-year LV
+# profile on one core: 48 configurations 11 s in the step loop against 6 s one by one, 200
+# configurations 19 s against 32 s.
+SWEEP_MIN_CONFIGS = 100
+
+# Configurations x steps evaluated at once by the closed form for configurations without storage;
+# small enough for its temporaries to stay in cache
+_STATIC_CHUNK_CELLS = 2**16
+
+_METRIC_KEYS = (
+    "produced_total", "hours_met", "excess_wind", "excess_solar", "redundant_wind", "redundant_solar",
+    "excess_energy", "missing_energy", "wind_in_baseload", "solar_in_baseload", "charged_wind", "charged_solar",
+)
+
+
+def build_grid(
+    wind_caps: Sequence[float],
+    solar_caps: Sequence[float],
+    baseloads: Sequence[float],
+    battery_1h_mw: Sequence[float] = (0,),
+    battery_2h_mw: Sequence[float] = (0,),
+    battery_4h_mw: Sequence[float] = (0,),
+    battery_6h_mw: Sequence[float] = (0,),
+    battery_8h_mw: Sequence[float] = (0,),
+    battery_12h_mw: Sequence[float] = (0,),
+) -> pd.DataFrame:
+    """Cartesian product of the given capacities, one row per configuration."""
+    columns = ["wind_cap", "solar_cap", "baseload", "battery_1h_mw", "battery_2h_mw", "battery_4h_mw",
+               "battery_6h_mw", "battery_8h_mw", "battery_12h_mw"]
+    axes = [wind_caps, solar_caps, baseloads, battery_1h_mw, battery_2h_mw, battery_4h_mw,
+            battery_6h_mw, battery_8h_mw, battery_12h_mw]
+    return pd.DataFrame(list(itertools.product(*[np.atleast_1d(a).tolist() for a in axes])), columns=columns)
+
+
+class _FleetState:
+    """
+    Storage state of every configuration: arrays of shape (configs, units).
+
+    Column u holds each configuration's u-th storage in its own dispatch priority order
+    (create_storages ordering: highest MW first, then shallowest), so per-unit logic can
+    walk the columns in order exactly like the single-configuration loop walks its list.
+    """
+
+    def __init__(self, battery_mw: np.ndarray, bess_rte: float, step_hours: float = 1.0):
+        n_configs = battery_mw.shape[0]
+        durations = np.array(BATTERY_DURATIONS, dtype=np.float64)
+        volumes = battery_mw * durations
+
+        # Stable sort on (-MW, volume) per row, like create_storages
+        order = np.lexsort((volumes, -battery_mw), axis=-1) if n_configs else np.zeros((0, 6), dtype=np.int64)
+        rows = np.arange(n_configs)[:, None]
+        self.unit_of_column = order
+        self.max_charge = battery_mw[rows, order]
+        self.max_volume = volumes[rows, order]
+        self.max_step_energy = self.max_charge * step_hours
+        self.eff = bess_rte ** 0.5
+        self.daily_limit = 2 * self.max_volume
+
+        # Only columns where some configuration has power need the hourly loop; 0 MW units sort last
+        self.active_columns = int((self.max_charge > 0).sum(axis=1).max()) if n_configs else 0
+        self.has_idle = (self.max_charge <= 0).any(axis=1)
+
+        shape = self.max_charge.shape
+        self.soc = np.zeros(shape)
+        self.wind_soc = np.zeros(shape)
+        self.solar_soc = np.zeros(shape)
+        self.daily_discharged = np.zeros(shape)
+        self.yearly_discharged = np.zeros(shape)
+        self.zero_hours = np.zeros(shape)
+        self.last_day = None
+
+
+def _sequential_sums(values: np.ndarray) -> np.ndarray:
+    # Per configuration row, step by step like the loop's running totals (np.sum is pairwise)
+    return np.cumsum(values, axis=1)[:, -1] if values.shape[1] else np.zeros(len(values))
+
+
+def _dispatch_year_without_storage(
+    wind_caps: np.ndarray,
+    solar_caps: np.ndarray,
+    demand_scale: np.ndarray,
+    baseloads: np.ndarray,
+    wind_profile: np.ndarray,
+    solar_profile: np.ndarray,
+    spot_prices: np.ndarray,
+    step_hours: float = 1.0,
+) -> Dict[str, np.ndarray]:
+    """
+    _dispatch_year for configurations without storage power, on whole (configurations, steps)
+    arrays: nothing carries over between steps, so every step is the same closed form as in
+    dispatch_kernel.dispatch_year_without_storage. Totals are summed step by step, so they are
+    bit-identical to the step loop's.
+    """
+    n = len(wind_caps)
+    steps = len(wind_profile)
+    acc = {key: np.zeros(n) for key in _METRIC_KEYS}
+    acc["cycle_loss_total"] = np.zeros(n)
+    vwap = {key: [np.zeros(n), np.zeros(n)] for key in ("missing", "excess", "wind", "solar")}
+
+    def by_step(series, columns):
+        # Shared series broadcast over the configurations, per-configuration ones are sliced
+        return series[:, columns].T if np.ndim(series) == 2 else series[None, :]
+
+    chunk = max(1, _STATIC_CHUNK_CELLS // max(steps, 1))
+    for start in range(0, n, chunk):
+        cols = slice(start, min(start + chunk, n))
+        w = np.round(wind_caps[cols, None] * by_step(wind_profile, cols), 3) * step_hours
+        s = np.round(solar_caps[cols, None] * by_step(solar_profile, cols), 3) * step_hours
+        bl = (baseloads[cols, None] * step_hours) * by_step(demand_scale, cols)
+        spot = by_step(spot_prices, cols)
+
+        total_gen = w + s
+        met = total_gen >= bl
+        has_gen = total_gen != 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            wind_share = np.where(has_gen, w / total_gen, 0.0)
+            solar_share = np.where(has_gen, s / total_gen, 0.0)
+
+        surplus = total_gen - bl
+        wind_surplus = np.where(met & has_gen, surplus * wind_share, 0.0)
+        solar_surplus = np.where(met & has_gen, surplus * solar_share, 0.0)
+        rem_wind = np.maximum(0.0, wind_surplus)
+        rem_solar = np.maximum(0.0, solar_surplus)
+        remaining_surplus = np.where(met, rem_wind + rem_solar, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            to_grid_wind = np.where(remaining_surplus != 0, remaining_surplus * (rem_wind / remaining_surplus), 0.0)
+            to_grid_solar = np.where(remaining_surplus != 0, remaining_surplus * (rem_solar / remaining_surplus), 0.0)
+        missing = np.where(met, 0.0, bl - total_gen)
+
+        totals = {
+            "wind_in_baseload": np.where(met, np.where(has_gen, bl * wind_share, 0.0), w),
+            "solar_in_baseload": np.where(met, np.where(has_gen, bl * solar_share, 0.0), s),
+            "excess_wind": to_grid_wind,
+            "excess_solar": to_grid_solar,
+            "redundant_wind": np.where(met, rem_wind - to_grid_wind, 0.0),
+            "redundant_solar": np.where(met, rem_solar - to_grid_solar, 0.0),
+            "charged_wind": np.where(met, wind_surplus - rem_wind, 0.0),
+            "charged_solar": np.where(met, solar_surplus - rem_solar, 0.0),
+            "excess_energy": remaining_surplus,
+            "produced_total": np.where(met, bl, total_gen),
+            "missing_energy": missing,
+        }
+        for key, values in totals.items():
+            acc[key][cols] = _sequential_sums(values)
+        acc["hours_met"][cols] = met.sum(axis=1)
+
+        # Unpriced steps add nothing, like the step loop skipping them
+        priced = ~np.isnan(spot)
+        for key, energy in (("missing", missing), ("excess", remaining_surplus), ("wind", w), ("solar", s)):
+            positive = np.where(priced & (energy > 0), energy, 0.0)
+            vwap[key][0][cols] = _sequential_sums(positive)
+            vwap[key][1][cols] = _sequential_sums(np.where(priced, positive * spot, 0.0))
+
+    for key, (energy_sum, value_sum) in vwap.items():
+        with np.errstate(divide="ignore", invalid="ignore"):
+            acc[f"vwap_{key}"] = np.where(energy_sum > 0, value_sum / energy_sum, 0.0)
+    return acc
+
+
+def _dispatch_year(
+    state: _FleetState,
+    wind_caps: np.ndarray,
+    solar_caps: np.ndarray,
+    demand_scale: np.ndarray,
+    baseloads: np.ndarray,
+    wind_profile: np.ndarray,
+    solar_profile: np.ndarray,
+    spot_prices: np.ndarray,
+    days: np.ndarray,
+    step_hours: float = 1.0,
+) -> Dict[str, np.ndarray]:
+    """
+    Advances all configurations through one year, step by step (see simulate_year_dispatch for
+    steps shorter than an hour; zero hours and hours met are counted in steps here).
+
+    Per configuration this is the arithmetic of dispatch_year_arrays / StorageFleet, with the
+    configuration axis vectorised and the per-unit branches expressed as masks. Returns the
+    yearly metric totals, cycle loss and VWAP numerators/denominators per configuration.
+
+    wind_profile, solar_profile, demand_scale and spot_prices are either one series shared by
+    all configurations, shape (steps,), or one column per configuration, shape (steps, n), as
+    for the Monte Carlo paths of simulation.monte_carlo. days is shared.
+
+    Without any storage power there is no state to carry from step to step, and all steps are
+    evaluated at once by _dispatch_year_without_storage.
+    """
+    if state.active_columns == 0:
+        return _dispatch_year_without_storage(wind_caps, solar_caps, demand_scale, baseloads, wind_profile,
+                                              solar_profile, spot_prices, step_hours)
+
+    n = len(wind_caps)
+    acc = {key: np.zeros(n) for key in _METRIC_KEYS}
+    acc["cycle_loss_total"] = np.zeros(n)
+    vwap = {key: [np.zeros(n), np.zeros(n)] for key in ("missing", "excess", "wind", "solar")}
+
+    eff = state.eff
+    per_column_spot = np.ndim(spot_prices) == 2
+    spots = spot_prices if per_column_spot else spot_prices.tolist()
+    days = days.tolist()
+
+    for h in range(len(wind_profile)):
+        w = np.round(wind_caps * wind_profile[h], 3) * step_hours
+        s = np.round(solar_caps * solar_profile[h], 3) * step_hours
+        bl = (baseloads * step_hours) * demand_scale[h]
+        spot = spots[h]
+
+        total_gen = w + s
+        met = total_gen >= bl
+        short = ~met
+        has_gen = total_gen != 0
+        hour_loss = np.zeros(n)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            wind_share = np.where(has_gen, w / total_gen, 0.0)
+            solar_share = np.where(has_gen, s / total_gen, 0.0)
+
+        acc["wind_in_baseload"] += np.where(met, np.where(has_gen, bl * wind_share, 0.0), w)
+        acc["solar_in_baseload"] += np.where(met, np.where(has_gen, bl * solar_share, 0.0), s)
+
+        # Surplus hours: charge storages in priority order, the rest goes to the grid
+        surplus = total_gen - bl
+        wind_surplus = np.where(met & has_gen, surplus * wind_share, 0.0)
+        solar_surplus = np.where(met & has_gen, surplus * solar_share, 0.0)
+        rem_wind = np.maximum(0.0, wind_surplus)
+        rem_solar = np.maximum(0.0, solar_surplus)
+
+        if met.any():
+            charging = met.copy()
+            for u in range(state.active_columns):
+                soc = state.soc[:, u]
+                max_charge = state.max_step_energy[:, u]
+                max_volume = state.max_volume[:, u]
+
+                headroom = np.maximum(0.0, max_volume - soc)
+                slice_mwh = np.minimum(np.minimum(max_charge, headroom), rem_wind + rem_solar)
+                go = charging & (headroom >= 1e-6) & (slice_mwh >= 1e-6)
+                if not go.any():
+                    continue
+
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    total_surplus = rem_wind + rem_solar
+                    wind_frac = np.where(total_surplus > 0, rem_wind / total_surplus, 0.0)
+                    slice_wind = slice_mwh * wind_frac
+                    slice_solar = slice_mwh * (1.0 - wind_frac)
+                    to_charge = slice_wind + slice_solar
+                    chargeable_raw = np.minimum(np.minimum(to_charge, max_charge), (max_volume - soc) / eff)
+                    wind_charged_raw = chargeable_raw * (slice_wind / to_charge)
+                    solar_charged_raw = chargeable_raw * (slice_solar / to_charge)
+                wind_charged = wind_charged_raw * eff
+                solar_charged = solar_charged_raw * eff
+                leftover_wind = np.maximum(slice_wind - wind_charged_raw, 0.0)
+                leftover_solar = np.maximum(slice_solar - solar_charged_raw, 0.0)
+                loss = chargeable_raw - (wind_charged + solar_charged)
+
+                state.soc[:, u] = np.where(go, soc + (wind_charged + solar_charged), soc)
+                state.wind_soc[:, u] = np.where(go, state.wind_soc[:, u] + wind_charged, state.wind_soc[:, u])
+                state.solar_soc[:, u] = np.where(go, state.solar_soc[:, u] + solar_charged, state.solar_soc[:, u])
+
+                actual_wind = slice_wind - leftover_wind
+                actual_solar = slice_solar - leftover_solar
+                rem_wind = np.where(go, np.maximum(0.0, rem_wind - actual_wind), rem_wind)
+                rem_solar = np.where(go, np.maximum(0.0, rem_solar - actual_solar), rem_solar)
+                hour_loss += np.where(go, np.maximum(0.0, loss), 0.0)
+                charging &= ~(go & (rem_wind + rem_solar < 1e-6))
+
+        remaining_surplus = np.where(met, rem_wind + rem_solar, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            to_grid_wind = np.where(remaining_surplus != 0, remaining_surplus * (rem_wind / remaining_surplus), 0.0)
+            to_grid_solar = np.where(remaining_surplus != 0, remaining_surplus * (rem_solar / remaining_surplus), 0.0)
+        acc["excess_wind"] += to_grid_wind
+        acc["excess_solar"] += to_grid_solar
+        acc["redundant_wind"] += np.where(met, rem_wind - to_grid_wind, 0.0)
+        acc["redundant_solar"] += np.where(met, rem_solar - to_grid_solar, 0.0)
+        acc["charged_wind"] += np.where(met, wind_surplus - rem_wind, 0.0)
+        acc["charged_solar"] += np.where(met, solar_surplus - rem_solar, 0.0)
+        acc["excess_energy"] += remaining_surplus
+
+        # Deficit hours: discharge storages in priority order
+        discharged_total = np.zeros(n)
+        wind_delivered = np.zeros(n)
+        solar_delivered = np.zeros(n)
+        if short.any():
+            if state.last_day != days[h]:
+                state.daily_discharged[:] = 0.0
+                state.last_day = days[h]
+
+            shortfall = np.where(short, bl - total_gen, 0.0)
+            for u in range(state.active_columns):
+                visit = short & (shortfall > 0)
+                if not visit.any():
+                    break
+                soc = state.soc[:, u]
+                remaining_quota = state.daily_limit[:, u] - state.daily_discharged[:, u]
+
+                skip = visit & ((remaining_quota <= 0) | (soc <= 0))
+                state.zero_hours[:, u] += skip & (soc <= 0)
+                wind_delivered = np.where(skip, 0.0, wind_delivered)
+                solar_delivered = np.where(skip, 0.0, solar_delivered)
+
+                go = visit & ~skip
+                safe_soc = np.where(go, soc, 1.0)
+                discharged = np.where(go, np.minimum(np.minimum(state.max_step_energy[:, u], soc),
+                                                     np.minimum(shortfall / eff, remaining_quota)), 0.0)
+                wind_used = discharged * (state.wind_soc[:, u] / safe_soc)
+                solar_used = discharged * (state.solar_soc[:, u] / safe_soc)
+
+                state.soc[:, u] = np.where(go, soc - discharged, soc)
+                state.wind_soc[:, u] = np.where(go, state.wind_soc[:, u] - wind_used, state.wind_soc[:, u])
+                state.solar_soc[:, u] = np.where(go, state.solar_soc[:, u] - solar_used, state.solar_soc[:, u])
+                state.daily_discharged[:, u] += discharged
+                state.yearly_discharged[:, u] += discharged
+
+                delivered = discharged * eff
+                wind_delivered = np.where(go, wind_used * eff, wind_delivered)
+                solar_delivered = np.where(go, solar_used * eff, solar_delivered)
+                state.zero_hours[:, u] += go & (delivered == 0)
+
+                discharged_total += delivered
+                hour_loss += discharged - delivered
+                shortfall = np.where(go, shortfall - delivered, shortfall)
+
+            # Idle (0 MW) units come last; visiting one clears the wind/solar split like StorageFleet.discharge does
+            cleared = short & (shortfall > 0) & state.has_idle
+            wind_delivered = np.where(cleared, 0.0, wind_delivered)
+            solar_delivered = np.where(cleared, 0.0, solar_delivered)
+
+        produced = total_gen + discharged_total
+        acc["produced_total"] += np.where(met, bl, produced)
+        acc["wind_in_baseload"] += np.where(met, 0.0, wind_delivered)
+        acc["solar_in_baseload"] += np.where(met, 0.0, solar_delivered)
+        acc["hours_met"] += met | (produced >= bl)
+        missing = np.where(short & (produced < bl), bl - produced, 0.0)
+        acc["missing_energy"] += missing
+        acc["cycle_loss_total"] += hour_loss
+
+        if per_column_spot:
+            priced = ~np.isnan(spot)
+            for key, energy in (("missing", missing), ("excess", remaining_surplus), ("wind", w), ("solar", s)):
+                positive = np.where(priced & (energy > 0), energy, 0.0)
+                vwap[key][0] += positive
+                vwap[key][1] += np.where(priced, positive * spot, 0.0)
+        elif not np.isnan(spot):
+            for key, energy in (("missing", missing), ("excess", remaining_surplus), ("wind", w), ("solar", s)):
+                positive = np.where(energy > 0, energy, 0.0)
+                vwap[key][0] += positive
+                vwap[key][1] += positive * spot
+
+    for key, (energy_sum, value_sum) in vwap.items():
+        with np.errstate(divide="ignore", invalid="ignore"):
+            acc[f"vwap_{key}"] = np.where(energy_sum > 0, value_sum / energy_sum, 0.0)
+    return acc
+
+
+def _year_results(
+    state: _FleetState,
+    acc: Dict[str, np.ndarray],
+    year: int,
+    wind_caps: np.ndarray,
+    solar_caps: np.ndarray,
+    baseloads: np.ndarray,
+    battery_mw: np.ndarray,
+    wind_totals: np.ndarray,
+    solar_totals: np.ndarray,
+    avg_spot: np.ndarray,
+    total_hours,
+    step_hours: float,
+    prices: Dict[str, float],
+) -> List[Dict]:
+    """
+    Turns the yearly totals of _dispatch_year into one simulate_dispatch result dict per
+    configuration, 'Simulation id' being the 1-based configuration index.
+    """
+    total_storage_cost = sum(prices[f"battery_{d}h_price"] for d in BATTERY_DURATIONS)
+    yearly_cycles = np.divide(state.yearly_discharged, state.max_volume,
+                              out=np.zeros_like(state.max_volume), where=state.max_volume > 0)
+
+    rows = []
+    for c in range(len(wind_caps)):
+        metrics = init_metrics(prices["wind_price"], prices["solar_price"],
+                               *(prices[f"battery_{d}h_price"] for d in BATTERY_DURATIONS),
+                               prices["missing_energy_price"])
+        for key in _METRIC_KEYS:
+            metrics[key] = float(acc[key][c])
+        metrics["hours_met"] = steps_to_hours(int(acc["hours_met"][c]), step_hours)
+        metrics["cycle_loss_total"] = float(acc["cycle_loss_total"][c])
+        metrics["missing_energy"] = max(0, metrics["missing_energy"] - metrics["cycle_loss_total"])
+
+        battery_row = battery_mw[c]
+        result = compile_result(
+            year, float(wind_caps[c]), float(solar_caps[c]), float(baseloads[c]), total_hours,
+            *battery_row.tolist(),
+            metrics["wind_in_baseload"], metrics["solar_in_baseload"], wind_totals[c], solar_totals[c],
+            round(float(acc["vwap_missing"][c]), 4), round(float(acc["vwap_excess"][c]), 4),
+            round(float(acc["vwap_wind"][c]), 4), round(float(acc["vwap_solar"][c]), 4), metrics
+        )
+        apply_price_metrics(result, wind_totals[c], solar_totals[c], total_hours, float(baseloads[c]),
+                            prices["wind_price"], prices["solar_price"], total_storage_cost,
+                            prices["missing_energy_price"], avg_spot[c])
+        result["Simulation id"] = c + 1
+
+        for column, unit in enumerate(state.unit_of_column[c]):
+            apply_storage_metrics(result, STORAGE_NAMES[unit], state.max_charge[c, column], yearly_cycles[c, column],
+                                  state.zero_hours[c, column] * step_hours, total_hours)
+        rows.append(result)
+    return rows
+
+
+def sweep_dispatch(
+    profile_file,
+    grid: pd.DataFrame,
+    is_baseload_mode: bool,
+    wind_price: float,
+    solar_price: float,
+    battery_1h_price: float,
+    battery_2h_price: float,
+    battery_4h_price: float,
+    battery_6h_price: float,
+    battery_8h_price: float,
+    battery_12h_price: float,
+    missing_energy_price: float,
+    bess_rte: float = 0.86,
+) -> pd.DataFrame:
+    """
+    Runs simulate_dispatch for every configuration of a grid in one pass.
+
+    All configurations advance through the profile together, with a configuration axis on
+    the storage state, instead of one full simulation per configuration. Configurations
+    without storage power have no state and are evaluated for all steps at once. The step
+    loop only pays off from about SWEEP_MIN_CONFIGS configurations with storage; smaller
+    grids run them one by one through simulate_dispatch, with the same results.
+
+    Args:
+        profile_file: Profile file path or ProfileBundle.
+        grid: One row per configuration with wind_cap, solar_cap, baseload and battery_Xh_mw
+            columns (see build_grid); missing battery columns count as 0 MW.
+        Remaining arguments: as in simulate_dispatch, shared by all configurations.
+
+    Returns:
+        One row per configuration and year with the simulate_dispatch result columns;
+        'Simulation id' is the 1-based grid row.
+    """
+    profiles = load_profile_bundle(profile_file)
+    grid = grid.reset_index(drop=True)
+    wind_caps = grid["wind_cap"].to_numpy(dtype=np.float64)
+    solar_caps = grid["solar_cap"].to_numpy(dtype=np.float64)
+    baseloads = grid["baseload"].to_numpy(dtype=np.float64)
+    battery_mw = np.column_stack([
+        grid[f"battery_{d}h_mw"].to_numpy(dtype=np.float64) if f"battery_{d}h_mw" in grid else np.zeros(len(grid))
+        for d in BATTERY_DURATIONS
+    ])
+    prices = dict(wind_price=wind_price, solar_price=solar_price, battery_1h_price=battery_1h_price,
+                  battery_2h_price=battery_2h_price, battery_4h_price=battery_4h_price,
+                  battery_6h_price=battery_6h_price, battery_8h_price=battery_8h_price,
+                  battery_12h_price=battery_12h_price, missing_energy_price=missing_energy_price)
+
+    with_storage = (battery_mw > 0).any(axis=1)
+    subsets = [np.flatnonzero(~with_storage), np.flatnonzero(with_storage)]
+    rows = []
+    if len(subsets[1]) < SWEEP_MIN_CONFIGS:
+        for c in subsets.pop():
+            wind_prod, solar_prod = get_profiles(wind_caps[c], solar_caps[c], profiles)
+            batteries = {f"battery_{d}h_mw": battery_mw[c, k] for k, d in enumerate(BATTERY_DURATIONS)}
+            results, _ = simulate_dispatch(profiles, wind_prod, solar_prod, baseloads[c], is_baseload_mode,
+                                           wind_caps[c], solar_caps[c], **prices, **batteries, bess_rte=bess_rte,
+                                           simulation_id=int(c) + 1, use_cache=False, collect_hourly="none")
+            rows.extend(results)
+
+    for subset in subsets:
+        if len(subset):
+            rows.extend(_sweep_configs(profiles, is_baseload_mode, wind_caps[subset], solar_caps[subset],
+                                       baseloads[subset], battery_mw[subset], subset + 1, prices, bess_rte))
+
+    # Same row order as a batch run: configuration by configuration, years within each
+    rows.sort(key=lambda r: r["Simulation id"])
+    return pd.DataFrame(rows)
+
+
+def _sweep_configs(
+    profiles: ProfileBundle,
+    is_baseload_mode: bool,
+    wind_caps: np.ndarray,
+    solar_caps: np.ndarray,
+    baseloads: np.ndarray,
+    battery_mw: np.ndarray,
+    simulation_ids: np.ndarray,
+    prices: Dict[str, float],
+    bess_rte: float,
+) -> List[Dict]:
+    """Yearly results of sweep_dispatch for some configurations of the grid, advanced together."""
+    n = len(wind_caps)
+    state = _FleetState(battery_mw, bess_rte, profiles.step_hours)
+    rows = []
+    for year in profiles.years:
+        span = profiles.year_slice(year)
+        steps = span.stop - span.start
+        total_hours = steps_to_hours(steps, profiles.step_hours)
+        cnp_year = profiles.cnp[span]
+        demand_scale = np.ones(steps) if is_baseload_mode else cnp_year / cnp_year.mean()
+
+        acc = _dispatch_year(state, wind_caps, solar_caps, demand_scale, baseloads, profiles.wind_profile[span],
+                             profiles.solar_profile[span], profiles.spot[span], profiles.day[span],
+                             profiles.step_hours)
+        wind_totals = np.array([(wind_caps[c] * profiles.wind_profile[span]).sum() for c in range(n)])
+        solar_totals = np.array([(solar_caps[c] * profiles.solar_profile[span]).sum() for c in range(n)])
+        wind_totals *= profiles.step_hours
+        solar_totals *= profiles.step_hours
+        avg_spot = np.full(n, np.nanmean(profiles.spot[span]))
+
+        rows.extend(_year_results(state, acc, year, wind_caps, solar_caps, baseloads, battery_mw, wind_totals,
+                                  solar_totals, avg_spot, total_hours, profiles.step_hours, prices))
+        state.yearly_discharged[:] = 0.0
+        state.zero_hours[:] = 0.0
+
+    for row in rows:
+        row["Simulation id"] = int(simulation_ids[row["Simulation id"] - 1])
+    return rows
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 from constraints import EXCESS_ENERGY_PRICE_FIXED
@@ -13,6 +14,18 @@ def vwap_energy(df: pd.DataFrame, energy_col: str, price_col: str) -> float:
     vwap = (filtered[energy_col] * filtered[price_col]).sum() / filtered[energy_col].sum()
     return round(vwap, 4)
 
+def vwap_arrays(energy: np.ndarray, price: np.ndarray) -> float:
+    """Same as vwap_energy, on aligned energy/price arrays."""
+    mask = (energy > 0) & ~np.isnan(price)
+    filtered_energy = energy[mask]
+    energy_sum = filtered_energy.sum()
+
+    if filtered_energy.size == 0 or energy_sum == 0:
+        return 0.0
+
+    vwap = (filtered_energy * price[mask]).sum() / energy_sum
+    return round(float(vwap), 4)
+
 def share_allocation(wind: float, solar: float, surplus: float) -> (float, float):
     total = wind + solar
     if total == 0:
@@ -1,12 +1,74 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, Iterable, Optional
 
+import numpy as np
 import pandas as pd
 
-from config import YIELD_LV, PV_WIND_PROD_LV, PV_WIND_PROD_LT, YIELD_LT, PV_WIND_PROD_PL, YIELD_PL
+from config import (PROFILE_CACHE_DIR, PROFILE_FILES, PV_WIND_PROD_EE, PV_WIND_PROD_LT, PV_WIND_PROD_LV,
+                    PV_WIND_PROD_PL, YIELD_EE, YIELD_LT, YIELD_LV, YIELD_PL)
+from utils.process_pool import POOL_CONTEXT
+from utils.profile_store import ProfileStore, built_path
 
+# Raw hourly production and annual yield per MW of every country, normalised by build_profiles
+PRODUCTION_SOURCES = {
+    "EE": (PV_WIND_PROD_EE, YIELD_EE),
+    "LV": (PV_WIND_PROD_LV, YIELD_LV),
+    "LT": (PV_WIND_PROD_LT, YIELD_LT),
+    "PL": (PV_WIND_PROD_PL, YIELD_PL),
+}
 
-def load_profiles(data_hourly, data_yearly
-) -> pd.DataFrame:
+# Hourly production column -> annual yield column
+ANNUAL_YIELD_COLUMNS = {
+    "Wind": "WIND - Annual prod MWh, MW",
+    "Solar": "SOLAR - Annual prod MWh, MW",
+}
+
+# Hours a year may lack against the calendar (the DST spring-forward hour is one)
+MAX_MISSING_HOURS_PER_YEAR = 48
+
+
+def normalize_production(df_hourly: pd.DataFrame, df_yearly: pd.DataFrame) -> pd.DataFrame:
+    """
+    Scales hourly wind and solar production so every year sums to its annual yield per MW.
+
+    Hours are rounded to the whole hour first (Excel stores them with millisecond errors, which
+    can put midnight in the previous year). Production is forward-filled; hours still without
+    data, and years without any production, get a profile of 0.
+
+    Args:
+        df_hourly: Raw production with columns 'Hour', 'Wind' and 'Solar'.
+        df_yearly: Annual production per MW of installed capacity, one row per 'Year'.
+
+    Returns:
+        A DataFrame with columns 'Hour', 'Year', 'wind_profile', 'solar_profile', plus
+        'wind_no_data' / 'solar_no_data' flags for the hours set to 0.
+    """
+    hours = pd.to_datetime(df_hourly["Hour"]).dt.round("h")
+    year = hours.dt.year
+
+    annual = df_yearly.dropna(subset=["Year"]).drop_duplicates("Year").set_index("Year")
+    annual.index = annual.index.astype(int)
+    missing_years = sorted(int(y) for y in set(year.unique()) - set(annual.index))
+    if missing_years:
+        raise ValueError(f"No annual yield for years {missing_years}.")
+
+    out = pd.DataFrame({"Hour": hours, "Year": year})
+    for column, yield_column in ANNUAL_YIELD_COLUMNS.items():
+        production = df_hourly[column].ffill()
+        yearly_total = production.groupby(year).transform("sum")
+        profile = production / (yearly_total / year.map(annual[yield_column].astype(float)))
+
+        name = column.lower()
+        out[f"{name}_no_data"] = profile.isna().to_numpy()
+        out[f"{name}_profile"] = profile.fillna(0.0).to_numpy()
+
+    return out
+
+
+def load_profiles(data_hourly, data_yearly) -> pd.DataFrame:
     """
     Loads and normalizes hourly wind and solar production profiles for each year using annual production data.
 
@@ -17,35 +79,129 @@ def load_profiles(data_hourly, data_yearly
     Returns:
         A DataFrame indexed by datetime with columns: 'Year', 'wind_profile', 'solar_profile'.
     """
-    df_hourly = pd.read_excel(data_hourly).ffill()
-    df_yearly = pd.read_excel(data_yearly).ffill()
+    df = normalize_production(pd.read_excel(data_hourly), pd.read_excel(data_yearly))
+    return df.set_index("Hour")[["Year", "wind_profile", "solar_profile"]]
 
-    df_hourly['Hour'] = pd.to_datetime(df_hourly['Hour'])
-    df_hourly['Year'] = df_hourly['Hour'].dt.year
 
-    df_hourly['wind_profile'] = 0.0
-    df_hourly['solar_profile'] = 0.0
+def check_hours(hours: pd.DatetimeIndex, max_missing_per_year: int = MAX_MISSING_HOURS_PER_YEAR) -> Dict:
+    """
+    Validates an hourly timeline: strictly increasing, and no year short of its calendar hours
+    by more than max_missing_per_year. Raises ValueError otherwise.
 
-    for year in df_yearly['Year'].unique():
-        mask = df_hourly['Year'] == year
+    Returns:
+        'hours_per_year' (year -> hours) and 'gaps' (list of [last hour before, missing hours]).
+    """
+    if len(hours) == 0:
+        raise ValueError("Profile has no hours.")
+    steps = np.round(np.diff(hours.values) / np.timedelta64(1, "h")).astype(np.int64)
+    if (steps <= 0).any():
+        first = hours[1:][steps <= 0][0]
+        raise ValueError(f"Hours are not strictly increasing (duplicate or out of order at {first}).")
+
+    gap_at = np.flatnonzero(steps > 1)
+    gaps = [[str(hours[k]), int(steps[k] - 1)] for k in gap_at]
+
+    years = hours.year
+    hours_per_year = pd.Series(1, index=years).groupby(level=0).sum()
+    short = {}
+    for year, count in hours_per_year.items():
+        calendar_hours = 8784 if pd.Timestamp(year=year, month=12, day=31).dayofyear == 366 else 8760
+        if calendar_hours - count > max_missing_per_year:
+            short[int(year)] = int(calendar_hours - count)
+    if short:
+        raise ValueError(f"Years missing more than {max_missing_per_year} hours: {short}")
+
+    return {"hours_per_year": {int(y): int(n) for y, n in hours_per_year.items()}, "gaps": gaps}
+
+
+def build_country_profiles(country: str, cache_dir=PROFILE_CACHE_DIR) -> Dict:
+    """
+    Builds the profile store entry of one country: wind and solar profiles normalised from its
+    PV_WIND_PROD / YIELD workbooks, on the hours of its profiles workbook, which also supplies
+    spot and cnp. Profile hours without production take the previous hour's value. The entry
+    is stored as config.BUILT_PROFILE_FILES[country], next to the workbook's own.
 
-        wind_hourly = df_hourly.loc[mask, 'Wind']
-        solar_hourly = df_hourly.loc[mask, 'Solar']
+    Returns:
+        A report of the build: the path to load it by, rows, hours per year, gaps, hours filled
+        or dropped and hours without production data.
+    """
+    production_file, yield_file = PRODUCTION_SOURCES[country]
+    profile_file = PROFILE_FILES[country]
+
+    production = normalize_production(pd.read_excel(production_file), pd.read_excel(yield_file))
+    check_hours(pd.DatetimeIndex(production["Hour"]))
+
+    market = pd.read_excel(profile_file, usecols=["Hour", "spot", "cnp"])
+    hours = pd.DatetimeIndex(pd.to_datetime(market["Hour"]).dt.round("h"))
+    report = check_hours(hours)
+
+    profiles = production.set_index("Hour")[["wind_profile", "solar_profile", "wind_no_data", "solar_no_data"]]
+    aligned = profiles.reindex(hours)
+    filled = int(aligned["wind_profile"].isna().sum())
+    aligned = aligned.ffill().bfill()
+
+    ProfileStore(cache_dir).write(profile_file, {
+        "Hour": hours.to_numpy(dtype="datetime64[ns]"),
+        "spot": market["spot"].to_numpy(dtype=np.float64),
+        "cnp": market["cnp"].to_numpy(dtype=np.float64),
+        "wind_profile": aligned["wind_profile"].to_numpy(dtype=np.float64),
+        "solar_profile": aligned["solar_profile"].to_numpy(dtype=np.float64),
+    }, built_from=[profile_file, production_file, yield_file])
+
+    report.update({
+        "country": country,
+        "profile_file": str(built_path(profile_file)),
+        "rows": len(hours),
+        "filled_hours": filled,
+        "dropped_hours": int(len(profiles) - profiles.index.isin(hours).sum()),
+        "wind_no_data_hours": int(aligned["wind_no_data"].astype(bool).sum()),
+        "solar_no_data_hours": int(aligned["solar_no_data"].astype(bool).sum()),
+    })
+    return report
+
+
+def _build_country_task(task: tuple) -> Dict:
+    return build_country_profiles(*task)
+
+
+def build_profiles(countries: Optional[Iterable[str]] = None, workers: int = 4,
+                   cache_dir=PROFILE_CACHE_DIR) -> Dict[str, Dict]:
+    """
+    Rebuilds the profile store entries of several countries (default: all), each on its own
+    process. Returns the build report of every country (see build_country_profiles).
+    """
+    countries = list(countries or PRODUCTION_SOURCES)
+    unknown = [c for c in countries if c not in PRODUCTION_SOURCES]
+    if unknown:
+        raise ValueError(f"Unknown countries {unknown}, expected some of {list(PRODUCTION_SOURCES)}.")
 
-        wind_annual = df_yearly.loc[df_yearly['Year'] == year, 'WIND - Annual prod MWh, MW'].values[0]
-        solar_annual = df_yearly.loc[df_yearly['Year'] == year, 'SOLAR - Annual prod MWh, MW'].values[0]
+    tasks = [(country, cache_dir) for country in countries]
+    workers = max(1, min(int(workers), len(tasks)))
+    if workers == 1:
+        return {country: build_country_profiles(*task) for country, task in zip(countries, tasks)}
 
-        df_hourly.loc[mask, 'wind_profile'] = wind_hourly / (wind_hourly.sum() / wind_annual)
-        df_hourly.loc[mask, 'solar_profile'] = solar_hourly / (solar_hourly.sum() / solar_annual)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=POOL_CONTEXT) as pool:
+        return dict(zip(countries, pool.map(_build_country_task, tasks)))
 
-    df_hourly[['Hour', 'Year', 'wind_profile', 'solar_profile']].to_excel('/Users/kevineriksson/PycharmProjects/Simulation/data/profiles_LV.xlsx', index=False)
-    return df_hourly[['Year', 'wind_profile', 'solar_profile']]
 
 def extract_from_file(file) -> pd.DataFrame:
-    df = pd.read_excel(file)
+    """Reads a batch input table from the Excel template or a .csv file (path or uploaded file)."""
+    name = str(getattr(file, "name", file))
+    if name.lower().endswith(".csv"):
+        df = pd.read_csv(file)
+    else:
+        df = pd.read_excel(file)
     df.dropna(how='all', inplace=True)
     return df
 
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the profile store from the production and yield workbooks.")
+    parser.add_argument("countries", nargs="*", help=f"countries to build (default: {' '.join(PRODUCTION_SOURCES)})")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="parallel processes")
+    args = parser.parse_args()
 
-
+    for country, report in build_profiles(args.countries, args.workers).items():
+        print(f"{country}: {report['rows']} hours, {len(report['gaps'])} gaps, "
+              f"{report['filled_hours']} filled, {report['dropped_hours']} dropped, "
+              f"no data: wind {report['wind_no_data_hours']} h, solar {report['solar_no_data_hours']} h")
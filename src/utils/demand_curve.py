@@ -0,0 +1,165 @@
+"""
+Customer load curves for "Consumption Curve" mode.
+
+A DemandCurve is read once from a CSV or Parquet file (hourly, 15-minute or any regular step)
+and aligned to the steps of a profile; the aligned profile is cached by the content hashes of
+both, so every run on it is an ordinary consumption-curve run with the customer's load in
+place of the country's cnp:
+
+    curve = DemandCurve.from_file("customer_load.parquet")
+    profiles = curve.apply(load_profile_bundle(PROFILES_EE))
+    simulate_dispatch(profiles, ..., is_baseload_mode=False, ...)
+
+As with cnp, only the shape of the curve matters: each year's demand is baseload x curve /
+the curve's mean over that year.
+"""
+import hashlib
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from models.profile_bundle import ProfileBundle, _step_hours
+
+# Column names recognised for the timestamps and the load, checked in this order
+TIME_COLUMNS = ("timestamp", "time", "datetime", "date", "hour")
+LOAD_COLUMNS = ("load", "demand", "consumption", "cnp", "mw", "mwh")
+
+_aligned_cache: "OrderedDict[tuple, ProfileBundle]" = OrderedDict()
+ALIGNED_CACHE_SIZE = 16
+
+
+class DemandCurve:
+    """
+    A load curve with its own timestamps.
+
+    Attributes:
+        index: Timestamps, increasing and unique.
+        values: Load at every timestamp (any unit; only the shape is used).
+        step_hours: Step length of the curve in hours.
+        name: File name the curve was read from, if any.
+    """
+
+    def __init__(self, index, values, name: Optional[str] = None):
+        series = pd.Series(np.asarray(values, dtype=np.float64), index=pd.DatetimeIndex(index))
+        series = series.sort_index()
+        if series.isna().any():
+            raise ValueError("The demand curve has missing values.")
+        if (series < 0).any():
+            raise ValueError("The demand curve has negative values.")
+
+        self.step_hours = _step_hours(series.index)
+        step = pd.Timedelta(hours=self.step_hours)
+        # A DST change repeats an hour: average the repeated steps
+        series = series.groupby(series.index.round(step)).mean()
+
+        self.index = series.index
+        self.values = series.to_numpy()
+        self.name = name
+        self._digest = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, name: Optional[str] = None) -> "DemandCurve":
+        """
+        Builds a curve from a table with a timestamp column (TIME_COLUMNS, else the first column)
+        and a load column (LOAD_COLUMNS, else the first other numeric column).
+        """
+        columns = {str(c).strip().lower(): c for c in df.columns}
+        time_column = next((columns[c] for c in TIME_COLUMNS if c in columns), df.columns[0])
+        load_column = next((columns[c] for c in LOAD_COLUMNS if c in columns), None)
+        if load_column is None:
+            numeric = [c for c in df.select_dtypes("number").columns if c != time_column]
+            if not numeric:
+                raise ValueError("The demand curve file has no numeric load column.")
+            load_column = numeric[0]
+
+        df = df.dropna(how="all")
+        return cls(pd.to_datetime(df[time_column]), df[load_column], name)
+
+    @classmethod
+    def from_file(cls, file) -> "DemandCurve":
+        """Reads a .csv or .parquet file (path or uploaded file). Parquet needs pyarrow."""
+        name = str(getattr(file, "name", file))
+        if name.lower().endswith(".parquet"):
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError as e:
+                raise ImportError("Reading Parquet demand curves requires pyarrow (pip install pyarrow).") from e
+            df = pd.read_parquet(file)
+        elif name.lower().endswith(".csv"):
+            df = pd.read_csv(file)
+        else:
+            raise ValueError(f"Demand curves are read from .csv or .parquet files, got '{name}'.")
+        return cls.from_frame(df, name)
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def digest(self) -> str:
+        """Content hash of the timestamps and values, computed once."""
+        if self._digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            for values in (self.index.asi8, self.values):
+                h.update(np.ascontiguousarray(values).tobytes())
+            self._digest = h.hexdigest()
+        return self._digest
+
+    def align(self, profiles: ProfileBundle) -> np.ndarray:
+        """
+        The curve on the steps of profiles. A finer curve is averaged over every profile step,
+        a coarser one is held for all profile steps within its step. Profile steps outside the
+        curve's dates take its value on the same date and time of day (the mean over the
+        curve's years; 29 February falls back to 28 February), so one year of customer load
+        covers a multi-year profile.
+        """
+        curve_minutes = int(round(self.step_hours * 60))
+        profile_minutes = int(round(profiles.step_hours * 60))
+        if curve_minutes % profile_minutes and profile_minutes % curve_minutes:
+            raise ValueError(f"A demand curve in {curve_minutes} min steps does not fit profile steps "
+                             f"of {profile_minutes} min.")
+
+        series = pd.Series(self.values, index=self.index)
+        if curve_minutes < profile_minutes:
+            series = series.resample(f"{profile_minutes}min").mean().dropna()
+            curve_minutes = profile_minutes
+
+        keys = profiles.index.round(f"{profile_minutes}min").floor(f"{curve_minutes}min")
+        aligned = series.reindex(keys).to_numpy(copy=True)
+
+        missing = np.isnan(aligned)
+        if missing.any():
+            typical = series.groupby(_calendar_key(series.index)).mean()
+            wanted = _calendar_key(keys[missing])
+            filled = typical.reindex(wanted).to_numpy(copy=True)
+            feb29 = np.isnan(filled) & (keys[missing].month == 2) & (keys[missing].day == 29)
+            filled[feb29] = typical.reindex(wanted[feb29] - 10_000).to_numpy()
+            aligned[missing] = filled
+        if np.isnan(aligned).any():
+            raise ValueError(f"The demand curve does not cover {int(np.isnan(aligned).sum())} profile steps "
+                             f"(dates and times of day it has no value for).")
+        return aligned
+
+    def apply(self, profiles: ProfileBundle) -> ProfileBundle:
+        """
+        A bundle with the profile's wind, solar and spot and this curve as cnp, cached by the
+        content hashes of the curve and the profile. It has no source file, so runs needing
+        one (parallel years) are not available on it; batches take the curve separately.
+        """
+        key = (self.digest, profiles.digest)
+        bundle = _aligned_cache.get(key)
+        if bundle is None:
+            bundle = ProfileBundle(profiles.index, profiles.wind_profile, profiles.solar_profile, profiles.spot,
+                                   self.align(profiles))
+            _aligned_cache[key] = bundle
+            while len(_aligned_cache) > ALIGNED_CACHE_SIZE:
+                _aligned_cache.popitem(last=False)
+        _aligned_cache.move_to_end(key)
+        return bundle
+
+
+def _calendar_key(index: pd.DatetimeIndex) -> np.ndarray:
+    # month, day and minute of day as one integer: MMDD followed by 4 minute digits
+    minutes = index.hour * 60 + index.minute
+    return np.asarray((index.month * 100 + index.day) * 10_000 + minutes)
@@ -0,0 +1,232 @@
+"""
+Per-stage timing and memory instrumentation, recorded for the caller that asks for it.
+
+Stages are marked with the instrumented decorator or the stage() context manager:
+
+    @instrumented("simulate_dispatch")
+    def simulate_dispatch(...): ...
+
+    with stage("hourly_loop"):
+        ...
+
+A marked stage records into the Instrumentation active in the calling context, and only
+checks one context variable when there is none. Callers activate their own, so concurrent
+runs (app sessions, background batch jobs) never record into each other:
+
+    recorder = Instrumentation()
+    with recorder.recording():
+        run_batch(...)
+    recorder.report()
+
+Every stage records its call count, wall time (total and slowest call) and, when memory
+tracking is on, the peak Python allocation above the memory in use when it started (through
+tracemalloc). Times include nested stages. tracemalloc traces the whole process, so memory
+figures are only right when nothing else runs in it: track memory from the CLI or the
+benchmarks, not from a server process.
+
+New threads start without an active Instrumentation, and years or batch rows run on worker
+processes are not recorded either.
+"""
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterator, Optional
+
+
+class StageStats:
+    """
+    Totals of one stage.
+
+    Attributes:
+        calls: Number of times the stage ran.
+        seconds: Total wall time over all calls.
+        max_seconds: Wall time of the slowest call.
+        peak_bytes: Largest allocation peak of a call, above the memory in use at its start.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.peak_bytes = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "seconds": self.seconds,
+            "mean_seconds": self.seconds / self.calls if self.calls else 0.0,
+            "max_seconds": self.max_seconds,
+            "peak_mb": self.peak_bytes / 2**20,
+        }
+
+
+class _Frame:
+    __slots__ = ("start_bytes", "peak_bytes")
+
+    def __init__(self, start_bytes: int):
+        self.start_bytes = start_bytes
+        self.peak_bytes = start_bytes
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("owner", "name", "start", "frame")
+
+    def __init__(self, owner: "Instrumentation", name: str):
+        self.owner = owner
+        self.name = name
+
+    def __enter__(self):
+        self.frame = self.owner._push() if self.owner.track_memory and tracemalloc.is_tracing() else None
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        peak = self.owner._pop(self.frame) if self.frame is not None else 0
+        self.owner._record(self.name, elapsed, peak)
+        return False
+
+
+class Instrumentation:
+    """
+    Collects StageStats by stage name while it is active, see recording() and use_instrumentation().
+
+    Attributes:
+        track_memory: Whether allocation peaks are recorded (slows Python code down noticeably).
+    """
+
+    def __init__(self, track_memory: bool = False):
+        self.track_memory = track_memory
+        self.stages: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def recording(self) -> Iterator["Instrumentation"]:
+        """Records the stages run in the enclosed block (in the calling context) into this instance."""
+        started_tracemalloc = self.track_memory and not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start()
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+            if started_tracemalloc:
+                tracemalloc.stop()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stages = {}
+
+    def stage(self, name: str):
+        """Context manager recording the enclosed block as stage name into this instance."""
+        return _Stage(self, name)
+
+    def report(self) -> Dict[str, Dict]:
+        """Stage name -> stats dict, slowest total first."""
+        with self._lock:
+            items = sorted(self.stages.items(), key=lambda item: item[1].seconds, reverse=True)
+            return {name: stats.to_dict() for name, stats in items}
+
+    def to_json(self, path) -> None:
+        with open(path, "w") as f:
+            json.dump({"stages": self.report()}, f, indent=2)
+
+    def _record(self, name: str, seconds: float, peak_bytes: int) -> None:
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats()
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.peak_bytes = max(stats.peak_bytes, peak_bytes)
+
+    # tracemalloc keeps one peak per process; every stage boundary folds it into the open
+    # frames and resets it, so nested stages each get their own peak.
+    def _frames(self) -> list:
+        frames = getattr(self._local, "frames", None)
+        if frames is None:
+            frames = self._local.frames = []
+        return frames
+
+    def _push(self) -> _Frame:
+        current, peak = tracemalloc.get_traced_memory()
+        frames = self._frames()
+        if frames:
+            frames[-1].peak_bytes = max(frames[-1].peak_bytes, peak)
+        tracemalloc.reset_peak()
+        frame = _Frame(current)
+        frames.append(frame)
+        return frame
+
+    def _pop(self, frame: _Frame) -> int:
+        _, peak = tracemalloc.get_traced_memory()
+        frames = self._frames()
+        frames.pop()
+        frame.peak_bytes = max(frame.peak_bytes, peak)
+        if frames:
+            frames[-1].peak_bytes = max(frames[-1].peak_bytes, frame.peak_bytes)
+        tracemalloc.reset_peak()
+        return frame.peak_bytes - frame.start_bytes
+
+
+# The Instrumentation stages record into; each thread or task has its own (none by default)
+_active: ContextVar[Optional[Instrumentation]] = ContextVar("instrumentation", default=None)
+
+
+def active_instrumentation() -> Optional[Instrumentation]:
+    """The Instrumentation stages of the calling context record into, None when not recording."""
+    return _active.get()
+
+
+def use_instrumentation(recorder: Optional[Instrumentation]) -> None:
+    """
+    Makes recorder active for the rest of the calling context (None stops recording), for
+    callers that cannot wrap their run in recording(), e.g. a Streamlit script run. It does not
+    start memory tracking.
+    """
+    _active.set(recorder)
+
+
+def stage(name: str):
+    """Context manager recording the enclosed block as stage name, if an Instrumentation is active."""
+    recorder = _active.get()
+    if recorder is None:
+        return _NULL_STAGE
+    return _Stage(recorder, name)
+
+
+def instrumented(name: Optional[str] = None) -> Callable:
+    """Decorator recording every call of the function as stage name (default: the function name)."""
+
+    def decorator(fn):
+        stage_name = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            recorder = _active.get()
+            if recorder is None:
+                return fn(*args, **kwargs)
+            with _Stage(recorder, stage_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,7 @@
+import multiprocessing
+
+# Start method of every process pool of the simulation. Pools are started from threads (BatchJob,
+# the Streamlit script thread): a forked worker would copy the locks those threads hold mid-use.
+# Spawned workers re-import the main module, so scripts that start a pool need a
+# `if __name__ == "__main__":` guard.
+POOL_CONTEXT = multiprocessing.get_context("spawn")
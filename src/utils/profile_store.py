@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import BUILT_PROFILE_SUFFIX, PROFILE_CACHE_DIR
+
+PROFILE_COLUMNS = ("Hour", "spot", "cnp", "wind_profile", "solar_profile")
+
+_META_FILE = "meta.json"
+_HASH_CHUNK = 1 << 20
+
+
+def is_built(profile_file) -> bool:
+    """True for the path of built profiles (config.BUILT_PROFILE_FILES), False for a workbook."""
+    return Path(profile_file).suffix == BUILT_PROFILE_SUFFIX
+
+
+def built_path(profile_file) -> Path:
+    """The path the profiles built for a workbook are stored and loaded under."""
+    return Path(profile_file).with_suffix(BUILT_PROFILE_SUFFIX)
+
+
+def profile_source(profile_file) -> str:
+    """'built' or 'workbook' for a profile path, 'in-memory' for anything else (e.g. a ProfileBundle)."""
+    path = getattr(profile_file, "source", profile_file)
+    if not isinstance(path, (str, os.PathLike)):
+        return "in-memory"
+    return "built" if is_built(path) else "workbook"
+
+
+def file_digest(path) -> str:
+    """Returns the sha256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ProfileStore:
+    """
+    Keeps a binary columnar copy of each profiles_XX.xlsx workbook.
+
+    Every column in PROFILE_COLUMNS is stored as its own .npy file so it can be
+    memory-mapped back without parsing. A cached copy is reused while the source
+    workbook keeps the same mtime/size, or, if those changed, the same sha256.
+
+    Columns built elsewhere (see utils.data_prep.build_profiles) are stored with write()
+    under their own path, built_path(workbook), never under the workbook itself. load() of
+    that path returns them while every file they were built from is unchanged and raises a
+    ValueError once they are missing or stale, so built and shipped profiles never mix.
+    """
+
+    def __init__(self, cache_dir=PROFILE_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def entry_dir(self, profile_file) -> Path:
+        source = Path(profile_file).resolve()
+        path_key = hashlib.sha1(str(source).encode()).hexdigest()[:8]
+        return self.cache_dir / f"{source.stem}-{path_key}"
+
+    def load(self, profile_file) -> Dict[str, np.ndarray]:
+        """
+        Returns the profile columns of a workbook as read-only memory-mapped arrays,
+        converting the workbook first if there is no valid cached copy. Built profiles
+        (a built_path()) are never converted: they have to be built first.
+        """
+        entry = self.entry_dir(profile_file)
+        if not self._is_valid(profile_file, entry):
+            if is_built(profile_file):
+                raise ValueError(f"No up-to-date built profiles for {Path(profile_file).name}; "
+                                 f"rebuild them with python -m utils.data_prep.")
+            self.convert(profile_file)
+
+        return {col: np.load(entry / f"{col}.npy", mmap_mode="r") for col in PROFILE_COLUMNS}
+
+    def load_frame(self, profile_file) -> pd.DataFrame:
+        """Returns the cached profiles as a DataFrame indexed by 'Hour', like pd.read_excel + set_index."""
+        columns = self.load(profile_file)
+        index = pd.DatetimeIndex(columns["Hour"], name="Hour")
+        return pd.DataFrame({col: columns[col] for col in PROFILE_COLUMNS[1:]}, index=index)
+
+    def convert(self, profile_file) -> Path:
+        """Parses the workbook once and writes its columns plus validation metadata to the cache."""
+        source = Path(profile_file)
+        entry = self.entry_dir(source)
+        entry.mkdir(parents=True, exist_ok=True)
+
+        # Stat before reading so a workbook saved mid-conversion is picked up next time
+        stat = source.stat()
+        df = pd.read_excel(source)
+
+        missing = [col for col in PROFILE_COLUMNS if col not in df.columns]
+        if missing:
+            raise ValueError(f"Profile file {source} is missing columns: {missing}")
+
+        arrays = {
+            "Hour": pd.to_datetime(df["Hour"]).to_numpy(dtype="datetime64[ns]"),
+            "spot": df["spot"].to_numpy(dtype=np.float64),
+            "cnp": df["cnp"].to_numpy(dtype=np.float64),
+            "wind_profile": df["wind_profile"].to_numpy(dtype=np.float64),
+            "solar_profile": df["solar_profile"].to_numpy(dtype=np.float64),
+        }
+
+        self._write_entry(entry, arrays, {
+            "source": str(source.resolve()),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": file_digest(source),
+            "rows": int(len(df)),
+            "columns": list(PROFILE_COLUMNS),
+        })
+        return entry
+
+    def write(self, profile_file, arrays: Dict[str, np.ndarray], built_from: List) -> Path:
+        """
+        Stores columns built outside the workbook under built_path(profile_file).
+
+        Args:
+            profile_file: Workbook the columns stand in for; they are loaded as built_path(profile_file).
+            arrays: One array per name in PROFILE_COLUMNS, all of the same length.
+            built_from: Files the columns were built from; the entry is valid while all are unchanged.
+
+        Returns:
+            The entry directory.
+        """
+        missing = [col for col in PROFILE_COLUMNS if col not in arrays]
+        if missing:
+            raise ValueError(f"Profile columns missing: {missing}")
+        rows = len(arrays["Hour"])
+        if any(len(arrays[col]) != rows for col in PROFILE_COLUMNS):
+            raise ValueError("Profile columns must all have the same length.")
+
+        entry = self.entry_dir(built_path(profile_file))
+        entry.mkdir(parents=True, exist_ok=True)
+
+        # Stat before hashing, like convert(): a source saved meanwhile invalidates the entry
+        sources = {}
+        for path in built_from:
+            stat = Path(path).stat()
+            sources[str(Path(path).resolve())] = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha256": file_digest(path),
+            }
+
+        self._write_entry(entry, {
+            "Hour": np.asarray(arrays["Hour"], dtype="datetime64[ns]"),
+            **{col: np.asarray(arrays[col], dtype=np.float64) for col in PROFILE_COLUMNS[1:]},
+        }, {
+            "source": str(Path(profile_file).resolve()),
+            "built_from": sources,
+            "rows": int(rows),
+            "columns": list(PROFILE_COLUMNS),
+        })
+        return entry
+
+    def _write_entry(self, entry: Path, arrays: Dict[str, np.ndarray], meta: dict) -> None:
+        # Invalidate first, then swap files in atomically, then publish the new metadata
+        meta_path = entry / _META_FILE
+        if meta_path.exists():
+            meta_path.unlink()
+
+        for col, values in arrays.items():
+            tmp_path = entry / f"{col}.tmp.npy"
+            np.save(tmp_path, values)
+            os.replace(tmp_path, entry / f"{col}.npy")
+
+        self._write_meta(entry, meta)
+
+    def _is_valid(self, profile_file, entry: Path) -> bool:
+        meta = self._read_meta(entry)
+        if meta is None or meta.get("columns") != list(PROFILE_COLUMNS):
+            return False
+        if not all((entry / f"{col}.npy").exists() for col in PROFILE_COLUMNS):
+            return False
+
+        # Built entries are checked against their sources, workbook entries against the workbook
+        if ("built_from" in meta) != is_built(profile_file):
+            return False
+        signatures = meta["built_from"] if "built_from" in meta else {profile_file: meta}
+        recorded = json.dumps(meta, sort_keys=True)
+        if not all(self._is_unchanged(path, signature) for path, signature in signatures.items()):
+            return False
+
+        # Only touched: keep the entry and record the new mtime/size
+        if json.dumps(meta, sort_keys=True) != recorded:
+            self._write_meta(entry, meta)
+        return True
+
+    @staticmethod
+    def _is_unchanged(path, signature: dict) -> bool:
+        """Compares a file to its recorded mtime/size/sha256, updating mtime/size if only those changed."""
+        try:
+            stat = Path(path).stat()
+        except OSError:
+            return False
+        if signature["mtime_ns"] == stat.st_mtime_ns and signature["size"] == stat.st_size:
+            return True
+
+        # Touched but possibly unchanged (e.g. re-saved or copied): fall back to the content hash
+        if signature["sha256"] != file_digest(path):
+            return False
+
+        signature["mtime_ns"] = stat.st_mtime_ns
+        signature["size"] = stat.st_size
+        return True
+
+    @staticmethod
+    def _read_meta(entry: Path) -> Optional[dict]:
+        try:
+            with open(entry / _META_FILE) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_meta(entry: Path, meta: dict) -> None:
+        tmp_path = entry / f"{_META_FILE}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, entry / _META_FILE)
+
+
+default_store = ProfileStore()
+
+
+def load_profile_frame(profile_file) -> pd.DataFrame:
+    """
+    Returns the profile workbook as a DataFrame indexed by 'Hour'.
+
+    Paths go through the binary profile store; anything else (e.g. an uploaded file
+    object) is parsed with pd.read_excel as before.
+    """
+    if isinstance(profile_file, (str, os.PathLike)):
+        return default_store.load_frame(profile_file)
+
+    df = pd.read_excel(profile_file)
+    df.set_index('Hour', inplace=True)
+    return df
@@ -1,15 +1,38 @@
+import os
 from typing import Any
 import pandas as pd
+from models.profile_bundle import ProfileBundle
 from models.resource import Wind, PV
+from utils.instrumentation import instrumented
+from utils.profile_store import default_store, load_profile_frame
 
 
-def get_profiles(wind_cap, solar_cap, profile_file) -> tuple[Any, Any]:
-    df = pd.read_excel(profile_file)
+@instrumented("load_profiles")
+def load_profile_bundle(profile_file) -> ProfileBundle:
+    if isinstance(profile_file, ProfileBundle):
+        return profile_file
+
+    if isinstance(profile_file, (str, os.PathLike)):
+        # Build straight from the memory-mapped store columns so nothing is copied
+        columns = default_store.load(profile_file)
+        bundle = ProfileBundle(columns["Hour"], columns["wind_profile"], columns["solar_profile"],
+                               columns["spot"], columns["cnp"])
+        bundle.source = profile_file
+        return bundle
+
+    return ProfileBundle.from_frame(load_profile_frame(profile_file))
 
-    df.set_index('Hour', inplace=True)
 
-    wind_profile = df['wind_profile']
-    solar_profile = df['solar_profile']
+@instrumented()
+def get_profiles(wind_cap, solar_cap, profile_file) -> tuple[Any, Any]:
+    if isinstance(profile_file, ProfileBundle):
+        wind_profile = pd.Series(profile_file.wind_profile, index=profile_file.index, name='wind_profile')
+        solar_profile = pd.Series(profile_file.solar_profile, index=profile_file.index, name='solar_profile')
+    else:
+        df = load_profile_frame(profile_file)
+
+        wind_profile = df['wind_profile']
+        solar_profile = df['solar_profile']
 
     wind = Wind(wind_cap, wind_profile)
     solar = PV(solar_cap, solar_profile)
@@ -17,4 +40,4 @@ def get_profiles(wind_cap, solar_cap, profile_file) -> tuple[Any, Any]:
     wind_prod = wind.get_production()
     solar_prod = solar.get_production()
 
-    return wind_prod, solar_prod
\ No newline at end of file
+    return wind_prod, solar_prod
@@ -0,0 +1,196 @@
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from config import RESULT_CACHE_DIR
+
+# Bump when the simulation logic or the cached value layout changes so stale entries are never served
+CACHE_VERSION = 1
+
+_ENTRY_SUFFIX = ".pkl"
+
+# Share of max_disk_bytes the disk tier is trimmed to once it is over the limit
+EVICT_TO = 0.8
+
+
+def make_key(*parts) -> str:
+    """
+    Returns a content hash of the given key parts.
+
+    Numbers are normalised (int, float and NumPy scalars of equal value give the same key),
+    arrays are hashed by dtype, shape and bytes, everything else by repr().
+    """
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"v{CACHE_VERSION}".encode())
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            h.update(f"|{part.dtype.str}{part.shape}|".encode())
+            h.update(np.ascontiguousarray(part).tobytes())
+            continue
+        if isinstance(part, np.generic):
+            part = part.item()
+        if isinstance(part, (int, float)) and not isinstance(part, bool):
+            part = float(part)
+        h.update(f"|{part!r}".encode())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache of finished simulation results keyed by make_key().
+
+    The memory tier is an LRU of at most memory_size entries. The disk tier pickles every
+    entry into cache_dir and, once the directory grows past max_disk_bytes, deletes the least
+    recently used files (by mtime, which a hit refreshes). The directory size is scanned on
+    the first write and then kept as a running total; it is only rescanned when the total
+    passes max_disk_bytes, which also picks up entries written by other processes. Eviction
+    goes down to EVICT_TO x max_disk_bytes, so a full cache is not rescanned on every write.
+    memory_size=0 or cache_dir=None switch the respective tier off.
+
+    Counters: memory_hits, disk_hits, misses.
+    """
+
+    def __init__(self, memory_size: int = 16, cache_dir=RESULT_CACHE_DIR, max_disk_bytes: int = 1 << 30):
+        self.memory_size = memory_size
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._disk_bytes: Optional[int] = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the cached value or None."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return self._memory[key]
+
+        value = self._read_disk(key)
+        if value is not None:
+            self.disk_hits += 1
+            self._remember(key, value)
+            return value
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Any) -> None:
+        self._remember(key, value)
+        self._write_disk(key, value)
+
+    def clear(self) -> None:
+        """Empties both tiers; the counters are kept."""
+        self._memory.clear()
+        for path in self._disk_entries():
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        self._disk_bytes = None
+
+    def stats(self) -> Dict[str, int]:
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / (hits + self.misses) if hits + self.misses else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self._disk_entries()),
+        }
+
+    def _remember(self, key: str, value: Any) -> None:
+        if self.memory_size <= 0:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{_ENTRY_SUFFIX}"
+
+    def _disk_entries(self):
+        if self.cache_dir is None or not self.cache_dir.exists():
+            return []
+        return list(self.cache_dir.glob(f"*{_ENTRY_SUFFIX}"))
+
+    def _read_disk(self, key: str) -> Optional[Any]:
+        if self.cache_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Truncated or written by incompatible code: drop it and recompute
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            self._disk_bytes = None
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def _write_disk(self, key: str, value: Any) -> None:
+        if self.cache_dir is None or self.max_disk_bytes <= 0:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # Unique temp name: batch workers may write the same entry concurrently
+        tmp_path = self.cache_dir / f"{key}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        size = tmp_path.stat().st_size
+        path = self._path(key)
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp_path, path)
+
+        if self._disk_bytes is None:
+            self._evict()
+            return
+        self._disk_bytes += size - replaced
+        if self._disk_bytes > self.max_disk_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Rescans the directory, deletes the oldest entries down to the low mark, resets the total."""
+        entries = []
+        for path in self._disk_entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        limit = self.max_disk_bytes if total <= self.max_disk_bytes else EVICT_TO * self.max_disk_bytes
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= limit:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._disk_bytes = total
+
+
+default_result_cache = ResultCache()
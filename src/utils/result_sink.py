@@ -0,0 +1,176 @@
+import csv
+import io
+import math
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from openpyxl import Workbook
+
+SINK_FORMATS = ("csv", "xlsx", "parquet")
+
+
+def _nan_to_none(row: list) -> list:
+    return [None if isinstance(v, float) and math.isnan(v) else v for v in row]
+
+
+class ResultSink:
+    """
+    Writes simulation result rows (the per-year dicts of simulate_dispatch) as they are produced,
+    so a batch never has to hold all of its results in memory.
+
+    Columns are fixed by the first row written; later rows are written in that column order and
+    keys missing from a row are left empty. Use as a context manager or call close().
+    """
+
+    def __init__(self):
+        self.columns: Optional[List[str]] = None
+        self.rows_written = 0
+
+    def write(self, rows: List[Dict]) -> None:
+        if not rows:
+            return
+        if self.columns is None:
+            self.columns = list(rows[0].keys())
+            self._write_header()
+        self._write_rows([[row.get(col) for col in self.columns] for row in rows])
+        self.rows_written += len(rows)
+
+    def close(self) -> None:
+        pass
+
+    def _write_header(self) -> None:
+        pass
+
+    def _write_rows(self, values: List[list]) -> None:
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CsvResultSink(ResultSink):
+    """CSV to a path or a text/binary file object."""
+
+    def __init__(self, target):
+        super().__init__()
+        self._owns_file = isinstance(target, (str, os.PathLike))
+        self._wrapper = None
+        if self._owns_file:
+            self._file = open(target, "w", newline="", encoding="utf-8")
+        elif isinstance(target, io.TextIOBase):
+            self._file = target
+        else:
+            # Binary buffer (e.g. BytesIO for a download button)
+            self._wrapper = io.TextIOWrapper(target, encoding="utf-8", newline="", write_through=True)
+            self._file = self._wrapper
+        self._writer = csv.writer(self._file, lineterminator="\n")
+
+    def _write_header(self) -> None:
+        self._writer.writerow(self.columns)
+
+    def _write_rows(self, values: List[list]) -> None:
+        # Empty fields for NaN, like DataFrame.to_csv
+        self._writer.writerows([_nan_to_none(row) for row in values])
+
+    def close(self) -> None:
+        if self._owns_file:
+            self._file.close()
+        elif self._wrapper is not None:
+            # Detach so the caller's buffer stays open
+            self._wrapper.flush()
+            self._wrapper.detach()
+            self._wrapper = None
+
+
+class ExcelResultSink(ResultSink):
+    """
+    Single-sheet .xlsx through openpyxl's write-only workbook: rows are streamed out instead of
+    building a cell object per value, so memory stays flat whatever the number of rows.
+    The file is written on close().
+    """
+
+    def __init__(self, target, sheet_title: str = "Sheet1"):
+        super().__init__()
+        self._target = target
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet(sheet_title)
+
+    def _write_header(self) -> None:
+        self._sheet.append(self.columns)
+
+    def _write_rows(self, values: List[list]) -> None:
+        for row in values:
+            # Empty cells for NaN, like DataFrame.to_excel
+            self._sheet.append(_nan_to_none(row))
+
+    def close(self) -> None:
+        if self._workbook is not None:
+            self._workbook.save(self._target)
+            self._workbook = None
+
+
+class ParquetResultSink(ResultSink):
+    """
+    Columnar Parquet file written in row groups of batch_size rows. Needs pyarrow, which is
+    imported only when this sink is used.
+    """
+
+    def __init__(self, target, batch_size: int = 10_000):
+        super().__init__()
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("Writing Parquet results requires pyarrow (pip install pyarrow).") from e
+
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self._target = target
+        self._batch_size = batch_size
+        self._pending: List[list] = []
+        self._writer = None
+
+    def _write_rows(self, values: List[list]) -> None:
+        self._pending.extend(values)
+        if len(self._pending) >= self._batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        table = self._pa.Table.from_pylist([dict(zip(self.columns, row)) for row in self._pending])
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self._target, table.schema)
+        else:
+            table = table.cast(self._writer.schema)
+        self._writer.write_table(table)
+        self._pending = []
+
+    def close(self) -> None:
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def open_result_sink(target, fmt: Optional[str] = None) -> ResultSink:
+    """
+    Returns the sink for a path or file object; fmt ('csv', 'xlsx' or 'parquet') defaults to
+    the path's suffix.
+    """
+    if fmt is None:
+        if not isinstance(target, (str, os.PathLike)):
+            raise ValueError("fmt is required when writing to a file object.")
+        fmt = Path(target).suffix.lstrip(".").lower()
+
+    if fmt == "csv":
+        return CsvResultSink(target)
+    if fmt in ("xlsx", "excel"):
+        return ExcelResultSink(target)
+    if fmt in ("parquet", "pq"):
+        return ParquetResultSink(target)
+    raise ValueError(f"Unknown result format '{fmt}', expected one of {SINK_FORMATS}.")
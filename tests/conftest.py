@@ -0,0 +1,57 @@
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# The code imports from src/ as its root, like the app and main.py do
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from models.profile_bundle import ProfileBundle  # noqa: E402
+from simulation import batch as batch_module  # noqa: E402
+from simulation import simulate_dispatch as simulate_dispatch_module  # noqa: E402
+from utils.result_cache import ResultCache  # noqa: E402
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    # Results of one test must never be served to another, nor written into data/
+    monkeypatch.setattr(simulate_dispatch_module, "default_result_cache",
+                        ResultCache(cache_dir=tmp_path / "result_cache"))
+    checkpoints = ResultCache(cache_dir=tmp_path / "checkpoints")
+    monkeypatch.setattr(simulate_dispatch_module, "default_checkpoint_cache", checkpoints)
+    monkeypatch.setattr(batch_module, "default_checkpoint_cache", checkpoints)
+    simulate_dispatch_module.clear_physical_cache()
+    yield
+    simulate_dispatch_module.clear_physical_cache()
+
+
+@pytest.fixture(scope="session")
+def profile_frame() -> pd.DataFrame:
+    """The reference profile (tests/data/profile.csv) indexed by 'Hour'."""
+    return pd.read_csv(DATA_DIR / "profile.csv", parse_dates=["Hour"]).set_index("Hour")
+
+
+@pytest.fixture(scope="session")
+def profiles(profile_frame) -> ProfileBundle:
+    return ProfileBundle.from_frame(profile_frame)
+
+
+@pytest.fixture(scope="session")
+def reference() -> dict:
+    """Inputs and baseline results of tests/data/make_reference.py."""
+    with open(DATA_DIR / "reference_results.json") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="session")
+def reference_hourly():
+    """Loads the baseline hourly frame of a reference configuration."""
+    def load(name: str) -> pd.DataFrame:
+        return pd.read_csv(DATA_DIR / f"reference_hourly_{name}.csv", index_col=0, parse_dates=True)
+    return load
@@ -0,0 +1,96 @@
+"""
+Regenerates the reference fixtures of tests/test_reference.py with the baseline algorithm.
+
+The profile is four weeks around a new year (two partial years), so the storage state has to
+carry across a year boundary. The yearly results and hourly frames of every configuration in
+CONFIGS are computed by the original hour-by-hour dispatch of the baseline commit and must be
+reproduced by the current code. Run it against a checkout of that commit:
+
+    git worktree add /tmp/baseline e1bf05f
+    PYTHONPATH=/tmp/baseline/src python tests/data/make_reference.py
+"""
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from simulation.simulate_dispatch import simulate_dispatch
+from utils.profiles import get_profiles
+
+DATA_DIR = Path(__file__).resolve().parent
+PROFILE_CSV = DATA_DIR / "profile.csv"
+RESULTS_JSON = DATA_DIR / "reference_results.json"
+
+PRICES = dict(
+    wind_price=45.0, solar_price=38.0, missing_energy_price=110.0,
+    battery_1h_price=1.5, battery_2h_price=2.0, battery_4h_price=3.0,
+    battery_6h_price=3.5, battery_8h_price=4.0, battery_12h_price=5.0,
+)
+NO_STORAGE = dict(battery_1h_mw=0.0, battery_2h_mw=0.0, battery_4h_mw=0.0,
+                  battery_6h_mw=0.0, battery_8h_mw=0.0, battery_12h_mw=0.0)
+
+CONFIGS = {
+    "baseload_storage": dict(wind_cap=60.0, solar_cap=40.0, baseload=25.0, is_baseload_mode=True,
+                             **dict(NO_STORAGE, battery_1h_mw=5.0, battery_4h_mw=10.0, battery_12h_mw=3.0)),
+    "consumption_storage": dict(wind_cap=45.0, solar_cap=70.0, baseload=20.0, is_baseload_mode=False,
+                                **dict(NO_STORAGE, battery_2h_mw=8.0, battery_6h_mw=8.0)),
+    "baseload_no_storage": dict(wind_cap=80.0, solar_cap=20.0, baseload=30.0, is_baseload_mode=True,
+                                **NO_STORAGE),
+}
+
+BESS_RTE = 0.86
+
+
+def make_profile() -> pd.DataFrame:
+    """Hourly wind, solar, spot and cnp from 2023-12-18 to 2024-01-14, rounded for a small CSV."""
+    rng = np.random.default_rng(2024)
+    hours = pd.date_range("2023-12-18", "2024-01-15", freq="h", inclusive="left")
+    n = len(hours)
+    hour = hours.hour.to_numpy()
+
+    noise = np.cumsum(rng.normal(0, 0.3, n))
+    noise -= np.linspace(noise[0], noise[-1], n)
+    wind = 1 / (1 + np.exp(-(noise - 0.3)))
+    solar = np.clip(np.sin(np.pi * (hour - 8) / 8), 0, None) * rng.uniform(0.1, 0.5, n // 24).repeat(24)
+    daily = np.sin(2 * np.pi * (hour - 6) / 24)
+    cnp = 1000 * (1 + 0.15 * daily) + rng.normal(0, 20, n)
+    spot = 70 + 25 * daily - 60 * wind - 30 * solar + rng.normal(0, 10, n)
+
+    return pd.DataFrame({
+        "Hour": hours,
+        "spot": spot.round(2),
+        "cnp": cnp.round(1),
+        "wind_profile": wind.round(4),
+        "solar_profile": solar.round(4),
+    })
+
+
+def hourly_csv(name: str) -> Path:
+    return DATA_DIR / f"reference_hourly_{name}.csv"
+
+
+def main() -> None:
+    profile = make_profile()
+    profile.to_csv(PROFILE_CSV, index=False)
+
+    references = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # The baseline reads its profiles from a workbook
+        workbook = Path(tmp) / "profiles.xlsx"
+        pd.read_csv(PROFILE_CSV, parse_dates=["Hour"]).to_excel(workbook, index=False)
+
+        for name, config in CONFIGS.items():
+            wind_prod, solar_prod = get_profiles(config["wind_cap"], config["solar_cap"], workbook)
+            results, hourly = simulate_dispatch(workbook, wind_prod, solar_prod, **config, **PRICES,
+                                                bess_rte=BESS_RTE)
+            references[name] = {"inputs": config, "results": results}
+            hourly.to_csv(hourly_csv(name))
+
+    with open(RESULTS_JSON, "w") as f:
+        json.dump({"prices": PRICES, "bess_rte": BESS_RTE, "configs": references}, f, indent=1, default=float)
+
+
+if __name__ == "__main__":
+    main()
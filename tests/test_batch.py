@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+from config import PROFILE_FILES
+from simulation.batch import (BATCH_INPUT_COLUMNS, COUNTRY_COLUMN, PROFILE_SOURCE_COLUMN, iter_batch,
+                              iter_country_batch, run_batch, simulate_countries)
+
+
+@pytest.fixture
+def input_rows(reference):
+    rows = []
+    for name in ("baseload_storage", "baseload_no_storage"):
+        inputs = {k: v for k, v in reference["configs"][name]["inputs"].items() if k != "is_baseload_mode"}
+        rows.append({**reference["prices"], **inputs})
+    # Same physical inputs as the first row, other prices
+    rows.append(dict(rows[0], wind_price=60.0))
+    return pd.DataFrame(rows)[BATCH_INPUT_COLUMNS]
+
+
+def test_rows_are_numbered_and_match_the_baseline(profiles, reference, input_rows):
+    results = list(iter_batch(input_rows, profiles, True, bess_rte=reference["bess_rte"]))
+
+    assert len(results) == 3
+    for k, (row_results, name) in enumerate(zip(results, ["baseload_storage", "baseload_no_storage"]), start=1):
+        expected = [dict(result, **{"Simulation id": k}) for result in reference["configs"][name]["results"]]
+        assert [{key: r[key] for key in expected[0]} for r in row_results] == expected
+    assert [r["Simulation id"] for r in results[2]] == [3, 3]
+    assert [r["Wind PaP price, EUR/MWh"] for r in results[2]] == [60.0, 60.0]
+
+
+def test_results_record_the_profile_source(profiles, input_rows):
+    results = run_batch(input_rows.iloc[:1], profiles, True)
+    assert {r[PROFILE_SOURCE_COLUMN] for r in results} == {"in-memory"}
+
+
+def test_missing_inputs_count_as_zero(profiles, input_rows):
+    rows = input_rows.iloc[:1].copy()
+    rows["battery_12h_mw"] = None
+    results = run_batch(rows, profiles, True)
+    assert all(r["BESS_12h_CHARGE_MW"] == 0 for r in results)
+
+
+def test_unknown_country_is_an_error(input_rows):
+    with pytest.raises(ValueError, match="Unknown countries"):
+        next(iter_country_batch(input_rows, ["XX"], True))
+    with pytest.raises(ValueError):
+        next(iter_country_batch(input_rows, ["EE"], True, profiles="other"))
+
+
+def country_results(input_rows, country, row_ids=None):
+    if not PROFILE_FILES[country].exists():
+        pytest.skip(f"{PROFILE_FILES[country].name} is not available.")
+    results = run_batch(input_rows, PROFILE_FILES[country], True)
+    if row_ids is not None:
+        results = [dict(r, **{"Simulation id": row_ids[r["Simulation id"] - 1]}) for r in results]
+    return [{"country": country, **r} for r in results]
+
+
+def test_simulate_countries_equals_each_country_alone(input_rows):
+    inputs = input_rows.iloc[0].to_dict()
+    expected = country_results(input_rows.iloc[:1], "EE") + country_results(input_rows.iloc[:1], "LV")
+
+    results = simulate_countries(["EE", "LV"], True, **inputs)
+    pd.testing.assert_frame_equal(results, pd.DataFrame(expected))
+
+
+def test_country_column_runs_each_row_on_its_own_country(input_rows):
+    rows = input_rows.iloc[:2].assign(**{COUNTRY_COLUMN: ["lv", "EE "]})
+    expected = country_results(rows.iloc[:1], "LV") + country_results(rows.iloc[1:], "EE", row_ids=[2])
+
+    results = [r for row in iter_country_batch(rows, ["PL"], True) for r in row]
+    assert results == expected
+
+
+def test_simulate_countries_rejects_unknown_inputs():
+    with pytest.raises(ValueError, match="wind_capacity"):
+        simulate_countries(["EE"], True, wind_capacity=10)
@@ -0,0 +1,78 @@
+import pytest
+
+from models.profile_bundle import ProfileBundle
+from simulation import simulate_dispatch as simulate_dispatch_module
+from simulation.simulate_dispatch import clear_physical_cache, simulate_dispatch
+from utils.profiles import get_profiles
+from utils.result_cache import ResultCache
+
+
+@pytest.fixture
+def dispatched_years(monkeypatch):
+    """Years passed to dispatch_year, in call order."""
+    years = []
+    dispatch_year = simulate_dispatch_module.dispatch_year
+
+    def counting(profiles, year, *args, **kwargs):
+        years.append(year)
+        return dispatch_year(profiles, year, *args, **kwargs)
+
+    monkeypatch.setattr(simulate_dispatch_module, "dispatch_year", counting)
+    return years
+
+
+def first_year(profiles):
+    span = profiles.year_slice(profiles.years[0])
+    return ProfileBundle(profiles.index[span], profiles.wind_profile[span], profiles.solar_profile[span],
+                         profiles.spot[span], profiles.cnp[span])
+
+
+def run(profiles, reference, checkpoints=None, collect_hourly="none"):
+    inputs = reference["configs"]["baseload_storage"]["inputs"]
+    wind_prod, solar_prod = get_profiles(inputs["wind_cap"], inputs["solar_cap"], profiles)
+    clear_physical_cache()
+    return simulate_dispatch(profiles, wind_prod, solar_prod, **inputs, **reference["prices"],
+                             bess_rte=reference["bess_rte"], use_cache=False, collect_hourly=collect_hourly,
+                             checkpoints=checkpoints)
+
+
+def test_extended_profile_dispatches_only_new_years(profiles, reference, tmp_path, dispatched_years):
+    checkpoints = ResultCache(memory_size=0, cache_dir=tmp_path)
+
+    run(first_year(profiles), reference, checkpoints)
+    assert dispatched_years == profiles.years[:1]
+
+    dispatched_years.clear()
+    results, _ = run(profiles, reference, checkpoints)
+    assert dispatched_years == profiles.years[1:]
+    assert results == reference["configs"]["baseload_storage"]["results"]
+
+    dispatched_years.clear()
+    assert run(profiles, reference, checkpoints)[0] == results
+    assert dispatched_years == []
+
+
+def test_changed_year_is_dispatched_again(profiles, reference, tmp_path, dispatched_years):
+    checkpoints = ResultCache(memory_size=0, cache_dir=tmp_path)
+    run(profiles, reference, checkpoints)
+
+    spot = profiles.spot.copy()
+    spot[profiles.year_slice(profiles.years[-1])] += 1.0
+    changed = ProfileBundle(profiles.index, profiles.wind_profile, profiles.solar_profile, spot, profiles.cnp)
+
+    dispatched_years.clear()
+    results, _ = run(changed, reference, checkpoints)
+    assert dispatched_years == profiles.years[1:]
+    assert results == run(changed, reference)[0]
+
+
+def test_checkpoints_are_off_by_default(profiles, reference):
+    run(profiles, reference)
+    assert simulate_dispatch_module.default_checkpoint_cache.stats()["disk_entries"] == 0
+
+
+@pytest.mark.parametrize("collect_hourly", ["full", "compact"])
+def test_hourly_runs_do_not_use_checkpoints(profiles, reference, tmp_path, collect_hourly):
+    checkpoints = ResultCache(memory_size=0, cache_dir=tmp_path)
+    run(profiles, reference, checkpoints, collect_hourly)
+    assert checkpoints.stats()["disk_entries"] == 0
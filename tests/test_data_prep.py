@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import data_prep
+from utils.data_prep import build_profiles, check_hours, normalize_production
+from utils.profile_store import ProfileStore, built_path
+
+YIELDS = pd.DataFrame({"Year": [2023, 2024], "WIND - Annual prod MWh, MW": [3000.0, 3100.0],
+                       "SOLAR - Annual prod MWh, MW": [1000.0, 1050.0]})
+
+
+def hours(start, end):
+    return pd.date_range(start, end, freq="h", inclusive="left")
+
+
+def test_every_year_sums_to_its_annual_yield():
+    index = hours("2023-12-30", "2024-01-03")
+    # Excel timestamps come a few milliseconds early: midnight must stay in the new year
+    raw = pd.DataFrame({"Hour": index - pd.Timedelta(milliseconds=4), "Wind": np.linspace(1, 2, len(index)),
+                        "Solar": np.r_[np.nan, np.ones(len(index) - 1)]})
+    raw.loc[30, "Wind"] = np.nan
+
+    profiles = normalize_production(raw, YIELDS)
+
+    assert (profiles["Hour"] == index).all()
+    totals = profiles.groupby("Year")[["wind_profile", "solar_profile"]].sum()
+    np.testing.assert_allclose(totals["wind_profile"], [3000.0, 3100.0])
+    # The gap takes the hour before; the first hour has nothing before it and is flagged
+    assert profiles.loc[30, "wind_profile"] == profiles.loc[29, "wind_profile"]
+    assert profiles["solar_no_data"].tolist() == [True] + [False] * (len(index) - 1)
+    assert profiles.loc[0, "solar_profile"] == 0.0
+
+
+def test_year_without_yield_is_an_error():
+    index = hours("2025-01-01", "2025-01-02")
+    raw = pd.DataFrame({"Hour": index, "Wind": 1.0, "Solar": 1.0})
+    with pytest.raises(ValueError, match=r"\[2025\]"):
+        normalize_production(raw, YIELDS)
+
+
+def test_check_hours_reports_gaps_and_hours_per_year():
+    year = hours("2023-01-01", "2024-01-01")
+    # The DST spring-forward hour and a short outage
+    timeline = year.delete([2042, 4000, 4001, 4002])
+
+    report = check_hours(timeline)
+    assert report["hours_per_year"] == {2023: 8756}
+    assert report["gaps"] == [[str(year[2041]), 1], [str(year[3999]), 3]]
+
+
+@pytest.mark.parametrize("timeline", [
+    hours("2023-01-01", "2024-01-01").insert(10, pd.Timestamp("2023-01-01 05:00")),
+    hours("2023-01-01", "2024-01-01")[::-1],
+])
+def test_check_hours_rejects_duplicate_or_unordered_hours(timeline):
+    with pytest.raises(ValueError, match="strictly increasing"):
+        check_hours(timeline)
+
+
+def test_check_hours_rejects_short_years():
+    timeline = hours("2023-01-01", "2024-01-01").delete(slice(100, 149))
+    with pytest.raises(ValueError, match="2023: 49"):
+        check_hours(timeline)
+    assert check_hours(timeline, max_missing_per_year=49)["hours_per_year"] == {2023: 8711}
+    with pytest.raises(ValueError, match="no hours"):
+        check_hours(pd.DatetimeIndex([]))
+
+
+@pytest.fixture(scope="module")
+def country_workbooks(tmp_path_factory):
+    """PV_WIND_PROD, YIELD and profiles workbooks of one year for a country 'XX'."""
+    folder = tmp_path_factory.mktemp("country")
+    year = hours("2023-01-01", "2024-01-01")
+    production = pd.DataFrame({"Hour": year, "Wind": 2.0, "Solar": np.where(year.hour == 12, 5.0, 0.0)})
+    # The market timeline misses the DST hour and has one hour the production lacks
+    production = production.drop(index=[100])
+    market = pd.DataFrame({"Hour": year.delete(2042), "spot": 50.0, "cnp": 1000.0})
+
+    paths = {name: folder / f"{name}.xlsx" for name in ("production", "yield", "profiles_XX")}
+    production.to_excel(paths["production"], index=False)
+    YIELDS.to_excel(paths["yield"], index=False)
+    market.to_excel(paths["profiles_XX"], index=False)
+    return paths
+
+
+def test_built_profiles_are_stored_under_their_own_key(country_workbooks, tmp_path, monkeypatch):
+    monkeypatch.setattr(data_prep, "PRODUCTION_SOURCES",
+                        {"XX": (country_workbooks["production"], country_workbooks["yield"])})
+    monkeypatch.setattr(data_prep, "PROFILE_FILES", {"XX": country_workbooks["profiles_XX"]})
+
+    report = build_profiles(["XX"], workers=1, cache_dir=tmp_path)["XX"]
+
+    assert report["profile_file"] == str(built_path(country_workbooks["profiles_XX"]))
+    assert report["rows"] == 8759
+    assert report["filled_hours"] == 1
+    assert report["dropped_hours"] == 1
+
+    store = ProfileStore(tmp_path)
+    columns = store.load(report["profile_file"])
+    # One hour filled from the hour before, one dropped: both are worth the same flat 3000 / 8759
+    assert columns["wind_profile"].sum() == pytest.approx(3000.0)
+    assert columns["solar_profile"].max() == pytest.approx(1000.0 / 365)
+    np.testing.assert_array_equal(columns["spot"], 50.0)
+
+
+def test_unknown_country_is_an_error(tmp_path):
+    with pytest.raises(ValueError, match="Unknown countries"):
+        build_profiles(["XX"], cache_dir=tmp_path)
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.profile_bundle import ProfileBundle
+from simulation.simulate_dispatch import simulate_dispatch
+from utils.demand_curve import DemandCurve
+from utils.profiles import get_profiles
+
+
+def curve(start, periods, freq, values=None):
+    index = pd.date_range(start, periods=periods, freq=freq)
+    if values is None:
+        values = np.arange(periods, dtype=np.float64)
+    return DemandCurve(index, values)
+
+
+def bundle(start, periods, freq="h"):
+    index = pd.date_range(start, periods=periods, freq=freq)
+    ones = np.ones(periods)
+    return ProfileBundle(index, ones, ones, ones, ones)
+
+
+def test_same_step_curve_is_taken_as_is():
+    profiles = bundle("2024-01-01", 48)
+    np.testing.assert_array_equal(curve("2024-01-01", 48, "h").align(profiles), np.arange(48))
+
+
+def test_finer_curve_is_averaged_per_profile_step():
+    profiles = bundle("2024-01-01", 24)
+    aligned = curve("2024-01-01", 96, "15min").align(profiles)
+    np.testing.assert_allclose(aligned, np.arange(96).reshape(24, 4).mean(axis=1))
+
+
+def test_coarser_curve_is_held_within_its_step():
+    profiles = bundle("2024-01-01", 96, "15min")
+    aligned = curve("2024-01-01", 24, "h").align(profiles)
+    np.testing.assert_array_equal(aligned, np.repeat(np.arange(24), 4))
+
+
+def test_excel_timestamp_jitter_is_rounded():
+    index = pd.date_range("2024-01-01", periods=24, freq="h") - pd.Timedelta(milliseconds=6)
+    ones = np.ones(24)
+    profiles = ProfileBundle(index, ones, ones, ones, ones)
+    np.testing.assert_array_equal(curve("2024-01-01", 24, "h").align(profiles), np.arange(24))
+
+
+def test_other_years_take_the_same_calendar_time():
+    # One year of load (2023) on a profile of 2024, leap day included
+    hours = pd.date_range("2023-01-01", "2024-01-01", freq="h", inclusive="left")
+    load = DemandCurve(hours, hours.dayofyear * 100 + hours.hour)
+    profiles = bundle("2024-02-28", 72)
+
+    aligned = load.align(profiles)
+    feb28 = 59 * 100 + np.arange(24)
+    np.testing.assert_array_equal(aligned[:24], feb28)
+    # 29 February falls back to 28 February
+    np.testing.assert_array_equal(aligned[24:48], feb28)
+    np.testing.assert_array_equal(aligned[48:], 60 * 100 + np.arange(24))
+
+
+def test_uncovered_steps_are_an_error():
+    profiles = bundle("2024-01-01", 48)
+    with pytest.raises(ValueError, match="does not cover"):
+        curve("2024-01-01", 24, "h").align(profiles)
+
+
+def test_incompatible_steps_are_an_error():
+    profiles = bundle("2024-01-01", 24)
+    with pytest.raises(ValueError):
+        curve("2024-01-01", 60, "40min").align(profiles)
+
+
+@pytest.mark.parametrize("values", [[1.0, np.nan, 1.0], [1.0, -1.0, 1.0]])
+def test_invalid_values_are_an_error(values):
+    with pytest.raises(ValueError):
+        curve("2024-01-01", 3, "h", values)
+
+
+def test_from_frame_finds_columns_by_name():
+    df = pd.DataFrame({"Site": ["a"] * 3, "Demand": [1.0, 2.0, 3.0],
+                       "Timestamp": pd.date_range("2024-01-01", periods=3, freq="h")})
+    load = DemandCurve.from_frame(df)
+    np.testing.assert_array_equal(load.values, [1.0, 2.0, 3.0])
+    assert load.step_hours == 1.0
+
+
+def test_apply_is_cached_by_content():
+    profiles = bundle("2024-01-01", 24)
+    first = curve("2024-01-01", 24, "h").apply(profiles)
+    assert curve("2024-01-01", 24, "h").apply(profiles) is first
+    assert curve("2024-01-01", 24, "h", np.ones(24)).apply(profiles) is not first
+
+
+def test_profile_cnp_as_curve_reproduces_consumption_mode(profiles, reference):
+    inputs = reference["configs"]["consumption_storage"]["inputs"]
+    load = DemandCurve(profiles.index, profiles.cnp)
+    wind_prod, solar_prod = get_profiles(inputs["wind_cap"], inputs["solar_cap"], profiles)
+
+    results, _ = simulate_dispatch(load.apply(profiles), wind_prod, solar_prod, **inputs, **reference["prices"],
+                                   bess_rte=reference["bess_rte"], use_cache=False, collect_hourly="none")
+    assert results == reference["configs"]["consumption_storage"]["results"]
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulation.graphs.downsample import downsample_energy_stack
+from simulation.simulate_dispatch import simulate_dispatch
+from utils.profiles import get_profiles
+
+
+@pytest.fixture
+def hourly_frames(profiles, reference):
+    """The hourly dispatch frames of one configuration on hourly and 15-minute steps."""
+    inputs = reference["configs"]["baseload_storage"]["inputs"]
+    frames = {}
+    for minutes, bundle in ((60, profiles), (15, profiles.resample(15))):
+        wind_prod, solar_prod = get_profiles(inputs["wind_cap"], inputs["solar_cap"], bundle)
+        _, frames[minutes] = simulate_dispatch(bundle, wind_prod, solar_prod, **inputs, **reference["prices"],
+                                               bess_rte=reference["bess_rte"], use_cache=False)
+    return frames
+
+
+def demand(melted):
+    wide = melted.pivot(index="Date", columns="Source", values="Value")
+    return wide[["Direct Production", "Battery Discharge", "Missing Energy"]].sum(axis=1)
+
+
+@pytest.mark.parametrize("minutes", [60, 15])
+@pytest.mark.parametrize("resolution", ["adaptive", "hourly", "daily", "weekly", "lttb"])
+def test_values_are_average_power(hourly_frames, reference, minutes, resolution):
+    melted = downsample_energy_stack(hourly_frames[minutes], resolution=resolution)
+    # A flat baseload is the same number of MW whatever the step and bucket
+    np.testing.assert_allclose(demand(melted), reference["configs"]["baseload_storage"]["inputs"]["baseload"])
+
+
+@pytest.mark.parametrize("minutes", [60, 15])
+def test_adaptive_reduces_to_the_point_budget(hourly_frames, minutes):
+    frame = hourly_frames[minutes]
+    melted = downsample_energy_stack(frame, resolution="adaptive", max_points=100)
+    assert 0 < melted["Date"].nunique() <= 100
+
+
+def test_narrow_window_of_quarter_hours_is_reduced(hourly_frames):
+    frame = hourly_frames[15]
+    start = frame.index[0]
+    window = (start, start + pd.Timedelta(days=7))
+
+    melted = downsample_energy_stack(frame, resolution="adaptive", max_points=400, window=window)
+    dates = melted["Date"].drop_duplicates()
+    assert len(dates) <= 400
+    # The finest bucket that fits: 30 minutes for 7 days of 15-minute steps
+    assert (dates.diff().dropna() == pd.Timedelta(minutes=30)).all()
+
+
+def test_hourly_resolution_averages_quarter_hours_to_hours(hourly_frames):
+    quarter = downsample_energy_stack(hourly_frames[15], resolution="hourly")
+    assert quarter["Date"].nunique() == len(hourly_frames[60])
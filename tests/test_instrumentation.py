@@ -0,0 +1,95 @@
+import json
+import threading
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+from config import PROFILES_EE
+from simulation.batch import BATCH_INPUT_COLUMNS
+from utils.instrumentation import Instrumentation, active_instrumentation, instrumented, stage, use_instrumentation
+
+
+@instrumented("work")
+def work(n=1):
+    with stage("work/inner"):
+        return sum(range(n))
+
+
+def test_nothing_is_recorded_without_an_active_instrumentation():
+    recorder = Instrumentation()
+    work()
+    assert active_instrumentation() is None
+    assert recorder.report() == {}
+
+
+def test_recording_counts_nested_stages():
+    recorder = Instrumentation()
+    with recorder.recording():
+        assert active_instrumentation() is recorder
+        work()
+        work()
+    work()
+
+    report = recorder.report()
+    assert active_instrumentation() is None
+    assert report["work"]["calls"] == 2 and report["work/inner"]["calls"] == 2
+    assert report["work"]["seconds"] >= report["work/inner"]["seconds"]
+    assert report["work"]["peak_mb"] == 0
+
+
+def test_other_threads_are_not_recorded():
+    recorder = Instrumentation()
+    with recorder.recording():
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+    assert recorder.report() == {}
+
+
+def test_concurrent_callers_record_into_their_own_instrumentation():
+    recorders = [Instrumentation(), Instrumentation()]
+    barrier = threading.Barrier(2)
+
+    def run(recorder, calls):
+        use_instrumentation(recorder)
+        barrier.wait()
+        for _ in range(calls):
+            work()
+
+    threads = [threading.Thread(target=run, args=(recorder, calls)) for recorder, calls in zip(recorders, (3, 5))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [recorder.report()["work"]["calls"] for recorder in recorders] == [3, 5]
+
+
+def test_memory_peaks_are_tracked_only_while_recording():
+    recorder = Instrumentation(track_memory=True)
+    was_tracing = tracemalloc.is_tracing()
+    with recorder.recording():
+        with stage("allocate"):
+            np.ones(2**20).sum()
+    assert tracemalloc.is_tracing() == was_tracing
+
+    # 8 MiB of float64
+    assert recorder.report()["allocate"]["peak_mb"] >= 7.9
+
+
+def test_cli_writes_the_stages_of_its_run(tmp_path, reference):
+    if not PROFILES_EE.exists():
+        pytest.skip(f"{PROFILES_EE.name} is not available.")
+    inputs = {k: v for k, v in reference["configs"]["baseload_storage"]["inputs"].items() if k != "is_baseload_mode"}
+    rows = tmp_path / "rows.csv"
+    pd.DataFrame([{**reference["prices"], **inputs}])[BATCH_INPUT_COLUMNS].to_csv(rows, index=False)
+
+    assert main.main([str(rows), "--workers", "1", "--quiet", "--stages", str(tmp_path / "stages.json")]) == 0
+
+    with open(tmp_path / "stages.json") as f:
+        stages = json.load(f)["stages"]
+    assert stages["simulate_dispatch"]["calls"] == 1
+    assert active_instrumentation() is None
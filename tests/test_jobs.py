@@ -0,0 +1,173 @@
+import threading
+
+from simulation.jobs import BatchJob, JobManager
+
+TIMEOUT = 10
+
+
+def rows(n):
+    return [[{"Simulation id": k, "year": 2024}] for k in range(1, n + 1)]
+
+
+class GatedBatch:
+    """A batch iterator that yields one row each time release() is called and records close()."""
+
+    def __init__(self, n_rows, close_error=None):
+        self.rows = rows(n_rows)
+        self.gate = threading.Semaphore(0)
+        self.closed = threading.Event()
+        self.close_gate = threading.Event()
+        self.close_error = close_error
+        self.status_while_closing = None
+        self.job = None
+
+    def __iter__(self):
+        for row in self.rows:
+            assert self.gate.acquire(timeout=TIMEOUT)
+            yield row
+
+    def release(self, n=1):
+        for _ in range(n):
+            self.gate.release()
+
+    def close(self):
+        self.status_while_closing = (self.job.status, self.job.is_active, self.job.finished)
+        self.close_gate.wait(TIMEOUT)
+        self.closed.set()
+        if self.close_error:
+            raise self.close_error
+
+
+def start(batch, total_rows=None):
+    job = BatchJob("1", "test", lambda: batch, total_rows or len(batch.rows))
+    batch.job = job
+    job.start()
+    return job
+
+
+def wait_for(condition):
+    for _ in range(TIMEOUT * 100):
+        if condition():
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("condition not reached")
+
+
+def test_finished_job_has_every_row_in_order():
+    job = BatchJob("1", "test", lambda: iter(rows(5)), 5)
+    job.start()
+    assert job.wait(TIMEOUT)
+
+    assert job.status == "done"
+    assert job.rows_done == 5 and job.progress == 1.0
+    assert [r["Simulation id"] for r in job.results()] == [1, 2, 3, 4, 5]
+    assert job.finished is not None and job.seconds_left is None
+
+
+def test_cancelled_job_keeps_its_finished_rows():
+    batch = GatedBatch(10)
+    job = start(batch)
+    batch.release(3)
+    wait_for(lambda: job.rows_done == 3)
+
+    job.cancel()
+    batch.release()
+    batch.close_gate.set()
+    assert job.wait(TIMEOUT)
+
+    assert job.status == "cancelled"
+    assert [r["Simulation id"] for r in job.results()] == [1, 2, 3, 4]
+    assert batch.closed.is_set()
+
+
+def test_job_is_active_until_the_batch_is_closed():
+    batch = GatedBatch(2)
+    job = start(batch)
+    batch.release(2)
+    wait_for(lambda: batch.status_while_closing is not None)
+
+    assert batch.status_while_closing == ("running", True, None)
+    assert job.is_active
+    batch.close_gate.set()
+    assert job.wait(TIMEOUT)
+    assert job.status == "done" and job.finished is not None
+
+
+def test_failing_close_fails_the_job():
+    batch = GatedBatch(2, close_error=OSError("pool did not stop"))
+    batch.close_gate.set()
+    job = start(batch)
+    batch.release(2)
+    assert job.wait(TIMEOUT)
+
+    assert job.status == "failed"
+    assert job.error == "OSError: pool did not stop"
+    assert job.rows_done == 2
+
+
+def test_failing_batch_keeps_rows_and_error():
+    def batch():
+        yield from rows(2)
+        raise ValueError("bad row 3")
+
+    job = BatchJob("1", "test", batch, 5)
+    job.start()
+    assert job.wait(TIMEOUT)
+
+    assert job.status == "failed"
+    assert job.error == "ValueError: bad row 3"
+    assert len(job.results()) == 2
+
+
+def test_failing_make_batch_fails_the_job():
+    def make_batch():
+        raise ValueError("no profile")
+
+    job = BatchJob("1", "test", make_batch, 1)
+    job.start()
+    assert job.wait(TIMEOUT)
+    assert job.status == "failed" and job.error == "ValueError: no profile"
+    assert job.results() == []
+
+
+def test_finished_jobs_stay_until_collected():
+    jobs = JobManager()
+    first = jobs.submit("session A", lambda: iter(rows(2)), 2)
+    assert first.wait(TIMEOUT)
+    # Other sessions' jobs never push out a finished job nobody has read yet
+    for k in range(20):
+        assert jobs.submit(f"session B {k}", lambda: iter(rows(1)), 1).wait(TIMEOUT)
+
+    assert jobs.get(first.job_id) is first
+    assert jobs.collect(first.job_id) is first
+    assert len(first.results()) == 2
+    assert jobs.get(first.job_id) is None
+    assert jobs.collect(first.job_id) is None
+
+
+def test_active_jobs_are_not_collected_or_dropped():
+    jobs = JobManager(max_age=0)
+    batch = GatedBatch(1)
+    batch.close_gate.set()
+    job = jobs.submit("running", lambda: batch, 1)
+    batch.job = job
+
+    jobs.submit("other", lambda: iter(rows(1)), 1).wait(TIMEOUT)
+    assert jobs.collect(job.job_id) is None
+    assert jobs.get(job.job_id) is job
+
+    batch.release()
+    assert job.wait(TIMEOUT)
+    assert jobs.collect(job.job_id) is job
+
+
+def test_uncollected_jobs_expire():
+    jobs = JobManager(max_age=60)
+    old = jobs.submit("abandoned", lambda: iter(rows(1)), 1)
+    assert old.wait(TIMEOUT)
+
+    jobs.submit("new", lambda: iter(rows(1)), 1).wait(TIMEOUT)
+    assert jobs.get(old.job_id) is old
+    old.finished -= 61
+    jobs.submit("newer", lambda: iter(rows(1)), 1).wait(TIMEOUT)
+    assert jobs.get(old.job_id) is None
@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+import main
+from config import PROFILE_FILES
+from simulation.batch import BATCH_INPUT_COLUMNS, COUNTRY_COLUMN, PROFILE_SOURCE_COLUMN
+from utils.profiles import load_profile_bundle
+
+
+@pytest.fixture
+def input_file(tmp_path, reference):
+    rows = []
+    for name in ("baseload_storage", "baseload_no_storage"):
+        inputs = {k: v for k, v in reference["configs"][name]["inputs"].items() if k != "is_baseload_mode"}
+        rows.append({**reference["prices"], **inputs})
+    path = tmp_path / "rows.csv"
+    pd.DataFrame(rows)[BATCH_INPUT_COLUMNS].to_csv(path, index=False)
+    return path
+
+
+def years_of(country):
+    if not PROFILE_FILES[country].exists():
+        pytest.skip(f"{PROFILE_FILES[country].name} is not available.")
+    return load_profile_bundle(PROFILE_FILES[country]).years
+
+
+def test_writes_one_row_per_input_row_and_year(input_file, tmp_path):
+    years = years_of("EE")
+    output = tmp_path / "results.csv"
+
+    assert main.main([str(input_file), "--country", "EE", "--workers", "1", "--quiet", "--output", str(output)]) == 0
+
+    results = pd.read_csv(output)
+    assert len(results) == 2 * len(years)
+    assert results["Simulation id"].tolist() == [1] * len(years) + [2] * len(years)
+    assert results["year"].tolist() == years * 2
+    assert set(results[PROFILE_SOURCE_COLUMN]) == {"workbook"}
+
+
+def test_several_countries_get_a_country_column(input_file, tmp_path):
+    years = {country: years_of(country) for country in ("EE", "LV")}
+    output = tmp_path / "results.csv"
+
+    assert main.main([str(input_file), "--country", "EE", "LV", "--workers", "1", "--quiet",
+                      "--output", str(output)]) == 0
+
+    results = pd.read_csv(output)
+    assert len(results) == 2 * sum(len(y) for y in years.values())
+    assert set(results[COUNTRY_COLUMN]) == {"EE", "LV"}
+    assert results.groupby(COUNTRY_COLUMN)["Simulation id"].nunique().tolist() == [2, 2]
+
+
+def test_default_output_takes_the_format_suffix(input_file):
+    years_of("EE")
+    assert main.main([str(input_file), "--format", "xlsx", "--workers", "1", "--quiet"]) == 0
+    assert len(pd.read_excel(input_file.with_name("rows_results.xlsx"))) == 2 * len(years_of("EE"))
+
+
+def test_missing_columns_are_an_error(input_file, tmp_path, capsys):
+    pd.read_csv(input_file).drop(columns=["wind_cap"]).to_csv(input_file, index=False)
+    output = tmp_path / "results.csv"
+
+    assert main.main([str(input_file), "--quiet", "--output", str(output)]) == 2
+    assert "wind_cap" in capsys.readouterr().err
+    assert not output.exists()
+
+
+def test_unknown_country_column_is_an_error(input_file, capsys):
+    pd.read_csv(input_file).assign(**{COUNTRY_COLUMN: ["EE", "XX"]}).to_csv(input_file, index=False)
+    assert main.main([str(input_file), "--quiet"]) == 2
+    assert "XX" in capsys.readouterr().err
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import synthetic_profile_bundle
+from models.profile_bundle import ProfileBundle
+from simulation.monte_carlo import DAYS_PER_YEAR, ProfileHistory, monte_carlo_dispatch, summarize_paths
+from simulation.simulate_dispatch import simulate_dispatch
+from utils.profiles import get_profiles
+
+CONFIG = dict(wind_cap=60.0, solar_cap=40.0, baseload=20.0, battery_1h_mw=0.0, battery_2h_mw=0.0, battery_4h_mw=10.0,
+              battery_6h_mw=0.0, battery_8h_mw=0.0, battery_12h_mw=5.0)
+PRICES = dict(wind_price=45.0, solar_price=35.0, battery_1h_price=10.0, battery_2h_price=12.0,
+              battery_4h_price=15.0, battery_6h_price=18.0, battery_8h_price=20.0, battery_12h_price=25.0,
+              missing_energy_price=120.0)
+
+
+@pytest.fixture(scope="module")
+def history_profiles():
+    return synthetic_profile_bundle(years=2, start_year=2021)
+
+
+def run(profiles, n_paths=4, **kwargs):
+    return monte_carlo_dispatch(profiles, n_paths, True, **CONFIG, **PRICES, **kwargs)
+
+
+def test_paths_depend_only_on_the_seed(history_profiles):
+    paths = run(history_profiles, seed=3)
+
+    pd.testing.assert_frame_equal(run(history_profiles, seed=3), paths)
+    pd.testing.assert_frame_equal(run(history_profiles, seed=3, chunk_size=3), paths)
+    assert paths["Path"].tolist() == [1, 2, 3, 4]
+    assert not run(history_profiles, seed=4).equals(paths)
+
+
+def test_worker_processes_give_the_same_paths(history_profiles):
+    pd.testing.assert_frame_equal(run(history_profiles, seed=3, chunk_size=2, workers=2),
+                                  run(history_profiles, seed=3, chunk_size=2))
+
+
+def test_path_results_equal_simulate_dispatch_of_the_path(history_profiles):
+    history = ProfileHistory(history_profiles)
+    year_rows, days = history.sample_days(3, seed=5)
+    paths = run(history_profiles, n_paths=3, seed=5)
+
+    for p in range(3):
+        bundle = history.path_bundle(year_rows, days, p)
+        wind_prod, solar_prod = get_profiles(CONFIG["wind_cap"], CONFIG["solar_cap"], bundle)
+        (expected,), _ = simulate_dispatch(bundle, wind_prod, solar_prod, is_baseload_mode=True, **CONFIG, **PRICES,
+                                           bess_rte=0.86, use_cache=False, collect_hourly="none")
+        for key, value in expected.items():
+            if key not in ("year", "Simulation id"):
+                assert paths[key].iloc[p] == pytest.approx(value, rel=1e-9, nan_ok=True), key
+
+
+def test_percentiles_are_ordered(history_profiles):
+    summary = summarize_paths(run(history_profiles, n_paths=20), percentiles=(10, 50, 90))
+
+    assert list(summary.columns) == ["mean", "std", "min", "P10", "P50", "P90", "max"]
+    assert "Path" not in summary.index
+    ordered = summary[["min", "P10", "P50", "P90", "max"]].dropna()
+    assert (ordered.diff(axis=1).iloc[:, 1:] >= -1e-9).all().all()
+
+
+def test_history_keeps_only_complete_years(history_profiles):
+    span = slice(24 * 40, None)
+    partial = ProfileBundle(history_profiles.index[span], history_profiles.wind_profile[span],
+                            history_profiles.solar_profile[span], history_profiles.spot[span],
+                            history_profiles.cnp[span])
+    history = ProfileHistory(partial)
+
+    assert history.years == [2022]
+    assert history.series["wind_profile"].shape == (1, DAYS_PER_YEAR, 24)
+
+    first_days = slice(0, 24 * 40)
+    with pytest.raises(ValueError, match="no complete year"):
+        ProfileHistory(ProfileBundle(history_profiles.index[first_days], *(
+            np.asarray(getattr(history_profiles, name))[first_days]
+            for name in ("wind_profile", "solar_profile", "spot", "cnp"))))
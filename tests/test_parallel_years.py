@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from config import PROFILES_EE
+from simulation.simulate_dispatch import clear_physical_cache, simulate_dispatch
+from utils.profiles import get_profiles, load_profile_bundle
+
+CONFIG = dict(baseload=40.0, is_baseload_mode=True, wind_cap=100.0, solar_cap=50.0, battery_1h_mw=0.0,
+              battery_2h_mw=10.0, battery_4h_mw=20.0, battery_6h_mw=0.0, battery_8h_mw=0.0, battery_12h_mw=15.0)
+PRICES = dict(wind_price=50.0, solar_price=40.0, battery_1h_price=5.0, battery_2h_price=8.0, battery_4h_price=12.0,
+              battery_6h_price=15.0, battery_8h_price=18.0, battery_12h_price=25.0, missing_energy_price=110.0)
+
+
+@pytest.fixture(scope="module")
+def country_profiles():
+    # Parallel years need a profile loaded from a file, which the worker processes load again
+    if not PROFILES_EE.exists():
+        pytest.skip(f"{PROFILES_EE.name} is not available.")
+    return load_profile_bundle(PROFILES_EE)
+
+
+def run(profiles, **kwargs):
+    wind_prod, solar_prod = get_profiles(CONFIG["wind_cap"], CONFIG["solar_cap"], profiles)
+    # Every mode has to dispatch, not take the previous mode's physical result
+    clear_physical_cache()
+    return simulate_dispatch(profiles, wind_prod, solar_prod, **CONFIG, **PRICES, bess_rte=0.86,
+                             use_cache=False, **kwargs)
+
+
+def year_profiles(profiles, year):
+    span = profiles.year_slice(year)
+    return type(profiles)(profiles.index[span], profiles.wind_profile[span], profiles.solar_profile[span],
+                          profiles.spot[span], profiles.cnp[span])
+
+
+def test_two_pass_equals_sequential(country_profiles):
+    results, hourly = run(country_profiles)
+    parallel_results, parallel_hourly = run(country_profiles, parallel_years="two_pass", workers=2)
+
+    assert len(results) > 1
+    assert parallel_results == results
+    pd.testing.assert_frame_equal(parallel_hourly, hourly)
+
+
+def test_initial_starts_every_year_from_empty_storage(country_profiles):
+    results, _ = run(country_profiles, parallel_years="initial", workers=2, collect_hourly="none")
+
+    sequential, _ = run(country_profiles, collect_hourly="none")
+    assert results[0] == sequential[0]
+    for entry in results[1:]:
+        # Every year on its own from empty storages is what "initial" approximates the run with
+        (alone,), _ = run(year_profiles(country_profiles, entry["year"]), collect_hourly="none")
+        assert entry == alone
+
+
+def test_parallel_years_need_a_profile_file(profiles):
+    with pytest.raises(ValueError, match="file path"):
+        run(profiles, parallel_years="two_pass")
+
+
+def test_unknown_parallel_mode_is_an_error(profiles):
+    with pytest.raises(ValueError, match="parallel_years"):
+        run(profiles, parallel_years="threads")
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulation.price_bins import PriceBinHistogram
+
+
+def hourly_frame(seed=0, hours=24 * 60):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2023-12-01", periods=hours, freq="h")
+    return pd.DataFrame({
+        "Spot": rng.normal(50, 40, hours).round(2),
+        "missing_energy": rng.uniform(0, 5, hours),
+        "excess_energy": rng.uniform(0, 5, hours),
+    }, index=index)
+
+
+def groupby_summary(df, step):
+    # The same table computed directly from the hours with pandas
+    grouped = df.assign(year=df.index.year, price_bin=np.floor(df["Spot"] / step) * step)
+    summary = grouped.groupby(["year", "price_bin"]).agg(
+        hours=("Spot", "size"), missing_energy_sum=("missing_energy", "sum"), excess_energy_sum=("excess_energy", "sum"))
+    return summary.reset_index()
+
+
+@pytest.mark.parametrize("step", [1, 5, 25])
+def test_summary_matches_direct_binning(step):
+    df = hourly_frame()
+    summary = PriceBinHistogram.from_frame(df).summary(step)
+    expected = groupby_summary(df, step)
+
+    assert summary["year"].tolist() == expected["year"].tolist()
+    np.testing.assert_allclose(summary["price_bin"], expected["price_bin"])
+    assert summary["hours"].tolist() == expected["hours"].tolist()
+    np.testing.assert_allclose(summary["missing_energy_sum"], expected["missing_energy_sum"])
+    np.testing.assert_allclose(summary["excess_energy"], expected["excess_energy_sum"] / expected["hours"])
+
+
+def test_adding_in_parts_equals_adding_at_once():
+    df = hourly_frame(seed=1)
+    whole = PriceBinHistogram.from_frame(df)
+
+    parts = PriceBinHistogram()
+    for start in range(0, len(df), 100):
+        chunk = df.iloc[start:start + 100]
+        for year in np.unique(chunk.index.year):
+            hours = chunk[chunk.index.year == year]
+            parts.add(int(year), hours["Spot"].to_numpy(), missing_energy=hours["missing_energy"].to_numpy(),
+                      excess_energy=hours["excess_energy"].to_numpy())
+
+    pd.testing.assert_frame_equal(parts.summary(5), whole.summary(5))
+
+
+def test_unpriced_hours_are_skipped():
+    df = hourly_frame(hours=48)
+    df.iloc[:10, df.columns.get_loc("Spot")] = np.nan
+
+    summary = PriceBinHistogram.from_frame(df).summary(1000)
+    assert summary["hours"].sum() == 38
+    assert summary["missing_energy_sum"].sum() == pytest.approx(df["missing_energy"].iloc[10:].sum())
+
+
+def test_step_must_be_a_multiple_of_base_step():
+    histogram = PriceBinHistogram(base_step=2.0)
+    with pytest.raises(ValueError):
+        histogram.summary(3)
+    with pytest.raises(ValueError):
+        PriceBinHistogram(base_step=0)
+
+
+def test_empty_histogram_has_columns():
+    summary = PriceBinHistogram().summary()
+    assert summary.empty
+    assert list(summary.columns) == ["year", "price_bin", "hours", "missing_energy_sum", "missing_energy",
+                                     "excess_energy_sum", "excess_energy"]
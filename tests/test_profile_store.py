@@ -0,0 +1,117 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.profile_store import PROFILE_COLUMNS, ProfileStore, built_path, profile_source
+
+
+@pytest.fixture
+def workbook(tmp_path, profile_frame):
+    path = tmp_path / "profiles_XX.xlsx"
+    profile_frame.iloc[:48].reset_index().to_excel(path, index=False)
+    return path
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ProfileStore(tmp_path / "cache")
+    conversions = []
+    convert = store.convert
+    monkeypatch.setattr(store, "convert", lambda path: (conversions.append(path), convert(path))[1])
+    store.conversions = conversions
+    return store
+
+
+def built_arrays(profile_frame, rows=24):
+    frame = profile_frame.iloc[:rows]
+    arrays = {"Hour": frame.index.to_numpy()}
+    arrays.update({col: np.full(rows, 0.5) for col in PROFILE_COLUMNS[1:]})
+    return arrays
+
+
+def test_workbook_is_converted_once(store, workbook, profile_frame):
+    columns = store.load(workbook)
+    store.load(workbook)
+
+    assert len(store.conversions) == 1
+    np.testing.assert_array_equal(columns["wind_profile"], profile_frame["wind_profile"].to_numpy()[:48])
+    assert not columns["spot"].flags.writeable
+
+
+def test_touched_workbook_is_not_converted_again(store, workbook):
+    store.load(workbook)
+    stat = workbook.stat()
+    os.utime(workbook, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    store.load(workbook)
+    store.load(workbook)
+    assert len(store.conversions) == 1
+
+
+def test_changed_workbook_is_converted_again(store, workbook, profile_frame):
+    store.load(workbook)
+    changed = profile_frame.iloc[:48].reset_index()
+    changed["spot"] += 1.0
+    changed.to_excel(workbook, index=False)
+
+    columns = store.load(workbook)
+    assert len(store.conversions) == 2
+    np.testing.assert_allclose(columns["spot"], profile_frame["spot"].to_numpy()[:48] + 1.0)
+
+
+def test_missing_column_is_an_error(store, tmp_path, profile_frame):
+    path = tmp_path / "broken.xlsx"
+    profile_frame.iloc[:24].drop(columns="cnp").reset_index().to_excel(path, index=False)
+    with pytest.raises(ValueError, match="cnp"):
+        store.load(path)
+
+
+def test_built_profiles_have_their_own_key(store, workbook, profile_frame, tmp_path):
+    source = tmp_path / "production.csv"
+    source.write_text("production")
+    store.write(workbook, built_arrays(profile_frame), built_from=[workbook, source])
+
+    built = store.load(built_path(workbook))
+    shipped = store.load(workbook)
+    assert len(built["Hour"]) == 24 and np.all(built["spot"] == 0.5)
+    assert len(shipped["Hour"]) == 48
+    np.testing.assert_array_equal(shipped["spot"], profile_frame["spot"].to_numpy()[:48])
+
+
+def test_built_profiles_go_stale_with_their_sources(store, workbook, profile_frame, tmp_path):
+    source = tmp_path / "production.csv"
+    source.write_text("production")
+    store.write(workbook, built_arrays(profile_frame), built_from=[workbook, source])
+    store.load(built_path(workbook))
+
+    source.write_text("new production data")
+    with pytest.raises(ValueError, match="rebuild"):
+        store.load(built_path(workbook))
+    # The workbook is never converted in place of built profiles
+    assert store.conversions == []
+
+
+def test_missing_built_profiles_are_an_error(store, workbook):
+    with pytest.raises(ValueError):
+        store.load(built_path(workbook))
+
+
+def test_workbook_entry_written_by_a_build_is_not_served(store, workbook, profile_frame):
+    # An entry stored under the workbook's own key by an older build
+    entry = store.entry_dir(workbook)
+    entry.mkdir(parents=True)
+    store._write_entry(entry, built_arrays(profile_frame), {
+        "source": str(workbook), "built_from": {}, "rows": 24, "columns": list(PROFILE_COLUMNS),
+    })
+
+    columns = store.load(workbook)
+    assert len(store.conversions) == 1
+    assert len(columns["Hour"]) == 48
+
+
+def test_profile_source(workbook, profiles):
+    assert profile_source(workbook) == "workbook"
+    assert profile_source(str(built_path(workbook))) == "built"
+    assert profile_source(profiles) == "in-memory"
@@ -0,0 +1,102 @@
+"""
+Yearly results and hourly frames of the dispatch against the baseline algorithm.
+
+The reference values in tests/data were computed by the original hour-by-hour dispatch (see
+tests/data/make_reference.py); every dispatch path has to reproduce them.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.hourly_series import HourlySeries
+from simulation import sweep
+from simulation.simulate_dispatch import simulate_dispatch
+from simulation.sweep import sweep_dispatch
+from utils.profiles import get_profiles
+
+CONFIGS = ["baseload_storage", "consumption_storage", "baseload_no_storage"]
+
+
+def run(profiles, reference, name, **kwargs):
+    inputs = reference["configs"][name]["inputs"]
+    wind_prod, solar_prod = get_profiles(inputs["wind_cap"], inputs["solar_cap"], profiles)
+    return simulate_dispatch(profiles, wind_prod, solar_prod, **inputs, **reference["prices"],
+                             bess_rte=reference["bess_rte"], **kwargs)
+
+
+@pytest.mark.parametrize("collect_hourly", ["full", "compact", "none"])
+@pytest.mark.parametrize("name", CONFIGS)
+def test_yearly_results_match_baseline(profiles, reference, name, collect_hourly):
+    results, _ = run(profiles, reference, name, collect_hourly=collect_hourly, use_cache=False)
+    assert results == reference["configs"][name]["results"]
+
+
+@pytest.mark.parametrize("name", CONFIGS)
+def test_hourly_frame_matches_baseline(profiles, reference, reference_hourly, name):
+    expected = reference_hourly(name)
+    _, hourly = run(profiles, reference, name, use_cache=False)
+
+    assert isinstance(hourly, pd.DataFrame)
+    assert list(hourly.columns) == list(expected.columns)
+    assert (hourly.index == expected.index).all()
+    for column in expected.columns:
+        np.testing.assert_allclose(hourly[column].to_numpy(), expected[column].to_numpy(), rtol=0, atol=1e-9,
+                                   err_msg=column)
+
+
+@pytest.mark.parametrize("name", CONFIGS)
+def test_compact_hourly_matches_baseline(profiles, reference, reference_hourly, name):
+    expected = reference_hourly(name)
+    _, hourly = run(profiles, reference, name, collect_hourly="compact", use_cache=False)
+
+    assert isinstance(hourly, HourlySeries)
+    frame = hourly.to_frame()
+    assert list(frame.columns) == list(expected.columns)
+    for column in expected.columns:
+        np.testing.assert_allclose(frame[column].to_numpy(), expected[column].to_numpy(), rtol=1e-6, atol=1e-4,
+                                   err_msg=column)
+
+
+def test_no_hourly_returns_none(profiles, reference):
+    _, hourly = run(profiles, reference, "baseload_storage", collect_hourly="none", use_cache=False)
+    assert hourly is None
+
+
+@pytest.mark.parametrize("is_baseload_mode", [True, False])
+@pytest.mark.parametrize("min_configs", [0, sweep.SWEEP_MIN_CONFIGS], ids=["step_loop", "one_by_one"])
+def test_sweep_matches_baseline(profiles, reference, is_baseload_mode, min_configs, monkeypatch):
+    # The storage configurations go through the configuration-axis loop or simulate_dispatch
+    monkeypatch.setattr(sweep, "SWEEP_MIN_CONFIGS", min_configs)
+    names = [name for name in CONFIGS if reference["configs"][name]["inputs"]["is_baseload_mode"] == is_baseload_mode]
+    grid = pd.DataFrame([{k: v for k, v in reference["configs"][name]["inputs"].items() if k != "is_baseload_mode"}
+                         for name in names])
+
+    swept = sweep_dispatch(profiles, grid, is_baseload_mode, **reference["prices"], bess_rte=reference["bess_rte"])
+
+    expected = [dict(result, **{"Simulation id": k})
+                for k, name in enumerate(names, start=1) for result in reference["configs"][name]["results"]]
+    assert swept.to_dict("records") == expected
+
+
+def test_cached_results_match_baseline(profiles, reference):
+    first, _ = run(profiles, reference, "baseload_storage", simulation_id=1)
+    again, hourly = run(profiles, reference, "baseload_storage", simulation_id=7)
+
+    assert first == reference["configs"]["baseload_storage"]["results"]
+    assert again == [dict(result, **{"Simulation id": 7}) for result in first]
+    # Callers may modify the hourly frame they get back
+    hourly["Spot"] = 0.0
+    _, hourly_again = run(profiles, reference, "baseload_storage")
+    assert (hourly_again["Spot"] != 0).any()
+
+
+def test_quarter_hour_steps_keep_energy_totals(profiles, reference):
+    hourly_results, _ = run(profiles, reference, "baseload_no_storage", collect_hourly="none", use_cache=False)
+    quarter_results, quarter_hourly = run(profiles.resample(15), reference, "baseload_no_storage", use_cache=False)
+
+    assert len(quarter_hourly) == 4 * len(profiles)
+    # Without storage every quarter hour is a quarter of its hour
+    for hourly_year, quarter_year in zip(hourly_results, quarter_results):
+        for key in ("Nr of hours, h", "Demand, MWh", "Wind prod, MWh", "Solar prod, MWh", "Missing energy, MWh",
+                    "Excess wind, MWh", "Excess solar, MWh", "Res share in demand, %", "Nr of green demand hours, h"):
+            assert quarter_year[key] == hourly_year[key], key
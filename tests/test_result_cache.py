@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+
+from utils import result_cache
+from utils.result_cache import ResultCache, make_key
+
+
+def test_key_normalises_numbers():
+    assert make_key(1, 2.0) == make_key(1.0, np.int64(2)) == make_key(np.float64(1), 2)
+    assert make_key(True) != make_key(1)
+    assert make_key(1, 2) != make_key(2, 1)
+
+
+def test_key_hashes_array_contents_dtype_and_shape():
+    values = np.arange(6, dtype=np.float64)
+    assert make_key(values) == make_key(values.copy())
+    assert make_key(values) != make_key(values.astype(np.float32))
+    assert make_key(values) != make_key(values.reshape(2, 3))
+    changed = values.copy()
+    changed[3] += 1e-12
+    assert make_key(values) != make_key(changed)
+
+
+def test_key_changes_with_cache_version(monkeypatch):
+    key = make_key("simulate_dispatch", 1)
+    monkeypatch.setattr(result_cache, "CACHE_VERSION", result_cache.CACHE_VERSION + 1)
+    assert make_key("simulate_dispatch", 1) != key
+
+
+def test_memory_tier_is_lru(tmp_path):
+    cache = ResultCache(memory_size=2, cache_dir=None)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["memory_entries"] == 2
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    ResultCache(cache_dir=tmp_path).put("key", {"value": np.arange(3)})
+
+    cache = ResultCache(cache_dir=tmp_path)
+    value = cache.get("key")
+    np.testing.assert_array_equal(value["value"], np.arange(3))
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_truncated_entry_is_dropped(tmp_path):
+    cache = ResultCache(memory_size=0, cache_dir=tmp_path)
+    cache.put("key", list(range(100)))
+    path = tmp_path / "key.pkl"
+    path.write_bytes(path.read_bytes()[:10])
+
+    assert cache.get("key") is None
+    assert not path.exists()
+
+
+def test_eviction_keeps_disk_under_cap_dropping_oldest(tmp_path):
+    cache = ResultCache(memory_size=0, cache_dir=tmp_path, max_disk_bytes=10_000)
+    for k in range(30):
+        cache.put(str(k), np.zeros(100))
+        # Distinct mtimes, oldest first, whatever the file system's timestamp resolution
+        os.utime(tmp_path / f"{k}.pkl", ns=(k * 10**9, k * 10**9))
+
+    sizes = [path.stat().st_size for path in tmp_path.glob("*.pkl")]
+    assert sum(sizes) <= 10_000
+    assert cache.get("29") is not None
+    assert cache.get("0") is None
+
+
+def test_running_total_avoids_rescans_below_cap(tmp_path, monkeypatch):
+    cache = ResultCache(memory_size=0, cache_dir=tmp_path, max_disk_bytes=1 << 20)
+    scans = []
+    evict = cache._evict
+    monkeypatch.setattr(cache, "_evict", lambda: (scans.append(1), evict()))
+
+    for k in range(20):
+        cache.put(str(k), np.zeros(100))
+    cache.put("0", np.zeros(100))
+
+    # Only the first write scans the directory
+    assert len(scans) == 1
+    assert cache._disk_bytes == sum(path.stat().st_size for path in tmp_path.glob("*.pkl"))
+
+
+def test_clear_empties_both_tiers(tmp_path):
+    cache = ResultCache(cache_dir=tmp_path)
+    cache.put("key", 1)
+    cache.clear()
+    assert cache.get("key") is None
+    assert cache.stats()["disk_entries"] == 0
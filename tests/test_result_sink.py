@@ -0,0 +1,72 @@
+import io
+import math
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from utils.result_sink import CsvResultSink, ExcelResultSink, open_result_sink
+
+ROWS = [
+    {"Simulation id": 1, "year": 2023, "Missing energy, MWh": 12, "Excess energy VWAP, EUR/MWh": 31.5},
+    {"Simulation id": 1, "year": 2024, "Missing energy, MWh": 7, "Excess energy VWAP, EUR/MWh": math.nan},
+]
+
+
+def test_csv_sink_streams_rows_in_first_row_column_order(tmp_path):
+    path = tmp_path / "results.csv"
+    with open_result_sink(path) as sink:
+        sink.write(ROWS[:1])
+        sink.write([])
+        # Column order and missing keys follow the first row
+        sink.write([{"year": 2024, "Simulation id": 2, "extra": "dropped"}])
+
+    assert sink.rows_written == 2
+    df = pd.read_csv(path)
+    assert list(df.columns) == list(ROWS[0])
+    assert df["Simulation id"].tolist() == [1, 2]
+    assert df["Missing energy, MWh"].isna().tolist() == [False, True]
+
+
+def test_csv_sink_writes_nan_as_empty_field():
+    buffer = io.StringIO()
+    with CsvResultSink(buffer) as sink:
+        sink.write(ROWS)
+    assert buffer.getvalue().splitlines()[-1] == "1,2024,7,"
+
+
+def test_csv_sink_leaves_a_binary_buffer_open():
+    buffer = io.BytesIO()
+    with open_result_sink(buffer, "csv") as sink:
+        sink.write(ROWS)
+    assert not buffer.closed
+    assert pd.read_csv(io.BytesIO(buffer.getvalue())).shape == (2, 4)
+
+
+def test_excel_sink_round_trips(tmp_path):
+    path = tmp_path / "results.xlsx"
+    with ExcelResultSink(path) as sink:
+        sink.write(ROWS)
+
+    sheet = load_workbook(path).active
+    values = list(sheet.values)
+    assert list(values[0]) == list(ROWS[0])
+    assert list(values[1]) == [1, 2023, 12, 31.5]
+    assert list(values[2]) == [1, 2024, 7, None]
+
+
+def test_parquet_sink_round_trips(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "results.parquet"
+    with open_result_sink(path) as sink:
+        sink.write(ROWS)
+
+    df = pd.read_parquet(path)
+    assert df["year"].tolist() == [2023, 2024]
+
+
+def test_unknown_format_is_an_error(tmp_path):
+    with pytest.raises(ValueError):
+        open_result_sink(tmp_path / "results.json")
+    with pytest.raises(ValueError):
+        open_result_sink(io.BytesIO())
@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from simulation.simulate import append_to_excel
+
+ROWS = pd.DataFrame({"year": [2023, 2024], "Missing energy, MWh": [12.0, 7.0]})
+
+
+def workbook(path, cells):
+    wb = Workbook()
+    for (row, col), value in cells.items():
+        wb.active.cell(row=row, column=col, value=value)
+    wb.save(path)
+
+
+@pytest.mark.parametrize("cells", [{}, {(1, 1): "Title"}, {(1, 1): "Title", (5, 2): 2022, (5, 3): 1.0}])
+def test_rows_go_to_the_first_empty_row(tmp_path, cells):
+    path = tmp_path / "output.xlsx"
+    workbook(path, cells)
+    append_to_excel(ROWS, path)
+
+    sheet = load_workbook(path).active
+    first = 6 if (5, 2) in cells else 5
+    values = [row for row in sheet.iter_rows(min_row=first, min_col=1, max_col=3, values_only=True)]
+    assert values == [(None, 2023, 12.0), (None, 2024, 7.0)]
+    if cells:
+        assert sheet.cell(row=1, column=1).value == "Title"
+
+
+def test_empty_row_above_used_rows_is_an_error(tmp_path):
+    path = tmp_path / "output.xlsx"
+    workbook(path, {(8, 2): "below"})
+    with pytest.raises(ValueError, match="Row 5"):
+        append_to_excel(ROWS, path)
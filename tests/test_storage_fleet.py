@@ -0,0 +1,124 @@
+import json
+
+import numpy as np
+import pytest
+
+from models.storage import Storage
+from models.storage_fleet import StorageFleet
+from simulation.storage_factory import create_storage_fleet
+
+BATTERIES = {1: 5.0, 2: 0.0, 4: 10.0, 6: 0.0, 8: 0.0, 12: 3.0}
+
+
+def exercise(fleet, steps=200, seed=0):
+    """Random surplus and shortfall steps, as the dispatch loop would call them."""
+    rng = np.random.default_rng(seed)
+    for step in range(steps):
+        wind, solar = rng.uniform(0, 12, 2)
+        if rng.random() < 0.5:
+            fleet.charge(wind, solar)
+        else:
+            fleet.discharge(wind + solar, step // 24)
+
+
+def state(fleet):
+    return {field: list(getattr(fleet, field)) for field in StorageFleet._STATE_FIELDS}
+
+
+def test_units_are_served_highest_power_first_and_idle_last():
+    fleet = create_storage_fleet(BATTERIES, 0.86)
+    assert fleet.names == ["BESS 4h", "BESS 1h", "BESS 12h", "BESS 2h", "BESS 6h", "BESS 8h"]
+    assert fleet.has_power
+
+
+def test_charge_respects_power_volume_and_efficiency():
+    fleet = StorageFleet([4.0, 2.0], [8.0, 2.0], 0.81, ["a", "b"])
+
+    charged, wind_left, solar_left, loss = fleet.charge(6.0, 3.0)
+
+    # 4 MWh into a, 2 MWh into b (its power limit), 3 MWh left over in the 2:1 wind/solar split
+    assert charged == pytest.approx(6.0)
+    assert wind_left == pytest.approx(2.0)
+    assert solar_left == pytest.approx(1.0)
+    assert fleet.soc == pytest.approx([4.0 * 0.9, 2.0 * 0.9])
+    assert loss == pytest.approx(6.0 * 0.1)
+    assert fleet.wind_soc[0] == pytest.approx(2 * fleet.solar_soc[0])
+
+    for _ in range(10):
+        fleet.charge(6.0, 3.0)
+    assert fleet.soc[0] == pytest.approx(8.0)
+    assert fleet.soc[1] == pytest.approx(2.0)
+
+
+def test_discharge_respects_daily_quota():
+    fleet = StorageFleet([10.0], [10.0], 1.0, ["a"])
+    fleet.charge(10.0, 0.0)
+    fleet.discharge_limit_per_day = [4.0]
+
+    delivered, _, _, _ = fleet.discharge(10.0, day=1)
+    assert delivered == pytest.approx(4.0)
+    assert fleet.discharge(10.0, day=1)[0] == 0.0
+    # A new day resets the quota
+    assert fleet.discharge(10.0, day=2)[0] == pytest.approx(4.0)
+
+
+def test_discharge_splits_wind_and_solar_by_soc_share():
+    fleet = StorageFleet([10.0], [20.0], 1.0, ["a"])
+    fleet.charge(6.0, 2.0)
+
+    delivered, wind, solar, loss = fleet.discharge(4.0, day=0)
+    assert delivered == pytest.approx(4.0)
+    assert wind == pytest.approx(3.0)
+    assert solar == pytest.approx(1.0)
+    assert loss == 0.0
+
+
+def test_idle_units_count_zero_hours():
+    fleet = create_storage_fleet(BATTERIES, 0.86)
+    fleet.discharge(5.0, day=0)
+    zero_hours = dict(zip(fleet.names, fleet.get_zero_hours()))
+    assert zero_hours["BESS 2h"] == 1.0
+    assert zero_hours["BESS 4h"] == 1.0
+
+
+def test_quarter_hour_steps_limit_energy_per_step():
+    fleet = create_storage_fleet({1: 8.0}, 1.0, step_hours=0.25)
+    charged, _, _, _ = fleet.charge(100.0, 0.0)
+    assert charged == pytest.approx(2.0)
+
+    fleet.discharge(100.0, day=0)
+    assert fleet.get_zero_hours() == pytest.approx([0.0])
+    fleet.discharge(100.0, day=0)
+    # The unit is empty now: one 15-minute step counts a quarter of a zero hour
+    assert fleet.get_zero_hours() == pytest.approx([0.25])
+
+
+def test_from_storages_copies_state():
+    storage = Storage(5.0, 10.0, 0.9, "BESS 2h")
+    storage.charge(3.0, 1.0)
+
+    fleet = StorageFleet.from_storages([storage])
+    assert fleet.soc == [pytest.approx(storage.soc)]
+    assert fleet.wind_soc == [pytest.approx(storage.wind_soc)]
+    assert fleet.charge_eff == [pytest.approx(storage.charge_eff)]
+
+
+def test_snapshot_restore_continues_identically():
+    fleet = create_storage_fleet(BATTERIES, 0.86)
+    exercise(fleet, seed=1)
+    snapshot = json.loads(json.dumps(fleet.snapshot()))
+
+    exercise(fleet, seed=2)
+
+    restored = create_storage_fleet(BATTERIES, 0.86)
+    restored.restore(snapshot)
+    exercise(restored, seed=2)
+
+    assert state(restored) == state(fleet)
+    assert restored.last_updated_day == fleet.last_updated_day
+
+
+def test_restore_rejects_other_units():
+    snapshot = create_storage_fleet(BATTERIES, 0.86).snapshot()
+    with pytest.raises(ValueError):
+        create_storage_fleet({1: 5.0, 2: 0.0, 4: 0.0, 6: 0.0, 8: 0.0, 12: 0.0}, 0.86).restore(snapshot)